@@ -1,7 +1,8 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
-from azure.storage.blob import BlobServiceClient
+from util.common import resilience
+from util.common.clients import get_blob_service_client
 from django.conf import settings
 from .forms import SignUpForm, ProfileUpdateForm
 from .models import Profile
@@ -43,14 +44,19 @@ def profile_update(request):
                 file_extension = file.name.split(".")[-1]
                 file_name = f"profile_{request.user.username}.{file_extension}"
                 try:
-                    blob_service_client = BlobServiceClient.from_connection_string(
-                        settings.AZURE_CONNECTION_STRING
-                    )
+                    blob_service_client = get_blob_service_client()
                     container_name = settings.CONTAINER_NAME
                     blob_client = blob_service_client.get_blob_client(
                         container=container_name, blob=file_name
                     )
-                    blob_client.upload_blob(file, overwrite=True)
+                    # 재시도할 때 처음부터 다시 올리도록 파일 객체 대신 bytes를 넘긴다.
+                    resilience.call(
+                        "blob",
+                        blob_client.upload_blob,
+                        file.read(),
+                        overwrite=True,
+                        deadline=settings.BLOB_DEADLINE,
+                    )
                     profile.profile_image = blob_client.url
                 except Exception as e:
                     print("==== Blob 업로드 실패 ====")
@@ -2,29 +2,16 @@ import os
 import time
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.conf import settings
 from django.http import JsonResponse
-from openai import AzureOpenAI
+from util.common.clients import get_openai_client
 from .models import AIImageGeneration
 
-GPT_CLIENT = AzureOpenAI(
-    azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-    api_key=settings.AZURE_OPENAI_API_KEY,
-    api_version=settings.AZURE_OPENAI_API_VERSION
-)
-
-DALLE_CLIENT = AzureOpenAI(
-    azure_endpoint=settings.AZURE_DALLE_ENDPOINT,
-    api_key=settings.AZURE_DALLE_API_KEY,
-    api_version=settings.AZURE_DALLE_API_VERSION
-)
-
 def generate_prompt_with_gpt4o(user_input):
     """GPT-4o를 사용해 DALL-E 3 프롬프트 생성"""
     try:
         print("GPT-4o를 사용해 프롬프트를 생성합니다...")
 
-        response = GPT_CLIENT.chat.completions.create(
+        response = get_openai_client("gpt").chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
@@ -52,7 +39,7 @@ def generate_image_with_dalle(prompt):
     try:
         print("DALL-E를 사용해 이미지를 생성합니다...")
 
-        result = DALLE_CLIENT.images.generate(
+        result = get_openai_client("dalle").images.generate(
             model="dall-e-3",
             prompt=prompt,
             n=1
@@ -0,0 +1,441 @@
+"""ASGI 배포용 비동기 뷰
+
+AI/Storage 호출을 AsyncAzureOpenAI, azure.storage.blob.aio, httpx로 이벤트 루프에서
+기다리므로 느린 호출이 워커 스레드를 점유하지 않는다. 캐시, 중복 요청 공유, 저장 방식은
+동기 뷰(app.views)와 같으며, DB 조회와 Pillow 리사이즈만 스레드에서 실행한다.
+"""
+
+import asyncio
+import binascii
+import hashlib
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from util.common import hedging, metrics, rate_limit, resilience
+from util.common.clients import (
+    get_async_blob_service_client,
+    get_async_http_client,
+    get_async_openai_client,
+)
+
+from . import prompt_cache, renditions, singleflight, speculation
+from .models import Post, StoredImage
+from .views import (
+    PROMPT_REFINE_MODEL,
+    PROMPT_REFINE_SYSTEM_PROMPT,
+    RATE_LIMITED_MESSAGE,
+    STT_SYSTEM_PROMPT,
+    UNAVAILABLE_MESSAGE,
+    UPLOAD_TIMING_KEYS,
+    GenerationError,
+    curation_error_message,
+    curation_messages,
+    find_reusable_prompt,
+    refinement_messages,
+)
+
+
+@metrics.timed_function("refine")
+async def request_refinement(user_input):
+    """views.request_refinement의 비동기 버전"""
+
+    def call(client_name, model):
+        return lambda: get_async_openai_client(client_name).chat.completions.create(
+            model=model, messages=refinement_messages(user_input)
+        )
+
+    primary = call("o3", PROMPT_REFINE_MODEL)
+    with resilience.deadline_scope(settings.OPENAI_DEADLINE):
+        if not settings.PROMPT_HEDGING:
+            return await primary()
+        return await hedging.run_async(
+            "refine", primary, call("gpt", settings.PROMPT_HEDGE_MODEL)
+        )
+
+
+async def generate_prompt_with_gpt3o(user_input, user_id):
+    """views.generate_prompt_with_gpt3o의 비동기 버전"""
+    reusable = await sync_to_async(find_reusable_prompt)(user_input, user_id)
+    if reusable:
+        return reusable
+
+    try:
+        logging.info("GPT-3o-mini를 사용해 프롬프트를 생성합니다...")
+        response = await request_refinement(user_input)
+        if not response.choices:
+            logging.error("응답을 생성하지 못했습니다.")
+            return None
+        generated_prompt = response.choices[0].message.content
+        await sync_to_async(prompt_cache.store)(
+            PROMPT_REFINE_MODEL,
+            PROMPT_REFINE_SYSTEM_PROMPT,
+            user_input,
+            generated_prompt,
+        )
+        return generated_prompt
+    except Exception as e:
+        if rate_limit.is_rate_limited(e):
+            raise GenerationError(RATE_LIMITED_MESSAGE, status=503)
+        if resilience.is_circuit_open(e):
+            raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
+        logging.error(f"GPT-3o-mini 호출 중 예외 발생: {str(e)}", exc_info=True)
+        return None
+
+
+async def refine_for_user(user_input, user_id):
+    """views.refine_for_user의 비동기 버전"""
+    with resilience.deadline_scope(settings.OPENAI_DEADLINE):
+        return await speculation.take_async(
+            user_id, user_input
+        ) or await generate_prompt_with_gpt3o(user_input, user_id)
+
+
+async def generate_image_bytes_with_dalle(prompt):
+    """DALL-E 이미지를 bytes로 반환. DALLE_RESPONSE_FORMAT이 url이면 한 번 내려받는다."""
+    try:
+        logging.info("DALL-E를 사용해 이미지를 생성합니다...")
+        if settings.DALLE_RESPONSE_FORMAT == "b64_json":
+            with metrics.timed("generate"):
+                with resilience.deadline_scope(settings.DALLE_DEADLINE):
+                    result = await get_async_openai_client("dalle").images.generate(
+                        model="dall-e-3",
+                        prompt=prompt,
+                        n=1,
+                        response_format="b64_json",
+                    )
+            if result and result.data and result.data[0].b64_json:
+                return binascii.a2b_base64(result.data[0].b64_json)
+            return None
+
+        with metrics.timed("generate"):
+            with resilience.deadline_scope(settings.DALLE_DEADLINE):
+                result = await get_async_openai_client("dalle").images.generate(
+                    model="dall-e-3", prompt=prompt, n=1
+                )
+        if not (result and result.data):
+            return None
+        return await resilience.call_async(
+            "image_download",
+            download_image,
+            result.data[0].url,
+            deadline=settings.BLOB_DEADLINE,
+        )
+
+    except Exception as e:
+        if rate_limit.is_rate_limited(e):
+            raise GenerationError(RATE_LIMITED_MESSAGE, status=503)
+        if resilience.is_circuit_open(e):
+            raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
+        logging.error(f"DALL-E 호출 중 예외 발생: {str(e)}", exc_info=True)
+        return None
+
+
+@metrics.timed_function("download")
+async def download_image(image_url):
+    response = await get_async_http_client().get(image_url)
+    response.raise_for_status()
+    return response.content
+
+
+async def upload_blob(container, blob, data, **kwargs):
+    blob_client = get_async_blob_service_client().get_blob_client(
+        container=container, blob=blob
+    )
+    with metrics.timed("upload"):
+        await resilience.call_async(
+            "blob",
+            blob_client.upload_blob,
+            data,
+            overwrite=True,
+            max_concurrency=settings.BLOB_UPLOAD_MAX_CONCURRENCY,
+            deadline=settings.BLOB_DEADLINE,
+            **kwargs,
+        )
+    return blob_client.url
+
+
+async def save_image_bytes_to_blob(image_data, prompt, user_id, timings):
+    """views.save_image_bytes_to_blob의 비동기 버전. 원본과 렌디션을 동시에 업로드"""
+    content_hash = hashlib.sha256(image_data).hexdigest()
+    stored = await StoredImage.objects.filter(content_hash=content_hash).afirst()
+    if stored:
+        logging.info(
+            f"같은 내용의 이미지가 이미 저장되어 있습니다: {stored.blob_url} "
+            f"(user {user_id}, {prompt[:20]})"
+        )
+        timings.update({key: 0.0 for key in UPLOAD_TIMING_KEYS.values()})
+        return stored.blob_url
+
+    filename = f"{content_hash}.png"
+
+    async def original():
+        started = time.monotonic()
+        url = await upload_blob(settings.CONTAINER_NAME, filename, image_data)
+        timings["upload_original"] = round(time.monotonic() - started, 3)
+        return url
+
+    async def upload_rendition(width, fmt, data):
+        url = await upload_blob(
+            renditions.RENDITION_CONTAINER,
+            renditions.blob_name(content_hash, width, fmt),
+            data,
+            content_settings=renditions.content_settings(fmt),
+        )
+        return {"width": width, "format": fmt, "url": url}
+
+    async def thumbnail():
+        started = time.monotonic()
+        # 리사이즈는 CPU 작업이므로 이벤트 루프 밖에서 실행
+        encoded = await sync_to_async(
+            renditions.make_renditions, thread_sensitive=False
+        )(image_data)
+        timings["resize"] = round(time.monotonic() - started, 3)
+        uploaded = await asyncio.gather(
+            *(upload_rendition(width, fmt, data) for width, fmt, data in encoded)
+        )
+        timings["upload_thumbnail"] = round(time.monotonic() - started, 3)
+        return list(uploaded)
+
+    blob_url, uploaded = await asyncio.gather(original(), thumbnail())
+    await StoredImage.objects.aget_or_create(
+        content_hash=content_hash,
+        defaults={
+            "blob_url": blob_url,
+            "thumb_url": renditions.fallback_url(uploaded),
+            "renditions": uploaded,
+            "size": len(image_data),
+        },
+    )
+    return blob_url
+
+
+async def run_generation_pipeline(prompt, user_id):
+    """views.run_generation_pipeline의 비동기 버전 (단계 이벤트 없음)"""
+    timings = {}
+
+    started = time.monotonic()
+    generated_prompt = await refine_for_user(prompt, user_id)
+    timings["refine"] = round(time.monotonic() - started, 3)
+    if not generated_prompt:
+        raise GenerationError("프롬프트 생성에 실패했습니다.")
+
+    started = time.monotonic()
+    image_data = await generate_image_bytes_with_dalle(generated_prompt)
+    timings["generate"] = round(time.monotonic() - started, 3)
+    if not image_data:
+        raise GenerationError("이미지 생성에 실패했습니다.")
+
+    started = time.monotonic()
+    try:
+        blob_url = await save_image_bytes_to_blob(
+            image_data, generated_prompt, user_id, timings
+        )
+    except Exception as e:
+        if resilience.is_circuit_open(e):
+            raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
+        logging.error(f"Blob Storage 저장 중 오류 발생: {str(e)}", exc_info=True)
+        raise GenerationError("이미지 저장에 실패했습니다.")
+    timings["upload"] = round(time.monotonic() - started, 3)
+    logging.info(f"이미지 생성 완료: {timings}")
+
+    return {
+        "generated_prompt": generated_prompt,
+        "image_url": blob_url,
+        "timings": timings,
+    }
+
+
+@login_required
+@require_http_methods(["POST"])
+async def generate_image(request):
+    """views.generate_image의 비동기 버전"""
+    prompt = request.POST.get("prompt", "").strip()
+    if not prompt:
+        return JsonResponse({"error": "프롬프트를 입력해주세요."}, status=400)
+
+    user = await request.auser()
+    try:
+        result = await singleflight.run_once_async(
+            singleflight.make_key("generate", user.id, prompt),
+            lambda: run_generation_pipeline(prompt, user.id),
+        )
+        return JsonResponse(
+            {
+                "image_url": result["image_url"],
+                "generated_prompt": result["generated_prompt"],
+            }
+        )
+
+    except GenerationError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+
+    except Exception as e:
+        logging.error(f"이미지 생성 중 오류 발생: {str(e)}", exc_info=True)
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+async def generate_variation(generated_prompt, user_id):
+    """views.generate_variation의 비동기 버전. 저장된 이미지 URL 또는 None"""
+    image_data = await generate_image_bytes_with_dalle(generated_prompt)
+    if not image_data:
+        return None
+    return await save_image_bytes_to_blob(image_data, generated_prompt, user_id, {})
+
+
+async def run_variation_pipeline(prompt, user_id, count):
+    """views.run_variation_pipeline의 비동기 버전. count장을 동시에 생성"""
+    generated_prompt = await refine_for_user(prompt, user_id)
+    if not generated_prompt:
+        raise GenerationError("프롬프트 생성에 실패했습니다.")
+
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *(generate_variation(generated_prompt, user_id) for _ in range(count)),
+        return_exceptions=True,
+    )
+    images = [url for url in results if isinstance(url, str)]
+    for e in results:
+        if isinstance(e, Exception) and not isinstance(e, GenerationError):
+            logging.error(f"변형 이미지 생성 중 오류 발생: {str(e)}", exc_info=e)
+    logging.info(
+        f"변형 이미지 {len(images)}/{count}장 생성 완료: "
+        f"{round(time.monotonic() - started, 3)}s"
+    )
+    if not images:
+        for e in results:
+            if isinstance(e, GenerationError) and e.status == 503:
+                raise e
+            if resilience.is_circuit_open(e):
+                raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
+        raise GenerationError("이미지 생성에 실패했습니다.")
+    return {"generated_prompt": generated_prompt, "images": images}
+
+
+@login_required
+@require_http_methods(["POST"])
+async def generate_image_variations(request):
+    """views.generate_image_variations의 비동기 버전"""
+    prompt = request.POST.get("prompt", "").strip()
+    if not prompt:
+        return JsonResponse({"error": "프롬프트를 입력해주세요."}, status=400)
+    try:
+        count = int(request.POST.get("count", settings.VARIATION_MAX_COUNT))
+    except ValueError:
+        return JsonResponse({"error": "잘못된 개수입니다."}, status=400)
+    count = max(1, min(count, settings.VARIATION_MAX_COUNT))
+
+    user = await request.auser()
+    try:
+        with rate_limit.lane(rate_limit.BACKGROUND):
+            result = await singleflight.run_once_async(
+                singleflight.make_key("variations", user.id, prompt, count),
+                lambda: run_variation_pipeline(prompt, user.id, count),
+            )
+        return JsonResponse(
+            {
+                "generated_prompt": result["generated_prompt"],
+                "images": result["images"],
+                "requested": count,
+            }
+        )
+
+    except GenerationError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+
+    except Exception as e:
+        logging.error(f"변형 이미지 생성 중 오류 발생: {str(e)}", exc_info=True)
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+async def generate_ai_curation(selected_style, user_prompt, captions, tags):
+    """views.generate_ai_curation의 비동기 버전. 실패하면 예외를 던진다."""
+    messages = curation_messages(selected_style, user_prompt, captions, tags)
+    if messages is None:
+        raise ValueError("Invalid style selected.")
+
+    with rate_limit.lane(rate_limit.BACKGROUND), metrics.timed("curation"):
+        with resilience.deadline_scope(settings.OPENAI_DEADLINE):
+            response = await get_async_openai_client("gpt").chat.completions.create(
+                model="gpt-4o", messages=messages
+            )
+    return response.choices[0].message.content
+
+
+@login_required
+@require_http_methods(["POST"])
+async def generate_curation(request, pk):
+    """views.generate_curation의 비동기 버전"""
+    post = await aget_object_or_404(Post, pk=pk)
+    caption_str = post.caption[0] if post.caption else ""
+    try:
+        data = json.loads(request.body)
+        selected_style = data.get("style", "Emotional")
+    except Exception:
+        selected_style = "Emotional"
+
+    user = await request.auser()
+    try:
+        curation_text = await singleflight.run_once_async(
+            singleflight.make_key("curation", user.id, pk, selected_style),
+            lambda: generate_ai_curation(
+                selected_style, post.title, caption_str, ", ".join(post.tags or [])
+            ),
+        )
+    except Exception as e:
+        logging.error(f"큐레이션 생성 중 오류 발생: {str(e)}", exc_info=True)
+        curation_text = curation_error_message(selected_style, e)
+    return JsonResponse({"curation_text": curation_text})
+
+
+@require_http_methods(["POST"])
+async def gpt4o_stt_api(request):
+    """views.gpt4o_stt_api의 비동기 버전"""
+    try:
+        user_input = request.POST.get("text", "").strip()
+        if not user_input:
+            return JsonResponse({"error": "텍스트가 제공되지 않았습니다."}, status=400)
+        with resilience.deadline_scope(settings.OPENAI_DEADLINE):
+            response = await get_async_openai_client("gpt").chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": STT_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_input},
+                ],
+            )
+        if not response.choices:
+            return JsonResponse({"error": "AI 처리 실패"}, status=500)
+        return JsonResponse({"result": response.choices[0].message.content})
+    except Exception as e:
+        logging.error(f"GPT4o 호출 중 예외 발생: {str(e)}", exc_info=True)
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@require_http_methods(["POST"])
+async def read_text(request):
+    """views.read_text의 비동기 버전. Speech SDK 대신 REST API로 합성"""
+    try:
+        data = json.loads(request.body)
+        caption = data.get("caption", "").strip()
+        if not caption:
+            return JsonResponse({"error": "캡션이 제공되지 않았습니다."}, status=400)
+        from util.common.azure_speech import synthesize_text_to_speech_async
+
+        audio_data = await synthesize_text_to_speech_async(caption)
+        if not audio_data:
+            raise Exception("음성 데이터를 생성하지 못했습니다.")
+        response = HttpResponse(audio_data, content_type="audio/wav")
+        response["Content-Disposition"] = 'attachment; filename="caption.wav"'
+        return response
+    except resilience.CircuitOpenError:
+        return JsonResponse({"error": UNAVAILABLE_MESSAGE}, status=503)
+    except Exception as e:
+        logging.error("read_text 에러", exc_info=True)
+        return JsonResponse({"error": str(e)}, status=500)
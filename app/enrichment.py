@@ -0,0 +1,134 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from util.common import resilience
+from util.common.azure_computer_vision import analyze_image_bytes, get_cached_analysis
+
+from .jobs import BoundedExecutor, JobQueueFull
+from .models import Post, StoredImage
+
+# 분석이 몰려도 이미지 생성 대기열을 채우지 않도록 별도의 스레드 풀을 사용
+enrichment_executor = BoundedExecutor(
+    "enrichment", "ENRICHMENT_WORKERS", "ENRICHMENT_QUEUE_SIZE"
+)
+
+
+def enqueue_post_enrichment(post_id):
+    """게시물의 캡션/태그 분석을 분석 전용 스레드 풀에 등록"""
+    try:
+        enrichment_executor.submit(run_post_enrichment, post_id)
+    except JobQueueFull:
+        logging.warning(
+            f"작업 대기열이 가득 차 게시물 {post_id} 분석을 나중에 재시도합니다."
+        )
+
+
+def analyze_post_image(image_url):
+    """저장된 이미지의 해시로 캐시된 분석 결과를 찾고, 없으면 이미지를 bytes로 분석"""
+    from .views import download_image
+
+    content_hash = (
+        StoredImage.objects.filter(blob_url=image_url)
+        .values_list("content_hash", flat=True)
+        .first()
+    )
+    if content_hash:
+        cached = get_cached_analysis(content_hash)
+        if cached is not None:
+            return cached
+    return analyze_image_bytes(download_image(image_url))
+
+
+def schedule_retry(post_id, delay):
+    """delay초 뒤 분석을 다시 등록. 그 전에 프로세스가 끝나면 retry_if_stale이 다시 등록한다."""
+    timer = threading.Timer(delay, enqueue_post_enrichment, args=(post_id,))
+    timer.daemon = True
+    timer.start()
+
+
+def retry_delay(attempts, error):
+    """attempts번째 실패 뒤 다시 분석하기까지 기다릴 시간. 브레이커가 열려 있으면 닫힐 때까지"""
+    delay = min(
+        settings.ENRICHMENT_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.ENRICHMENT_RETRY_AFTER,
+    )
+    return max(delay, getattr(error, "retry_in", 0))
+
+
+def handle_enrichment_error(post, error):
+    """분석 실패를 게시물에 반영
+
+    일시적인 오류(연결 실패, 시간 초과, 5xx, 열린 브레이커)면 분석 중으로 두고 나중에 다시
+    시도한다. 그 외의 오류이거나 ENRICHMENT_MAX_ATTEMPTS번 모두 실패하면 실패로 표시한다.
+    """
+    attempts = post.enrichment_attempts + 1
+    pending = Post.objects.filter(pk=post.pk, enrichment_status=Post.ENRICHMENT_PENDING)
+    retryable = resilience.is_transient(error) or resilience.is_circuit_open(error)
+    if retryable and attempts < settings.ENRICHMENT_MAX_ATTEMPTS:
+        delay = retry_delay(attempts, error)
+        pending.update(
+            enrichment_attempts=F("enrichment_attempts") + 1,
+            enrichment_requested_at=timezone.now(),
+        )
+        logging.warning(
+            f"게시물 {post.pk} 이미지 분석 실패, {delay:.0f}초 후 다시 시도합니다 "
+            f"({attempts}/{settings.ENRICHMENT_MAX_ATTEMPTS}): {str(error)}"
+        )
+        schedule_retry(post.pk, delay)
+        return
+    pending.update(
+        enrichment_status=Post.ENRICHMENT_FAILED,
+        enrichment_attempts=F("enrichment_attempts") + 1,
+    )
+    logging.error(f"게시물 {post.pk} 이미지 분석 실패: {str(error)}", exc_info=error)
+
+
+def run_post_enrichment(post_id):
+    """Computer Vision으로 캡션과 태그를 분석해 게시물과 TagUsage에 반영
+
+    한 번의 분석 안에서의 재시도는 다운로드/Vision 호출(util.common.resilience)이 하고,
+    그래도 일시적인 오류로 실패하면 handle_enrichment_error가 간격을 두고 다시 등록한다.
+    """
+    from .views import update_tag_usage_on_create
+
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or post.enrichment_status != Post.ENRICHMENT_PENDING:
+        return
+
+    try:
+        captions, tags = analyze_post_image(post.image)
+    except Exception as e:
+        handle_enrichment_error(post, e)
+        return
+
+    # 분석 도중 삭제되었거나 다른 워커가 먼저 처리한 경우 건너뜀
+    updated = Post.objects.filter(
+        pk=post_id, enrichment_status=Post.ENRICHMENT_PENDING
+    ).update(
+        caption=captions[0] if captions else None,
+        tags=tags or None,
+        enrichment_status=Post.ENRICHMENT_DONE,
+    )
+    if updated and tags:
+        update_tag_usage_on_create(tags)
+    logging.info(f"게시물 {post_id} 이미지 분석 완료: {tags}")
+
+
+def retry_if_stale(post):
+    """재시작 등으로 유실된 분석 작업을 다시 등록. 동시에 여러 요청이 와도 한 번만 등록된다."""
+    if post.enrichment_status != Post.ENRICHMENT_PENDING:
+        return
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.ENRICHMENT_RETRY_AFTER)
+    claimed = Post.objects.filter(
+        pk=post.pk,
+        enrichment_status=Post.ENRICHMENT_PENDING,
+        enrichment_requested_at__lt=stale,
+    ).update(enrichment_requested_at=now)
+    if claimed:
+        enqueue_post_enrichment(post.pk)
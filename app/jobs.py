@@ -0,0 +1,244 @@
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import singleflight
+from .models import GenerationJob
+from .prompt_cache import normalize_input
+
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+class JobQueueFull(Exception):
+    """작업 대기열이 가득 차서 새 작업을 받을 수 없음"""
+
+
+class BoundedExecutor:
+    """대기열 길이를 제한한 스레드 풀. 프로세스당 하나씩, 처음 사용할 때 생성한다.
+
+    workers_setting, queue_setting은 워커 수와 대기열 길이를 담은 설정 이름이다.
+    """
+
+    def __init__(self, name, workers_setting, queue_setting):
+        self.name = name
+        self.workers_setting = workers_setting
+        self.queue_setting = queue_setting
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    workers = getattr(settings, self.workers_setting)
+                    self._slots = threading.BoundedSemaphore(
+                        workers + getattr(settings, self.queue_setting)
+                    )
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix=self.name
+                    )
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """백그라운드 스레드에서 fn을 실행. 대기열이 가득 차면 JobQueueFull 발생"""
+        executor = self.get_executor()
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(f"{self.name} 작업 대기열이 가득 찼습니다.")
+
+        def run():
+            close_old_connections()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                close_old_connections()
+
+        try:
+            future = executor.submit(run)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+generation_executor = BoundedExecutor(
+    "generation-job", "GENERATION_JOB_WORKERS", "GENERATION_JOB_QUEUE_SIZE"
+)
+
+
+def submit(fn, *args, **kwargs):
+    """이미지 생성 스레드 풀에서 fn을 실행. 대기열이 가득 차면 JobQueueFull 발생"""
+    return generation_executor.submit(fn, *args, **kwargs)
+
+
+def add_listener(job_id, listener):
+    """작업의 각 단계 및 종료 시 listener(event, data)를 호출하도록 등록"""
+    with _listeners_lock:
+        _listeners.setdefault(job_id, []).append(listener)
+
+
+def remove_listeners(job_id):
+    with _listeners_lock:
+        return _listeners.pop(job_id, [])
+
+
+def find_inflight_job(user_id, prompt):
+    """같은 사용자가 같은 입력으로 등록해 아직 진행 중인 작업. 없으면 None"""
+    fresh = timezone.now() - timedelta(seconds=settings.GENERATION_JOB_TIMEOUT)
+    candidates = GenerationJob.objects.filter(
+        user_id=user_id,
+        status__in=[GenerationJob.STATUS_QUEUED, GenerationJob.STATUS_RUNNING],
+        updated_at__gte=fresh,
+    )
+    normalized = normalize_input(prompt)
+    for job in candidates:
+        if normalize_input(job.prompt) == normalized:
+            return job
+    return None
+
+
+def start_generation_job(user, prompt, listener=None):
+    """이미지 생성 작업을 등록하고 GenerationJob을 반환
+
+    같은 사용자의 같은 입력이 이미 대기/진행 중이면 새 작업을 만들지 않고 그 작업을 함께 사용한다.
+    워커가 다른 작업의 결과를 기다리며 멈춰 있지 않도록 합치는 일은 스레드 풀에 넣기 전에 한다.
+    대기열이 가득 차면 작업을 실패로 기록하고 JobQueueFull을 발생시킨다.
+    """
+    job = find_inflight_job(user.id, prompt)
+    if job:
+        logging.info(f"진행 중인 동일 생성 작업 {job.pk}을 함께 사용합니다.")
+        if listener:
+            add_listener(job.pk, listener)
+            # 등록 직전에 끝났으면 종료 이벤트를 놓쳤으므로 직접 전달
+            job.refresh_from_db()
+            if job.is_finished:
+                listener(job.status, job.as_dict())
+        return job
+
+    job = GenerationJob.objects.create(user=user, prompt=prompt)
+    if listener:
+        add_listener(job.pk, listener)
+    try:
+        submit(run_generation_job, job.pk)
+    except JobQueueFull:
+        remove_listeners(job.pk)
+        fail_job(job, "요청이 많아 처리할 수 없습니다.")
+        raise
+    return job
+
+
+def run_generation_job(job_id):
+    """이미지 생성 파이프라인을 실행하며 단계별 진행 상황을 GenerationJob에 기록
+
+    각 단계 및 종료 시 add_listener로 등록된 listener(event, data)를 호출한다.
+    """
+    from .views import GenerationError, run_generation_pipeline
+
+    def notify(event, data):
+        with _listeners_lock:
+            listeners = list(_listeners.get(job_id, ()))
+        for listener in listeners:
+            listener(event, data)
+
+    try:
+        job = GenerationJob.objects.get(pk=job_id)
+        job.status = GenerationJob.STATUS_RUNNING
+        job.save(update_fields=["status", "updated_at"])
+
+        def on_event(stage, **data):
+            job.stage = stage
+            job.timings = data.get("timings", job.timings)
+            if data.get("generated_prompt"):
+                job.generated_prompt = data["generated_prompt"]
+            job.save(
+                update_fields=["stage", "timings", "generated_prompt", "updated_at"]
+            )
+            notify(stage, data)
+
+        try:
+            # 진행 중인 동일 작업은 start_generation_job에서 합쳤으므로 잠금을 기다리지 않는다.
+            result = singleflight.run_once(
+                singleflight.make_key("generate", job.user_id, job.prompt),
+                lambda: run_generation_pipeline(
+                    job.prompt, job.user_id, on_event=on_event
+                ),
+                wait=False,
+            )
+        except GenerationError as e:
+            job.status = GenerationJob.STATUS_FAILED
+            job.error = str(e)
+        except Exception as e:
+            logging.error(
+                f"생성 작업 {job_id} 실행 중 오류 발생: {str(e)}", exc_info=True
+            )
+            job.status = GenerationJob.STATUS_FAILED
+            job.error = str(e)
+        else:
+            job.status = GenerationJob.STATUS_DONE
+            job.image_url = result["image_url"]
+            job.timings = result["timings"]
+        job.save()
+        logging.info(f"생성 작업 {job_id} 종료: {job.status} {job.timings}")
+        notify(job.status, job.as_dict())
+    finally:
+        # 작업이 도중에 죽어도 listener가 남지 않도록 정리 (스트림은 keepalive 때 상태를 다시 확인)
+        remove_listeners(job_id)
+
+
+def format_sse(event, data):
+    """Server-Sent Events 메시지 형식으로 직렬화"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def stream_job_events(job, events, keepalive=15):
+    """listener 큐에 쌓인 작업 이벤트를 SSE 메시지로 내보내는 제너레이터
+
+    작업 스레드가 종료 이벤트 없이 끝나도 스트림이 남지 않도록, keepalive마다 작업 상태를
+    다시 확인하고 GENERATION_JOB_TIMEOUT이 지나면 실패 이벤트로 끝낸다.
+    """
+    yield format_sse("queued", {"job_id": str(job.pk)})
+    deadline = time.monotonic() + settings.GENERATION_JOB_TIMEOUT
+    while True:
+        try:
+            event, data = events.get(
+                timeout=max(0, min(keepalive, deadline - time.monotonic()))
+            )
+        except queue.Empty:
+            job.refresh_from_db()
+            if not job.is_finished and time.monotonic() >= deadline:
+                fail_job(job, "작업 시간이 초과되었습니다.")
+            if job.is_finished:
+                yield format_sse(job.status, job.as_dict())
+                return
+            yield ": keepalive\n\n"
+            continue
+        yield format_sse(event, data)
+        if event in (GenerationJob.STATUS_DONE, GenerationJob.STATUS_FAILED):
+            return
+
+
+def expire_stale_job(job):
+    """워커 재시작 등으로 멈춘 작업을 실패 처리"""
+    if job.is_finished:
+        return job
+    deadline = timezone.now() - timedelta(seconds=settings.GENERATION_JOB_TIMEOUT)
+    if job.updated_at < deadline:
+        fail_job(job, "작업 시간이 초과되었습니다.")
+    return job
+
+
+def fail_job(job, error):
+    job.status = GenerationJob.STATUS_FAILED
+    job.error = error
+    job.save(update_fields=["status", "error", "updated_at"])
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app import views
+from app.models import Post, StoredImage
+from util.common import resilience
+from util.common.clients import get_blob_service_client
+
+
+class Command(BaseCommand):
+    help = (
+        "렌디션(너비별 WebP/AVIF)이 없는 예전 이미지의 렌디션을 만들어 업로드합니다. "
+        "예전 PNG 썸네일(thumb_url)은 그대로 둡니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, help="처리할 최대 이미지 수")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="렌디션이 이미 있는 이미지도 다시 만든다 (너비/형식 설정을 바꾼 뒤)",
+        )
+
+    def handle(self, *args, **options):
+        blob_service_client = get_blob_service_client()
+        done = failed = 0
+        for blob_url, stored in self.targets(options["force"]):
+            if options["limit"] is not None and done + failed >= options["limit"]:
+                break
+            try:
+                self.build(blob_service_client, blob_url, stored)
+                done += 1
+            except Exception as e:
+                failed += 1
+                logging.error(f"렌디션 생성 실패: {blob_url}: {e}", exc_info=True)
+        self.stdout.write(f"렌디션 생성 완료: {done}개, 실패: {failed}개")
+
+    def targets(self, force):
+        """(원본 URL, StoredImage 또는 None). StoredImage가 없는 예전 게시물 이미지도 포함"""
+        stored_images = StoredImage.objects.order_by("created_at")
+        if not force:
+            stored_images = stored_images.filter(renditions=[])
+        for stored in stored_images.iterator():
+            yield stored.blob_url, stored
+
+        legacy = (
+            Post.objects.exclude(image__isnull=True)
+            .exclude(image="")
+            .exclude(image__in=StoredImage.objects.values("blob_url"))
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        for blob_url in legacy.iterator():
+            yield blob_url, None
+
+    def build(self, blob_service_client, blob_url, stored):
+        blob_client = blob_service_client.get_blob_client(
+            container=settings.CONTAINER_NAME,
+            blob=urlparse(blob_url).path.split("/")[-1],
+        )
+        image_data = resilience.call(
+            "blob",
+            lambda: blob_client.download_blob().readall(),
+            deadline=settings.BLOB_DEADLINE,
+        )
+        content_hash = hashlib.sha256(image_data).hexdigest()
+
+        if stored is None:
+            existing = StoredImage.objects.filter(content_hash=content_hash).first()
+            if existing and existing.blob_url != blob_url:
+                logging.info(
+                    f"같은 내용의 이미지가 다른 blob으로 저장되어 있어 건너뜁니다: "
+                    f"{blob_url} ({existing.blob_url})"
+                )
+                return
+
+        uploaded, _ = views.upload_renditions(
+            blob_service_client, content_hash, image_data
+        )
+        if stored is None:
+            StoredImage.objects.update_or_create(
+                content_hash=content_hash,
+                defaults={
+                    "blob_url": blob_url,
+                    # 예전 썸네일은 Post.delete가 렌디션과 함께 지운다.
+                    "thumb_url": blob_url.replace("uploads/", "resized/thumb_"),
+                    "size": len(image_data),
+                    "renditions": uploaded,
+                },
+            )
+        else:
+            stored.renditions = uploaded
+            stored.save(update_fields=["renditions"])
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-18 19:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0004_generationjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RefinedPromptCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("model", models.CharField(max_length=100)),
+                ("prompt_version", models.CharField(max_length=64)),
+                ("user_input", models.TextField()),
+                ("generated_prompt", models.TextField()),
+                ("hits", models.PositiveIntegerField(default=0)),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+        ),
+    ]
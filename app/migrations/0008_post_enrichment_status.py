@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0007_storedimage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="enrichment_requested_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="enrichment_status",
+            field=models.CharField(
+                choices=[("pending", "분석중"), ("done", "완료"), ("failed", "실패")],
+                default="done",
+                max_length=20,
+            ),
+        ),
+    ]
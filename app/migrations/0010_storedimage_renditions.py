@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0009_speculativeprompt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="storedimage",
+            name="renditions",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0010_storedimage_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aigeneration",
+            name="source_prompt",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0011_aigeneration_source_prompt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="enrichment_attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
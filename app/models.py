@@ -1,12 +1,24 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import User
-from azure.storage.blob import BlobServiceClient
+from django.utils import timezone
+from util.common import resilience
+from util.common.clients import get_blob_service_client
 import logging
+import uuid
 from urllib.parse import urlparse
 
 
 class Post(models.Model):
+    ENRICHMENT_PENDING = "pending"
+    ENRICHMENT_DONE = "done"
+    ENRICHMENT_FAILED = "failed"
+    ENRICHMENT_CHOICES = [
+        (ENRICHMENT_PENDING, "분석중"),
+        (ENRICHMENT_DONE, "완료"),
+        (ENRICHMENT_FAILED, "실패"),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
     content = models.TextField()
@@ -16,25 +28,54 @@ class Post(models.Model):
     caption = models.TextField(blank=True, null=True)
     tags = models.JSONField(blank=True, null=True)
     is_public = models.BooleanField(default=False)
+    enrichment_status = models.CharField(
+        max_length=20, choices=ENRICHMENT_CHOICES, default=ENRICHMENT_DONE
+    )
+    enrichment_requested_at = models.DateTimeField(blank=True, null=True)
+    # 일시적인 오류로 다시 시도한 분석 횟수 (ENRICHMENT_MAX_ATTEMPTS)
+    enrichment_attempts = models.PositiveSmallIntegerField(default=0)
 
     def __str__(self):
         return self.title
 
     def delete(self, *args, **kwargs):
-        if self.image:
+        # 같은 내용의 이미지는 하나의 blob을 공유하므로, 다른 게시물이나 생성 기록(AIGeneration)이
+        # 참조하지 않을 때만 삭제
+        shared = bool(self.image) and (
+            Post.objects.filter(image=self.image).exclude(pk=self.pk).exists()
+            or AIGeneration.objects.filter(image_url=self.image).exists()
+        )
+        if self.image and not shared:
             try:
-                blob_service_client = BlobServiceClient.from_connection_string(
-                    settings.AZURE_CONNECTION_STRING
-                )
+                blob_service_client = get_blob_service_client()
                 container_client = blob_service_client.get_container_client(
                     settings.CONTAINER_NAME
                 )
 
                 blob_name = urlparse(self.image).path.split("/")[-1]
 
-                container_client.delete_blob(blob_name)
+                resilience.call(
+                    "blob",
+                    container_client.delete_blob,
+                    blob_name,
+                    deadline=settings.BLOB_DEADLINE,
+                )
                 logging.info(f"Blob {blob_name} deleted successfully")
 
+                stored = StoredImage.objects.filter(blob_url=self.image).first()
+                if stored:
+                    # 예전 PNG 썸네일(thumb_url)과 너비/형식별 렌디션을 모두 삭제
+                    resized_client = blob_service_client.get_container_client("resized")
+                    urls = {stored.thumb_url} | {r["url"] for r in stored.renditions}
+                    for url in urls:
+                        resilience.call(
+                            "blob",
+                            resized_client.delete_blob,
+                            urlparse(url).path.split("/")[-1],
+                            deadline=settings.BLOB_DEADLINE,
+                        )
+                    stored.delete()
+
             except Exception as e:
                 logging.error(f"Error deleting blob: {str(e)}")
 
@@ -52,11 +93,11 @@ class Post(models.Model):
             if hasattr(self.user, "profile")
             else self.user.username
         )
-    
+
     @property
     def likes_count(self):
         return self.likes.count()
-    
+
     @property
     def is_popular(self):
         return self.likes_count >= 10
@@ -89,6 +130,8 @@ class Comment(models.Model):
 class AIGeneration(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     prompt = models.TextField()
+    # generated_prompt를 만든 정제 입력. prompt는 게시 전에 고칠 수 있어 유사 입력 인덱스는 이 값을 쓴다.
+    source_prompt = models.TextField(blank=True, default="")
     generated_prompt = models.TextField()
     image_url = models.URLField(max_length=1000)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -112,8 +155,125 @@ class TagUsage(models.Model):
 
 class Like(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="likes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "post")
+
+
+class GenerationJob(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "대기중"),
+        (STATUS_RUNNING, "진행중"),
+        (STATUS_DONE, "완료"),
+        (STATUS_FAILED, "실패"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    prompt = models.TextField()
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED
+    )
+    stage = models.CharField(max_length=30, blank=True, default="")
+    timings = models.JSONField(default=dict, blank=True)
+    generated_prompt = models.TextField(blank=True, null=True)
+    image_url = models.URLField(blank=True, null=True, max_length=1000)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.user.username}'s job {self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    def as_dict(self):
+        return {
+            "job_id": str(self.id),
+            "status": self.status,
+            "stage": self.stage,
+            "timings": self.timings,
+            "generated_prompt": self.generated_prompt,
+            "image_url": self.image_url,
+            "error": self.error,
+        }
+
+
+class RefinedPromptCache(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    prompt_version = models.CharField(max_length=64)
+    user_input = models.TextField()
+    generated_prompt = models.TextField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.model} [{self.prompt_version}] {self.user_input[:30]}"
+
+
+class SingleFlightResult(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    result = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.created_at})"
+
+
+class StoredImage(models.Model):
+    """내용 해시(SHA-256)로 이름 붙인 blob과 그 URL의 대응표"""
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    blob_url = models.URLField(max_length=1000, db_index=True)
+    thumb_url = models.URLField(max_length=1000)
+    size = models.PositiveIntegerField(default=0)
+    # [{"width": 512, "format": "webp", "url": ...}] (app.renditions)
+    renditions = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def __str__(self):
+        return self.content_hash
+
+
+class SpeculativePrompt(models.Model):
+    """사용자가 입력하는 동안 미리 정제해 둔 프롬프트 (SPECULATION_TTL 동안만 유효)"""
+
+    STATUS_PENDING = "pending"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "진행중"),
+        (STATUS_DONE, "완료"),
+        (STATUS_FAILED, "실패"),
+        (STATUS_CANCELLED, "취소"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # prompt_cache.make_key와 같은 키 (정규화된 입력 + 모델 + 시스템 프롬프트 버전)
+    key = models.CharField(max_length=64)
+    user_input = models.TextField()
+    generated_prompt = models.TextField(blank=True, null=True)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
     class Meta:
-        unique_together = ('user', 'post')
\ No newline at end of file
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return f"{self.user_id} {self.user_input[:30]} ({self.status})"
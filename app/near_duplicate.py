@@ -0,0 +1,349 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from .models import AIGeneration, Post
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# 단어 끝에 붙는 한국어 조사. 긴 것부터 제거한다.
+KOREAN_PARTICLES = sorted(
+    [
+        "은", "는", "이", "가", "을", "를", "에", "의", "와", "과", "도", "로",
+        "으로", "에서", "에게", "한테", "까지", "부터", "만", "랑", "이랑",
+        "하고", "처럼", "보다", "같은",
+    ],
+    key=len,
+    reverse=True,
+)  # fmt: skip
+
+# 인덱스 대상이나 파일 형식이 바뀌면 올린다. 다른 버전의 파일은 DB로부터 다시 만든다.
+INDEX_VERSION = 2
+LOG_RECORD = np.dtype([("id", "<i8"), ("signature", "<u4", (NUM_PERM,))])
+# 로그 레코드가 이만큼 쌓이면 기준 파일로 합친다.
+COMPACT_RECORDS = 1024
+
+_rng = np.random.default_rng(20250218)
+_PERM_A = _rng.integers(1, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def _strip_particle(token):
+    for particle in KOREAN_PARTICLES:
+        if token.endswith(particle) and len(token) > len(particle) + 1:
+            return token[: -len(particle)]
+    return token
+
+
+def tokenize(text):
+    """구두점, 대소문자, 한국어 조사 차이를 제거한 토큰 목록"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = "".join(
+        " " if unicodedata.category(ch)[0] in ("P", "S") else ch for ch in text
+    )
+    return [_strip_particle(token) for token in re.split(r"\s+", text) if token]
+
+
+def shingles(text, size=3):
+    """토큰 단위 문자 n-gram 집합. 토큰 내부에서만 만들어 어순에 영향받지 않는다."""
+    result = set()
+    for token in tokenize(text):
+        padded = f"^{token}$"
+        if len(padded) <= size:
+            result.add(padded)
+            continue
+        for i in range(len(padded) - size + 1):
+            result.add(padded[i : i + size])
+    return result
+
+
+def token_similarity(a, b):
+    """두 입력의 정규화한 토큰 집합의 Jaccard 유사도"""
+    tokens_a, tokens_b = set(tokenize(a)), set(tokenize(b))
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
+def signature(text):
+    """MinHash 서명 (NUM_PERM,) uint32"""
+    grams = shingles(text)
+    if not grams:
+        return None
+    hashes = np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little"
+            )
+            for g in grams
+        ],
+        dtype=np.uint64,
+    )
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def _band_keys(sig):
+    return [sig[i * ROWS : (i + 1) * ROWS].tobytes() for i in range(BANDS)]
+
+
+class PromptIndex:
+    """AIGeneration.source_prompt의 MinHash 서명을 LSH 버킷으로 묶어 디스크에 저장하는 인덱스
+
+    디스크에는 기준 파일(path, .npz)과 추가분 로그(path.log, 고정 길이 레코드)를 둔다.
+    추가는 로그 끝에 레코드 하나를 붙이고, 로그가 COMPACT_RECORDS개를 넘으면 기준 파일로 합친다.
+    다른 프로세스는 기준 파일이 바뀌었을 때만 전부 다시 읽고, 그 밖에는 로그의 새 레코드만 읽는다.
+    파일은 항상 파일 잠금을 잡고 읽고 쓴다 (읽기는 공유, 쓰기는 배타).
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.log_path = f"{self.path}.log"
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.size = 0
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.signatures = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self.known = set()
+        self.buckets = [dict() for _ in range(BANDS)]
+        self.base_stamp = None
+        self.log_offset = 0
+
+    def _append(self, ids, signatures):
+        """메모리의 배열 끝에 추가. 용량을 두 배씩 늘려 추가 비용을 상수로 유지한다."""
+        needed = self.size + len(ids)
+        if needed > len(self.ids):
+            capacity = max(needed, 2 * len(self.ids), 64)
+            grown_ids = np.zeros(capacity, dtype=np.int64)
+            grown_signatures = np.zeros((capacity, NUM_PERM), dtype=np.uint32)
+            grown_ids[: self.size] = self.ids[: self.size]
+            grown_signatures[: self.size] = self.signatures[: self.size]
+            self.ids, self.signatures = grown_ids, grown_signatures
+        for pk, sig in zip(ids, signatures):
+            if int(pk) in self.known:
+                continue
+            row = self.size
+            self.ids[row] = pk
+            self.signatures[row] = sig
+            self.known.add(int(pk))
+            for band, key in enumerate(_band_keys(sig)):
+                self.buckets[band].setdefault(key, []).append(row)
+            self.size += 1
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load_base(self):
+        with np.load(self.path) as data:
+            version = int(data["version"]) if "version" in data else 0
+            if version != INDEX_VERSION:
+                return False
+            ids, signatures = data["ids"], data["signatures"]
+        self._reset()
+        self._append(ids, signatures)
+        self.base_stamp = self._stamp()
+        return True
+
+    def _read_log(self):
+        """마지막으로 읽은 위치 이후에 추가된 로그 레코드만 읽는다."""
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(self.log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        data = data[: len(data) - len(data) % LOG_RECORD.itemsize]
+        if data:
+            records = np.frombuffer(data, dtype=LOG_RECORD)
+            self._append(records["id"], records["signature"])
+            self.log_offset += len(data)
+
+    def _log_records(self):
+        try:
+            return os.path.getsize(self.log_path) // LOG_RECORD.itemsize
+        except OSError:
+            return 0
+
+    def _save_base(self):
+        """메모리의 내용을 기준 파일로 쓰고 로그를 비운다 (배타 잠금 안에서 호출)"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=np.int64(INDEX_VERSION),
+                ids=self.ids[: self.size],
+                signatures=self.signatures[: self.size],
+            )
+        os.replace(tmp_path, self.path)
+        open(self.log_path, "wb").close()
+        self.base_stamp = self._stamp()
+        self.log_offset = 0
+
+    def _refresh(self, lock_file, exclusive):
+        """디스크의 변경분을 반영. 기준 파일이 없거나 형식이 다르면 DB로부터 다시 만든다."""
+        stamp = self._stamp()
+        if stamp is not None and stamp == self.base_stamp:
+            self._read_log()
+            return
+        if stamp is not None and self._load_base():
+            self._read_log()
+            return
+        if not exclusive:
+            # 공유 잠금을 배타 잠금으로 바꾼 뒤, 그 사이 다른 프로세스가 만들었는지 다시 확인
+            _lock(lock_file, exclusive=True)
+            return self._refresh(lock_file, exclusive=True)
+        self._build_from_db()
+
+    def _build_from_db(self):
+        self._reset()
+        rows = (
+            AIGeneration.objects.exclude(source_prompt="")
+            .exclude(generated_prompt="")
+            .values_list("pk", "source_prompt")
+        )
+        for pk, source_prompt in rows.iterator():
+            sig = signature(source_prompt)
+            if sig is not None:
+                self._append([pk], [sig])
+        self._save_base()
+        logging.info(f"프롬프트 유사도 인덱스를 생성했습니다: {self.size}건")
+
+    def _file_lock(self, exclusive):
+        lock_file = open(f"{self.path}.lock", "a")
+        _lock(lock_file, exclusive)
+        return lock_file
+
+    def add(self, pk, prompt):
+        """새 AIGeneration 행을 인덱스에 추가하고 로그에 기록"""
+        sig = signature(prompt)
+        if sig is None:
+            return
+        with self.lock:
+            lock_file = self._file_lock(exclusive=True)
+            try:
+                self._refresh(lock_file, exclusive=True)
+                if pk in self.known:
+                    return
+                record = np.zeros(1, dtype=LOG_RECORD)
+                record["id"] = pk
+                record["signature"] = sig
+                with open(self.log_path, "ab") as f:
+                    f.write(record.tobytes())
+                self._read_log()
+                if self._log_records() >= COMPACT_RECORDS:
+                    self._save_base()
+            finally:
+                lock_file.close()
+
+    def query(self, prompt, threshold):
+        """추정 Jaccard 유사도가 threshold 이상인 [(pk, 유사도)]를 유사도가 높은 순으로 반환"""
+        sig = signature(prompt)
+        if sig is None:
+            return []
+        with self.lock:
+            lock_file = self._file_lock(exclusive=False)
+            try:
+                self._refresh(lock_file, exclusive=False)
+            finally:
+                lock_file.close()
+            candidates = set()
+            for band, key in enumerate(_band_keys(sig)):
+                candidates.update(self.buckets[band].get(key, ()))
+            if not candidates:
+                return []
+            rows = np.fromiter(candidates, dtype=np.int64)
+            similarity = (self.signatures[rows] == sig).mean(axis=1)
+            order = np.argsort(-similarity, kind="stable")
+            return [
+                (int(self.ids[rows[i]]), float(similarity[i]))
+                for i in order
+                if similarity[i] >= threshold
+            ]
+
+
+def _lock(lock_file, exclusive):
+    if fcntl:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PromptIndex(settings.PROMPT_INDEX_PATH)
+    return _index
+
+
+def find_similar_generation(prompt, user_id):
+    """유사한 과거 입력으로 만든 AIGeneration과 유사도를 반환. 없으면 (None, 0)
+
+    user_id 사용자가 만든 것이나 공개 게시물에 쓰인 것만 대상으로 한다.
+    MinHash/LSH로 찾은 후보는 정규화한 토큰 집합의 Jaccard 유사도가
+    PROMPT_REUSE_TOKEN_SIMILARITY 이상일 때만 사용한다. 문자 n-gram 유사도만으로는 긴 입력에서
+    주제나 색 같은 단어 하나가 다른 입력도 같은 입력으로 볼 수 있기 때문이다.
+    반환하는 유사도는 토큰 집합의 Jaccard 유사도다.
+    """
+    try:
+        matches = get_index().query(prompt, settings.PROMPT_SIMILARITY_THRESHOLD)
+    except Exception as e:
+        logging.error(f"프롬프트 유사도 조회 중 오류 발생: {str(e)}", exc_info=True)
+        return None, 0.0
+    if not matches:
+        return None, 0.0
+    visible = (
+        AIGeneration.objects.filter(pk__in=[pk for pk, _ in matches])
+        .exclude(generated_prompt="")
+        .filter(
+            Q(user_id=user_id)
+            | Q(image_url__in=Post.objects.filter(is_public=True).values("image"))
+        )
+    )
+    similarities = {
+        generation: token_similarity(prompt, generation.source_prompt)
+        for generation in visible
+    }
+    generation = max(similarities, key=similarities.get, default=None)
+    if (
+        generation is None
+        or similarities[generation] < settings.PROMPT_REUSE_TOKEN_SIMILARITY
+    ):
+        return None, 0.0
+    return generation, similarities[generation]
+
+
+def index_generation(generation):
+    if not generation.source_prompt or not generation.generated_prompt:
+        return
+    try:
+        get_index().add(generation.pk, generation.source_prompt)
+    except Exception as e:
+        logging.error(
+            f"프롬프트 유사도 인덱스 갱신 중 오류 발생: {str(e)}", exc_info=True
+        )
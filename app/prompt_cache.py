@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RefinedPromptCache
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_purged_versions = set()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0}
+
+
+def normalize_input(user_input):
+    """대소문자, 공백, 유니코드 표기 차이를 무시하도록 사용자 입력을 정규화"""
+    text = unicodedata.normalize("NFKC", user_input or "")
+    return " ".join(text.split()).lower()
+
+
+def prompt_version(system_prompt):
+    """시스템 프롬프트 내용의 해시. 프롬프트가 바뀌면 캐시 키도 바뀐다."""
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def make_key(model, system_prompt, user_input):
+    raw = "\0".join([model, prompt_version(system_prompt), normalize_input(user_input)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _ttl():
+    return settings.PROMPT_CACHE_TTL
+
+
+def _remember(key, value):
+    with _lock:
+        _memory[key] = (value, time.monotonic() + _ttl())
+        _memory.move_to_end(key)
+        while len(_memory) > settings.PROMPT_CACHE_MAX_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def _purge_stale(model, version):
+    """다른 버전의 시스템 프롬프트로 만든 항목과 만료된 항목을 프로세스 당 한 번 정리"""
+    if (model, version) in _purged_versions:
+        return
+    _purged_versions.add((model, version))
+    try:
+        expired = timezone.now() - timedelta(seconds=_ttl())
+        RefinedPromptCache.objects.filter(model=model).exclude(
+            prompt_version=version
+        ).delete()
+        RefinedPromptCache.objects.filter(created_at__lt=expired).delete()
+    except Exception as e:
+        logging.error(f"프롬프트 캐시 정리 중 오류 발생: {str(e)}", exc_info=True)
+
+
+def lookup(model, system_prompt, user_input):
+    """캐시된 정제 프롬프트를 반환. 없으면 None"""
+    key = make_key(model, system_prompt, user_input)
+
+    with _lock:
+        entry = _memory.get(key)
+        if entry and entry[1] > time.monotonic():
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return entry[0]
+        _memory.pop(key, None)
+
+    _purge_stale(model, prompt_version(system_prompt))
+    try:
+        expired = timezone.now() - timedelta(seconds=_ttl())
+        row = RefinedPromptCache.objects.filter(
+            key=key, created_at__gte=expired
+        ).first()
+        if row:
+            RefinedPromptCache.objects.filter(pk=row.pk).update(hits=F("hits") + 1)
+    except Exception as e:
+        logging.error(f"프롬프트 캐시 조회 중 오류 발생: {str(e)}", exc_info=True)
+        row = None
+
+    if row is None:
+        with _lock:
+            _stats["misses"] += 1
+        return None
+
+    _remember(key, row.generated_prompt)
+    with _lock:
+        _stats["db_hits"] += 1
+    return row.generated_prompt
+
+
+def store(model, system_prompt, user_input, generated_prompt):
+    """정제 프롬프트를 메모리와 DB에 저장"""
+    if not generated_prompt:
+        return
+    key = make_key(model, system_prompt, user_input)
+    _remember(key, generated_prompt)
+    try:
+        RefinedPromptCache.objects.update_or_create(
+            key=key,
+            defaults={
+                "model": model,
+                "prompt_version": prompt_version(system_prompt),
+                "user_input": normalize_input(user_input),
+                "generated_prompt": generated_prompt,
+                "created_at": timezone.now(),
+            },
+        )
+    except Exception as e:
+        logging.error(f"프롬프트 캐시 저장 중 오류 발생: {str(e)}", exc_info=True)
+    with _lock:
+        _stats["stores"] += 1
+
+
+def stats():
+    """프로세스 단위 캐시 적중/실패 횟수"""
+    with _lock:
+        return dict(_stats, memory_entries=len(_memory))
@@ -0,0 +1,134 @@
+import logging
+from io import BytesIO
+
+from django.conf import settings
+
+from util.common import metrics
+
+RENDITION_CONTAINER = "resized"
+CONTENT_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+# <picture>의 <source> 순서. 브라우저는 지원하는 첫 형식을 고른다.
+FORMAT_ORDER = ["avif", "webp"]
+# <img src>로 쓰는 대체 이미지 너비 (예전 썸네일은 500px)
+FALLBACK_WIDTH = 512
+
+_avif_supported = None
+
+
+def avif_supported():
+    """Pillow로 AVIF를 저장할 수 있는지 (Pillow 11.2+ 또는 pillow-avif-plugin)"""
+    global _avif_supported
+    if _avif_supported is None:
+        from PIL import Image, features
+
+        try:
+            import pillow_avif  # noqa: F401 (import 시 AVIF 저장 기능을 등록)
+        except ImportError:
+            pass
+        Image.init()
+        _avif_supported = "AVIF" in Image.SAVE and (
+            "avif" not in features.modules or features.check_module("avif")
+        )
+        if not _avif_supported and "avif" in settings.IMAGE_RENDITION_FORMATS:
+            logging.info("AVIF 인코더가 없어 WebP 렌디션만 만듭니다.")
+    return _avif_supported
+
+
+def rendition_formats():
+    return [
+        fmt
+        for fmt in FORMAT_ORDER
+        if fmt in settings.IMAGE_RENDITION_FORMATS
+        and (fmt != "avif" or avif_supported())
+    ]
+
+
+def blob_name(content_hash, width, fmt):
+    return f"{content_hash}_{width}.{fmt}"
+
+
+def content_settings(fmt):
+    from azure.storage.blob import ContentSettings
+
+    return ContentSettings(
+        content_type=CONTENT_TYPES[fmt],
+        cache_control=settings.IMAGE_RENDITION_CACHE_CONTROL,
+    )
+
+
+@metrics.timed_function("resize")
+def make_renditions(image_data):
+    """IMAGE_RENDITION_WIDTHS 너비마다 형식별로 인코딩한 [(너비, 형식, bytes)]
+
+    원본보다 큰 너비는 만들지 않는다. 큰 너비부터 직전 결과를 다시 줄여 리사이즈 비용을 줄인다.
+    """
+    # BytesIO(bytes)는 쓰기 전까지 원본 버퍼를 복사하지 않고 공유한다.
+    from PIL import Image
+
+    image = Image.open(BytesIO(image_data))
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+    original_width, original_height = image.size
+    widths = sorted(
+        {w for w in settings.IMAGE_RENDITION_WIDTHS if w <= original_width}
+        or {original_width},
+        reverse=True,
+    )
+    formats = rendition_formats()
+
+    encoded = []
+    for width in widths:
+        if width < image.width:
+            height = max(1, round(original_height * width / original_width))
+            image = image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            buffer = BytesIO()
+            image.save(
+                buffer,
+                format=fmt.upper(),
+                quality=settings.IMAGE_RENDITION_QUALITY.get(fmt, 80),
+            )
+            encoded.append((width, fmt, buffer.getvalue()))
+    return encoded
+
+
+def fallback_url(renditions):
+    """<img src>에 쓸 렌디션 URL. FALLBACK_WIDTH 이상 중 가장 작은 WebP(없으면 가장 큰 것)"""
+    webp = [r for r in renditions if r["format"] == "webp"]
+    candidates = sorted(webp or renditions, key=lambda r: r["width"])
+    for rendition in candidates:
+        if rendition["width"] >= FALLBACK_WIDTH:
+            return rendition["url"]
+    return candidates[-1]["url"]
+
+
+def srcset(renditions, fmt):
+    return ", ".join(
+        f"{r['url']} {r['width']}w"
+        for r in sorted(renditions, key=lambda r: r["width"])
+        if r["format"] == fmt
+    )
+
+
+def attach(posts):
+    """게시물마다 thumb(대체 이미지 URL), avif_srcset, webp_srcset을 붙인다.
+
+    렌디션이 없는 예전 이미지는 thumb만 500px PNG 썸네일로 두고 srcset은 빈 문자열이다.
+    """
+    from .models import StoredImage
+
+    posts = [post for post in posts if post.image]
+    stored = dict(
+        StoredImage.objects.filter(
+            blob_url__in={post.image for post in posts}
+        ).values_list("blob_url", "renditions")
+    )
+    for post in posts:
+        renditions = stored.get(post.image)
+        if renditions:
+            post.thumb = fallback_url(renditions)
+            post.avif_srcset = srcset(renditions, "avif")
+            post.webp_srcset = srcset(renditions, "webp")
+        else:
+            post.thumb = post.image.replace("uploads/", "resized/thumb_")
+            post.avif_srcset = post.webp_srcset = ""
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import AIGeneration
+
+
+@receiver(post_save, sender=AIGeneration)
+def add_generation_to_prompt_index(sender, instance, created, **kwargs):
+    if created:
+        # numpy는 첫 생성 시점에 불러온다.
+        from .near_duplicate import index_generation
+
+        index_generation(instance)
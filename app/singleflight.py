@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import SingleFlightResult
+from .prompt_cache import normalize_input
+
+_local_guard = threading.Lock()
+_local_locks = {}
+_async_inflight = weakref.WeakKeyDictionary()
+
+
+def make_key(scope, user_id, *parts):
+    """작업 종류, 사용자, 정규화된 입력으로 동일 요청을 식별하는 키"""
+    raw = "\0".join([scope, str(user_id), *(normalize_input(str(p)) for p in parts)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _advisory_id(key):
+    return int.from_bytes(bytes.fromhex(key[:16]), "big", signed=True)
+
+
+@contextmanager
+def _local_lock(key):
+    """같은 프로세스 안에서만 유효한 키 단위 잠금 (PostgreSQL이 아닐 때 사용)"""
+    with _local_guard:
+        entry = _local_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _local_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _local_locks.pop(key, None)
+
+
+@contextmanager
+def _advisory_lock(key):
+    """PostgreSQL advisory lock으로 프로세스/인스턴스 간 잠금. 대기 시간이 지나면 잠금 없이 진행"""
+    lock_id = _advisory_id(key)
+    deadline = time.monotonic() + settings.SINGLEFLIGHT_WAIT_TIMEOUT
+    acquired = False
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+            acquired = cursor.fetchone()[0]
+            if acquired or time.monotonic() > deadline:
+                break
+            time.sleep(0.2)
+    if not acquired:
+        logging.warning(f"single-flight 잠금 대기 시간 초과, 단독 실행합니다: {key}")
+    try:
+        yield
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+
+
+def _lock(key):
+    if connection.vendor == "postgresql":
+        return _advisory_lock(key)
+    return _local_lock(key)
+
+
+def _read_slot(key):
+    fresh = timezone.now() - timedelta(seconds=settings.SINGLEFLIGHT_RESULT_TTL)
+    row = SingleFlightResult.objects.filter(key=key, created_at__gte=fresh).first()
+    return row.result if row else None
+
+
+def _write_slot(key, result):
+    now = timezone.now()
+    SingleFlightResult.objects.update_or_create(
+        key=key, defaults={"result": result, "created_at": now}
+    )
+    stale = now - timedelta(seconds=settings.SINGLEFLIGHT_RESULT_TTL)
+    SingleFlightResult.objects.filter(created_at__lt=stale).delete()
+
+
+def run_once(key, fn, wait=True):
+    """같은 키의 작업이 이미 진행 중이면 끝날 때까지 기다렸다가 그 결과를 함께 사용
+
+    fn의 결과는 JSON 직렬화 가능해야 한다. fn이 예외를 던지면 결과를 공유하지 않으며,
+    기다리던 요청은 각자 다시 실행한다. wait=False이면 잠금을 기다리지 않고, 이미 끝난
+    결과만 사용한 뒤 직접 실행해 결과를 남긴다 (스레드 풀 워커처럼 오래 막히면 안 되는 곳).
+    """
+    result = _read_slot(key)
+    if result is not None:
+        return result
+
+    if not wait:
+        result = fn()
+        if result is not None:
+            _write_slot(key, result)
+        return result
+
+    with _lock(key):
+        result = _read_slot(key)
+        if result is not None:
+            logging.info(f"진행 중이던 동일 요청의 결과를 공유합니다: {key}")
+            return result
+
+        result = fn()
+        if result is not None:
+            _write_slot(key, result)
+        return result
+
+
+async def run_once_async(key, coro_fn):
+    """run_once의 비동기 버전
+
+    같은 이벤트 루프에서 진행 중인 작업이 있으면 그 결과를 기다려 함께 사용하고, 다른
+    프로세스와는 결과 슬롯(SingleFlightResult)으로만 공유한다. 이벤트 루프를 막지 않도록
+    DB 잠금은 잡지 않는다. coro_fn이 실패하면 기다리던 요청은 각자 다시 실행한다.
+    """
+    result = await sync_to_async(_read_slot)(key)
+    if result is not None:
+        return result
+
+    inflight = _async_inflight.setdefault(asyncio.get_running_loop(), {})
+    while key in inflight:
+        result = await asyncio.shield(inflight[key])
+        if result is not None:
+            logging.info(f"진행 중이던 동일 요청의 결과를 공유합니다: {key}")
+            return result
+
+    future = asyncio.get_running_loop().create_future()
+    inflight[key] = future
+    result = None
+    try:
+        result = await coro_fn()
+        if result is not None:
+            await sync_to_async(_write_slot)(key, result)
+        return result
+    finally:
+        inflight.pop(key, None)
+        future.set_result(result)
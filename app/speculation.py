@@ -0,0 +1,229 @@
+"""입력 중인 프롬프트를 미리 정제해 두는 speculative refinement
+
+사용자가 입력을 잠시 멈추면 home.js가 start를 호출해 백그라운드에서 프롬프트를 정제하고, 결과를
+사용자별 SpeculativePrompt에 SPECULATION_TTL 동안 보관한다. 같은 입력으로 이미지를 생성하면
+take가 그 결과를 돌려주므로 파이프라인은 바로 DALL-E 단계부터 시작한다. 아직 정제 중이면
+새로 호출하지 않고 끝날 때까지 기다린다.
+
+비용을 제한하기 위해 사용자별로 분당 SPECULATION_MAX_PER_MINUTE회, 동시에
+SPECULATION_MAX_IN_FLIGHT개까지만 실행하며, 입력이 바뀌면 이전 요청은 취소된다. 이미 시작한
+호출은 중단할 수 없으므로 결과만 버린다.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections
+from django.utils import timezone
+
+from util.common import rate_limit, resilience
+
+from . import prompt_cache
+from .models import SpeculativePrompt
+
+STARTED = "started"
+CACHED = "cached"
+LIMITED = "limited"
+SKIPPED = "skipped"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.SPECULATION_WORKERS,
+                    thread_name_prefix="speculation",
+                )
+    return _executor
+
+
+def make_key(user_input):
+    from .views import PROMPT_REFINE_MODEL, PROMPT_REFINE_SYSTEM_PROMPT
+
+    return prompt_cache.make_key(
+        PROMPT_REFINE_MODEL, PROMPT_REFINE_SYSTEM_PROMPT, user_input
+    )
+
+
+def _fresh(queryset):
+    stale = timezone.now() - timedelta(seconds=settings.SPECULATION_TTL)
+    return queryset.filter(created_at__gte=stale)
+
+
+def cancel(user, keep_key=None):
+    """사용자의 진행 중인 미리 정제 요청을 취소. keep_key는 남겨 둔다."""
+    pending = SpeculativePrompt.objects.filter(
+        user=user, status=SpeculativePrompt.STATUS_PENDING
+    )
+    if keep_key:
+        pending = pending.exclude(key=keep_key)
+    return pending.update(status=SpeculativePrompt.STATUS_CANCELLED)
+
+
+def start(user, user_input):
+    """user_input의 미리 정제를 등록하고 STARTED, CACHED, LIMITED, SKIPPED 중 하나를 반환"""
+    from .views import PROMPT_REFINE_MODEL, PROMPT_REFINE_SYSTEM_PROMPT
+
+    if len(user_input) < settings.SPECULATION_MIN_LENGTH:
+        return SKIPPED
+    if prompt_cache.lookup(
+        PROMPT_REFINE_MODEL, PROMPT_REFINE_SYSTEM_PROMPT, user_input
+    ):
+        return CACHED
+
+    key = make_key(user_input)
+    now = timezone.now()
+    SpeculativePrompt.objects.filter(
+        created_at__lt=now - timedelta(seconds=settings.SPECULATION_TTL)
+    ).delete()
+    cancel(user, keep_key=key)
+
+    existing = _fresh(SpeculativePrompt.objects.filter(user=user, key=key)).first()
+    if existing and existing.status in (
+        SpeculativePrompt.STATUS_PENDING,
+        SpeculativePrompt.STATUS_DONE,
+    ):
+        return STARTED
+
+    mine = SpeculativePrompt.objects.filter(user=user)
+    recent = mine.filter(created_at__gte=now - timedelta(minutes=1)).count()
+    in_flight = _fresh(mine.filter(finished_at__isnull=True)).count()
+    if (
+        recent >= settings.SPECULATION_MAX_PER_MINUTE
+        or in_flight >= settings.SPECULATION_MAX_IN_FLIGHT
+    ):
+        return LIMITED
+
+    try:
+        speculation, _ = SpeculativePrompt.objects.update_or_create(
+            user=user,
+            key=key,
+            defaults={
+                "user_input": user_input,
+                "generated_prompt": None,
+                "status": SpeculativePrompt.STATUS_PENDING,
+                "created_at": now,
+                "finished_at": None,
+            },
+        )
+    except IntegrityError:
+        # 같은 입력으로 동시에 요청된 경우
+        return STARTED
+    get_executor().submit(run_speculation, speculation.pk)
+    return STARTED
+
+
+def run_speculation(speculation_id):
+    """미리 정제를 실행. 시작 전이나 실행 중에 취소되었으면 결과를 버린다."""
+    from .views import request_refinement
+
+    close_old_connections()
+    try:
+        speculation = SpeculativePrompt.objects.filter(pk=speculation_id).first()
+        if speculation is None:
+            return
+        if speculation.status != SpeculativePrompt.STATUS_PENDING:
+            speculation.finished_at = timezone.now()
+            speculation.save(update_fields=["finished_at"])
+            return
+
+        status, generated_prompt = SpeculativePrompt.STATUS_FAILED, None
+        try:
+            with rate_limit.lane(rate_limit.BACKGROUND):
+                response = request_refinement(speculation.user_input)
+            if response.choices:
+                status = SpeculativePrompt.STATUS_DONE
+                generated_prompt = response.choices[0].message.content
+        except Exception as e:
+            logging.warning(f"프롬프트 미리 정제 실패 ({speculation_id}): {str(e)}")
+
+        finished_at = timezone.now()
+        updated = SpeculativePrompt.objects.filter(
+            pk=speculation_id, status=SpeculativePrompt.STATUS_PENDING
+        ).update(
+            status=status, generated_prompt=generated_prompt, finished_at=finished_at
+        )
+        if not updated:
+            SpeculativePrompt.objects.filter(pk=speculation_id).update(
+                finished_at=finished_at
+            )
+            logging.info(f"취소된 미리 정제 결과를 버립니다 ({speculation_id})")
+    finally:
+        close_old_connections()
+
+
+def _lookup(user_id, key):
+    """(종료 여부, 정제된 프롬프트). 기다릴 만한 미리 정제가 없으면 (True, None)"""
+    speculation = _fresh(
+        SpeculativePrompt.objects.filter(
+            user_id=user_id,
+            key=key,
+            status__in=[
+                SpeculativePrompt.STATUS_PENDING,
+                SpeculativePrompt.STATUS_DONE,
+            ],
+        )
+    ).first()
+    if speculation is None:
+        return True, None
+    if speculation.status == SpeculativePrompt.STATUS_DONE:
+        return True, speculation.generated_prompt
+    return False, None
+
+
+def _promote(user_input, generated_prompt):
+    """사용한 결과는 정제 프롬프트 캐시에도 저장해 다른 요청도 재사용하게 한다."""
+    from .views import PROMPT_REFINE_MODEL, PROMPT_REFINE_SYSTEM_PROMPT
+
+    prompt_cache.store(
+        PROMPT_REFINE_MODEL, PROMPT_REFINE_SYSTEM_PROMPT, user_input, generated_prompt
+    )
+    logging.info("미리 정제해 둔 프롬프트를 사용합니다.")
+
+
+def _join_deadline():
+    """정제 중인 결과를 기다릴 시각. 바깥 resilience.deadline_scope의 남은 시간을 넘지 않는다."""
+    wait = settings.SPECULATION_JOIN_TIMEOUT
+    left = resilience.remaining()
+    if left is not None:
+        wait = min(wait, left)
+    return time.monotonic() + wait
+
+
+def take(user_id, user_input):
+    """미리 정제한 프롬프트를 반환. 정제 중이면 SPECULATION_JOIN_TIMEOUT까지 기다리고, 없으면 None"""
+    key = make_key(user_input)
+    deadline = _join_deadline()
+    while True:
+        finished, generated_prompt = _lookup(user_id, key)
+        if finished or time.monotonic() > deadline:
+            break
+        time.sleep(0.2)
+    if generated_prompt:
+        _promote(user_input, generated_prompt)
+    return generated_prompt
+
+
+async def take_async(user_id, user_input):
+    """take의 비동기 버전"""
+    key = make_key(user_input)
+    deadline = _join_deadline()
+    while True:
+        finished, generated_prompt = await sync_to_async(_lookup)(user_id, key)
+        if finished or time.monotonic() > deadline:
+            break
+        await asyncio.sleep(0.2)
+    if generated_prompt:
+        await sync_to_async(_promote)(user_input, generated_prompt)
+    return generated_prompt
@@ -1,3 +1,234 @@
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import httpx
+import openai
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from util.common import resilience
+
+from . import enrichment, models, near_duplicate, prompt_cache, speculation, views
+from .models import AIGeneration, Post, SpeculativePrompt, StoredImage
+
+
+class PostEnrichmentRetryTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("enrich", password="pw")
+        self.post = Post.objects.create(
+            user=user,
+            title="t",
+            content="c",
+            image="https://example.com/images/a.png",
+            enrichment_status=Post.ENRICHMENT_PENDING,
+        )
+
+    def run_enrichment(self, side_effect):
+        with mock.patch.object(
+            enrichment, "analyze_post_image", side_effect=side_effect
+        ), mock.patch.object(enrichment, "schedule_retry") as schedule_retry:
+            enrichment.run_post_enrichment(self.post.pk)
+        self.post.refresh_from_db()
+        return schedule_retry
+
+    def test_circuit_open_is_retried(self):
+        schedule_retry = self.run_enrichment(resilience.CircuitOpenError("vision", 30))
+
+        self.assertEqual(self.post.enrichment_status, Post.ENRICHMENT_PENDING)
+        self.assertEqual(self.post.enrichment_attempts, 1)
+        schedule_retry.assert_called_once()
+        self.assertGreaterEqual(schedule_retry.call_args.args[1], 30)
+
+        self.run_enrichment(lambda url: (["a cat"], ["cat"]))
+        self.assertEqual(self.post.enrichment_status, Post.ENRICHMENT_DONE)
+        self.assertEqual(self.post.tags, ["cat"])
+
+    def test_gives_up_after_max_attempts(self):
+        with self.settings(ENRICHMENT_MAX_ATTEMPTS=2):
+            self.run_enrichment(ConnectionError("reset"))
+            self.assertEqual(self.post.enrichment_status, Post.ENRICHMENT_PENDING)
+            schedule_retry = self.run_enrichment(ConnectionError("reset"))
+
+        self.assertEqual(self.post.enrichment_status, Post.ENRICHMENT_FAILED)
+        self.assertEqual(self.post.enrichment_attempts, 2)
+        schedule_retry.assert_not_called()
+
+    def test_non_transient_error_fails_immediately(self):
+        schedule_retry = self.run_enrichment(ValueError("bad image"))
+
+        self.assertEqual(self.post.enrichment_status, Post.ENRICHMENT_FAILED)
+        schedule_retry.assert_not_called()
+
+
+class PostDeleteBlobTests(TestCase):
+    image_url = "https://example.com/images/abc.png"
+
+    def setUp(self):
+        self.user = User.objects.create_user("delete", password="pw")
+        self.post = Post.objects.create(
+            user=self.user, title="t", content="c", image=self.image_url
+        )
+        StoredImage.objects.create(
+            content_hash="abc",
+            blob_url=self.image_url,
+            thumb_url="https://example.com/resized/abc_512.webp",
+        )
+
+    def delete_post(self):
+        with mock.patch.object(models, "get_blob_service_client") as get_client:
+            self.post.delete()
+        return get_client
+
+    def test_keeps_blob_referenced_by_generation(self):
+        AIGeneration.objects.create(
+            user=self.user,
+            prompt="고양이",
+            generated_prompt="a cat",
+            image_url=self.image_url,
+        )
+
+        get_client = self.delete_post()
+
+        get_client.assert_not_called()
+        self.assertTrue(StoredImage.objects.filter(blob_url=self.image_url).exists())
+
+    def test_keeps_blob_referenced_by_other_post(self):
+        Post.objects.create(
+            user=self.user, title="t2", content="c", image=self.image_url
+        )
+
+        get_client = self.delete_post()
+
+        get_client.assert_not_called()
+        self.assertTrue(StoredImage.objects.filter(blob_url=self.image_url).exists())
+
+    def test_deletes_unreferenced_blob(self):
+        get_client = self.delete_post()
+
+        get_client.assert_called_once()
+        self.assertFalse(StoredImage.objects.filter(blob_url=self.image_url).exists())
+
+
+class DalleRateLimitTests(TestCase):
+    def test_url_generation_maps_rate_limit_to_503(self):
+        request = httpx.Request("POST", "https://example.com/images/generations")
+        error = openai.RateLimitError(
+            "limited", response=httpx.Response(429, request=request), body=None
+        )
+        client = mock.Mock()
+        client.images.generate.side_effect = error
+
+        with mock.patch.object(views, "get_openai_client", return_value=client):
+            with self.assertRaises(views.GenerationError) as raised:
+                views.generate_image_with_dalle("a cat")
+
+        self.assertEqual(raised.exception.status, 503)
+        self.assertEqual(str(raised.exception), views.RATE_LIMITED_MESSAGE)
+
+
+class NearDuplicateReuseTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = self.settings(
+            PROMPT_INDEX_PATH=str(Path(directory.name) / "prompt_index.npz")
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        near_duplicate._index = None
+        self.addCleanup(setattr, near_duplicate, "_index", None)
+        self.user = User.objects.create_user("similar", password="pw")
+
+    def generation(self, source_prompt, generated_prompt):
+        return AIGeneration.objects.create(
+            user=self.user,
+            prompt=source_prompt,
+            source_prompt=source_prompt,
+            generated_prompt=generated_prompt,
+            image_url="https://example.com/images/x.png",
+        )
+
+    def test_one_different_word_is_not_reused(self):
+        self.generation(
+            "a red cat sleeping on a soft velvet sofa in a sunny living room "
+            "with plants, watercolor style",
+            "A watercolor of a red cat ...",
+        )
+
+        similar, _ = near_duplicate.find_similar_generation(
+            "a blue cat sleeping on a soft velvet sofa in a sunny living room "
+            "with plants, watercolor style",
+            self.user.id,
+        )
+
+        self.assertIsNone(similar)
+
+    def test_same_words_in_another_form_are_reused(self):
+        expected = self.generation(
+            "A cat playing on the beach at sunset", "A cat playing on the beach ..."
+        )
+
+        similar, similarity = near_duplicate.find_similar_generation(
+            "at sunset, a CAT playing on the beach!", self.user.id
+        )
+
+        self.assertEqual(similar, expected)
+        self.assertEqual(similarity, 1.0)
+
+
+class SpeculationJoinDeadlineTests(TestCase):
+    def test_join_wait_is_capped_by_deadline(self):
+        user = User.objects.create_user("speculate", password="pw")
+        user_input = "노을 지는 바닷가에서 노는 고양이"
+        SpeculativePrompt.objects.create(
+            user=user, key=speculation.make_key(user_input), user_input=user_input
+        )
+
+        started = time.monotonic()
+        with resilience.deadline_scope(0.5):
+            self.assertIsNone(speculation.take(user.id, user_input))
+
+        self.assertLess(time.monotonic() - started, 2)
+
+
+class StreamRefinementTests(TestCase):
+    def stream(self, user_input, fake_stream):
+        with mock.patch.object(
+            views, "find_reusable_prompt", return_value=None
+        ), mock.patch.object(views, "get_openai_client"), mock.patch.object(
+            views, "stream_chat_completion", side_effect=fake_stream
+        ):
+            response = views.streaming_text_response(
+                views.stream_prompt_with_gpt3o(user_input, None)
+            )
+            return "".join(chunk.decode() for chunk in response.streaming_content)
+
+    def test_stores_streamed_prompt_in_cache(self):
+        user_input = "스트리밍으로 정제한 보라색 우산을 쓴 여우"
+
+        body = self.stream(user_input, lambda client, **kwargs: iter(["A fox", " ..."]))
+
+        self.assertEqual(body, "A fox ...")
+        self.assertEqual(
+            prompt_cache.lookup(
+                views.PROMPT_REFINE_MODEL, views.PROMPT_REFINE_SYSTEM_PROMPT, user_input
+            ),
+            "A fox ...",
+        )
+
+    def test_maps_rate_limit_to_error_marker(self):
+        request = httpx.Request("POST", "https://example.com/chat/completions")
+
+        def fake_stream(client, **kwargs):
+            raise openai.RateLimitError(
+                "limited", response=httpx.Response(429, request=request), body=None
+            )
+            yield
+
+        body = self.stream("호출 한도에 걸린 스트리밍 입력", fake_stream)
+
+        self.assertEqual(
+            body, f"{views.STREAM_ERROR_MARKER}{views.RATE_LIMITED_MESSAGE}"
+        )
@@ -1,17 +1,36 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path("", views.home, name="home"),
     path("about/", views.about, name="about"),
     path("create/", views.create_post, name="create_post"),
     path("ai/generate/", views.generate_image, name="generate_image"),
+    path(
+        "ai/generate/stream/", views.generate_image_stream, name="generate_image_stream"
+    ),
+    path(
+        "ai/generate/variations/",
+        views.generate_image_variations,
+        name="generate_image_variations",
+    ),
+    path("ai/generate/jobs/", views.generate_image_job, name="generate_image_job"),
+    path(
+        "ai/generate/jobs/<uuid:job_id>/",
+        views.generation_job_status,
+        name="generation_job_status",
+    ),
     path("artwork/my/", views.my_gallery, name="my_gallery"),
     path("artwork/public/", views.public_gallery, name="public_gallery"),
     path("artwork/fullscreen/", views.fullscreen_gallery, name="fullscreen_gallery"),
     path("posts/<int:pk>/", views.post_detail, name="post_detail"),
     path("posts/<int:pk>/edit/", views.edit_post, name="edit_post"),
     path("posts/<int:pk>/delete/", views.delete_post, name="delete_post"),
+    path(
+        "posts/<int:pk>/enrichment/",
+        views.post_enrichment_status,
+        name="post_enrichment_status",
+    ),
     path(
         "posts/<int:post_id>/comments/",
         views.comment_list_create,
@@ -26,4 +45,26 @@ urlpatterns = [
     path("read_text/", views.read_text, name="read_text"),
     path("posts/<int:pk>/like/", views.like_post, name="like_post"),
     path("ai/gpt4o/", views.gpt4o_stt_api, name="gpt4o_stt_api"),
+    path("ai/gpt4o/stream/", views.gpt4o_stt_stream_api, name="gpt4o_stt_stream_api"),
+    path("ai/prompt/stream/", views.refine_prompt_stream, name="refine_prompt_stream"),
+    path("ai/prompt/speculate/", views.speculate_prompt, name="speculate_prompt"),
+    path(
+        "ai/prompt/speculate/cancel/",
+        views.cancel_prompt_speculation,
+        name="cancel_prompt_speculation",
+    ),
+    # ASGI로 배포할 때 사용하는 비동기 버전
+    path("async/ai/generate/", async_views.generate_image, name="async_generate_image"),
+    path(
+        "async/ai/generate/variations/",
+        async_views.generate_image_variations,
+        name="async_generate_image_variations",
+    ),
+    path(
+        "async/posts/<int:pk>/generate_curation/",
+        async_views.generate_curation,
+        name="async_generate_curation",
+    ),
+    path("async/read_text/", async_views.read_text, name="async_read_text"),
+    path("async/ai/gpt4o/", async_views.gpt4o_stt_api, name="async_gpt4o_stt_api"),
 ]
@@ -1,65 +1,61 @@
 from collections import namedtuple
+import binascii
+import contextvars
+import functools
+import hashlib
 import os
-import re
 import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
-from azure.storage.blob import BlobServiceClient
 from django.conf import settings
-from openai import AzureOpenAI
-import requests
-import uuid
 import json
-from datetime import datetime
+from django.db import close_old_connections, transaction
 from django.db.models import Count
-from io import BytesIO
-from PIL import Image
-
-from util.common.azure_computer_vision import get_image_caption_and_tags
-from util.common.azure_speech import synthesize_text_to_speech
+from django.utils import timezone
+
+from util.common import hedging, metrics, rate_limit, resilience
+from util.common.clients import (
+    get_blob_service_client,
+    get_http_session,
+    get_openai_client,
+    http_timeout,
+)
 from django.views.decorators.http import require_GET
 
+from . import prompt_cache, renditions, singleflight, speculation
+from .enrichment import enqueue_post_enrichment, retry_if_stale
 from .forms import PostWithAIForm, PostEditForm
-from .models import Post, AIGeneration, Comment, TagUsage, Like
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[logging.FileHandler("ai_generation.log"), logging.StreamHandler()],
+from .jobs import (
+    JobQueueFull,
+    expire_stale_job,
+    start_generation_job,
+    stream_job_events,
 )
-
-GPT_CLIENT = AzureOpenAI(
-    azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-    api_key=settings.AZURE_OPENAI_API_KEY,
-    api_version=settings.AZURE_OPENAI_API_VERSION,
+from .models import (
+    Post,
+    AIGeneration,
+    Comment,
+    TagUsage,
+    Like,
+    GenerationJob,
+    StoredImage,
 )
 
-DALLE_CLIENT = AzureOpenAI(
-    azure_endpoint=settings.AZURE_DALLE_ENDPOINT,
-    api_key=settings.AZURE_DALLE_API_KEY,
-    api_version=settings.AZURE_DALLE_API_VERSION,
-)
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+_variation_executor = None
+_variation_executor_lock = threading.Lock()
 
+PROMPT_REFINE_MODEL = "team6-o3-mini"
 
-GPT_CLIENT_o3 = AzureOpenAI(
-    azure_endpoint=settings.AZURE_3OMINI_ENDPOINT,
-    api_key=settings.AZURE_3OMINI_API_KEY,
-    api_version=settings.AZURE_3OMINI_API_VERSION,
-)
-
-
-def generate_stt_with_gpt4o(user_input, user_style):
-    try:
-        print("GPT4-o1-mini를 사용해 프롬프트를 생성합니다...")
-
-        response = GPT_CLIENT.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"""
+STT_SYSTEM_PROMPT = """
                         You are an AI Assistant designed to take user input (`user_input`), refine it, and transform it into a high-quality prompt suitable for an image-generating AI. Follow the guidelines below:
                         1. Analyze the user's input (`user_input`) to extract the core idea or theme they want represented in the image while preserving their intent. Add relevant details only when necessary to enhance the clarity and specificity of the image request.
                         2. Ensure the generated prompt is concise, vivid, and descriptive, making it suitable for creating visually stunning illustrations through an image-generating AI. Use nouns, adjectives, and action words effectively to create a clear and compelling image.
@@ -68,33 +64,9 @@ def generate_stt_with_gpt4o(user_input, user_style):
                         5. Translate the generated sentence into Korean to ensure accessibility for Korean-speaking users.
                         6. Generate a refined and visually inspiring prompt that ensures the user's intent is accurately expressed and optimized for generating impressive illustrations.
                         7. Provide the output prompt in Korean to facilitate the user's understanding and engagement with the image-generating AI.
-                    """,
-                },
-                {"role": "user", "content": user_input},
-            ],
-        )
-
-        if response.choices and len(response.choices) > 0:
-            return response.choices[0].message.content
-        else:
-            print("응답을 생성하지 못했습니다.")
-            return None
-
-    except Exception as e:
-        print("GPT4-o1-mini 호출 중 예외 발생:", str(e))
-        return None
+                    """
 
-
-def generate_prompt_with_gpt3o(user_input):
-    try:
-        print("GPT-3o-mini를 사용해 프롬프트를 생성합니다...")
-
-        response = GPT_CLIENT_o3.chat.completions.create(
-            model="team6-o3-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a master prompt engineer specializing in high-end artistic image generation, with deep expertise in both traditional and digital art forms. Your role is to create sophisticated DALL-E prompts that result in museum-quality artistic outputs.
+PROMPT_REFINE_SYSTEM_PROMPT = """You are a master prompt engineer specializing in high-end artistic image generation, with deep expertise in both traditional and digital art forms. Your role is to create sophisticated DALL-E prompts that result in museum-quality artistic outputs.
 
                     ##Main Guidelines
 
@@ -171,11 +143,24 @@ def generate_prompt_with_gpt3o(user_input):
                     - Do not use names of real people.
                     - Avoid directly mentioning specific body parts.
 
-                    Follow these guidelines to create prompts that generate exceptional, gallery-quality artistic images while adhering to DALL-E's content policies.""",
-                },
-                {"role": "user", "content": user_input},
-            ],
-        )
+                    Follow these guidelines to create prompts that generate exceptional, gallery-quality artistic images while adhering to DALL-E's content policies."""
+
+
+def generate_stt_with_gpt4o(user_input, user_style):
+    try:
+        print("GPT4-o1-mini를 사용해 프롬프트를 생성합니다...")
+
+        with resilience.deadline_scope(settings.OPENAI_DEADLINE):
+            response = get_openai_client("gpt").chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": STT_SYSTEM_PROMPT,
+                    },
+                    {"role": "user", "content": user_input},
+                ],
+            )
 
         if response.choices and len(response.choices) > 0:
             return response.choices[0].message.content
@@ -184,16 +169,172 @@ def generate_prompt_with_gpt3o(user_input):
             return None
 
     except Exception as e:
+        print("GPT4-o1-mini 호출 중 예외 발생:", str(e))
+        return None
+
+
+def find_reusable_prompt(user_input, user_id):
+    """정제 프롬프트 캐시나 유사한 이전 입력에서 재사용할 프롬프트를 찾는다. 없으면 None
+
+    유사한 이전 입력은 user_id 사용자의 것이나 공개 게시물에 쓰인 것만 사용한다.
+    """
+    cached = prompt_cache.lookup(
+        PROMPT_REFINE_MODEL, PROMPT_REFINE_SYSTEM_PROMPT, user_input
+    )
+    if cached:
+        logging.info(f"캐시된 프롬프트를 사용합니다: {prompt_cache.stats()}")
+        return cached
+
+    from .near_duplicate import find_similar_generation
+
+    similar, similarity = find_similar_generation(user_input, user_id)
+    if similar:
+        logging.info(
+            f"유사한 이전 입력(AIGeneration {similar.pk}, 유사도 {similarity:.2f})의 프롬프트를 재사용합니다."
+        )
+        return similar.generated_prompt
+    return None
+
+
+def refine_for_user(user_input, user_id):
+    """입력 중에 미리 정제해 둔 결과가 있으면 사용하고, 없으면 generate_prompt_with_gpt3o
+
+    미리 정제한 결과를 기다리는 시간도 OPENAI_DEADLINE에 포함한다.
+    """
+    with resilience.deadline_scope(settings.OPENAI_DEADLINE):
+        return speculation.take(user_id, user_input) or generate_prompt_with_gpt3o(
+            user_input, user_id
+        )
+
+
+def refinement_messages(user_input):
+    return [
+        {"role": "system", "content": PROMPT_REFINE_SYSTEM_PROMPT},
+        {"role": "user", "content": user_input},
+    ]
+
+
+@metrics.timed_function("refine")
+def request_refinement(user_input):
+    """o3-mini로 프롬프트를 정제. PROMPT_HEDGING이면 응답이 늦을 때 PROMPT_HEDGE_MODEL에도 요청
+
+    두 요청 모두 OPENAI_DEADLINE 안에 끝나야 한다.
+    """
+
+    def call(client_name, model):
+        return lambda: get_openai_client(client_name).chat.completions.create(
+            model=model, messages=refinement_messages(user_input)
+        )
+
+    primary = call("o3", PROMPT_REFINE_MODEL)
+    with resilience.deadline_scope(settings.OPENAI_DEADLINE):
+        if not settings.PROMPT_HEDGING:
+            return primary()
+        return hedging.run("refine", primary, call("gpt", settings.PROMPT_HEDGE_MODEL))
+
+
+def generate_prompt_with_gpt3o(user_input, user_id):
+    reusable = find_reusable_prompt(user_input, user_id)
+    if reusable:
+        return reusable
+
+    try:
+        print("GPT-3o-mini를 사용해 프롬프트를 생성합니다...")
+
+        response = request_refinement(user_input)
+
+        if response.choices and len(response.choices) > 0:
+            generated_prompt = response.choices[0].message.content
+            prompt_cache.store(
+                PROMPT_REFINE_MODEL,
+                PROMPT_REFINE_SYSTEM_PROMPT,
+                user_input,
+                generated_prompt,
+            )
+            return generated_prompt
+        else:
+            print("응답을 생성하지 못했습니다.")
+            return None
+
+    except Exception as e:
+        if rate_limit.is_rate_limited(e):
+            raise GenerationError(RATE_LIMITED_MESSAGE, status=503)
+        if resilience.is_circuit_open(e):
+            raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
         print("GPT-3o-mini 호출 중 예외 발생:", str(e))
         return None
 
 
+def stream_chat_completion(client, **kwargs):
+    """스트리밍 chat completion을 호출하고 생성되는 텍스트 조각을 순서대로 yield
+
+    OPENAI_DEADLINE은 응답이 시작될 때까지만 적용한다. 그 뒤로는 조각 사이의 시간 제한만 남는다.
+    """
+    with resilience.deadline_scope(settings.OPENAI_DEADLINE):
+        response = client.chat.completions.create(stream=True, **kwargs)
+    for chunk in response:
+        # Azure는 콘텐츠 필터 결과만 담긴(choices가 빈) chunk를 먼저 보낼 수 있음
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def stream_stt_with_gpt4o(user_input, user_style):
+    """generate_stt_with_gpt4o의 스트리밍 버전"""
+    logging.info("GPT4-o1-mini 스트리밍으로 프롬프트를 생성합니다...")
+    return stream_chat_completion(
+        get_openai_client("gpt"),
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": STT_SYSTEM_PROMPT},
+            {"role": "user", "content": user_input},
+        ],
+    )
+
+
+def stream_prompt_with_gpt3o(user_input, user_id):
+    """generate_prompt_with_gpt3o의 스트리밍 버전
+
+    캐시 조회와 저장, refine 단계 시간 기록, 호출 한도/서킷 브레이커 오류의 GenerationError 변환은
+    스트리밍하지 않는 경로와 같다.
+    """
+    reusable = find_reusable_prompt(user_input, user_id)
+    if reusable:
+        yield reusable
+        return
+
+    logging.info("GPT-3o-mini 스트리밍으로 프롬프트를 생성합니다...")
+    parts = []
+    try:
+        with metrics.timed("refine"):
+            for token in stream_chat_completion(
+                get_openai_client("o3"),
+                model=PROMPT_REFINE_MODEL,
+                messages=refinement_messages(user_input),
+            ):
+                parts.append(token)
+                yield token
+    except Exception as e:
+        if rate_limit.is_rate_limited(e):
+            raise GenerationError(RATE_LIMITED_MESSAGE, status=503)
+        if resilience.is_circuit_open(e):
+            raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
+        raise
+    generated_prompt = "".join(parts)
+    if generated_prompt:
+        prompt_cache.store(
+            PROMPT_REFINE_MODEL,
+            PROMPT_REFINE_SYSTEM_PROMPT,
+            user_input,
+            generated_prompt,
+        )
+
+
 def generate_prompt_with_gpt4o(user_input):
     """GPT-4o를 사용해 DALL-E 3 프롬프트 생성"""
     try:
         logging.info("GPT-4o를 사용해 프롬프트를 생성합니다...")
 
-        response = GPT_CLIENT.chat.completions.create(
+        response = get_openai_client("gpt").chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
@@ -243,50 +384,170 @@ def generate_prompt_with_gpt4o(user_input):
         return None
 
 
-def save_image_to_blob(image_url, prompt, user_id):
-    """이미지를 Azure Blob Storage에 저장하고, width 500으로 리사이즈한 썸네일을 'resized' 컨테이너에 저장"""
-    try:
-        response = requests.get(image_url, stream=True)
+@metrics.timed_function("download")
+def download_image(image_url):
+    """이미지를 한 번만 내려받아 bytes로 반환. 일시적인 오류는 재시도"""
+
+    def fetch():
+        response = get_http_session().get(image_url, timeout=http_timeout())
         response.raise_for_status()
+        return response.content
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        sanitised_prompt = re.sub(r'[<>:"/\\|?*]', "", prompt[:20]).strip()
-        filename = f"user_{user_id}_{timestamp}_{unique_id}_{sanitised_prompt}.png"
+    return resilience.call("image_download", fetch, deadline=settings.BLOB_DEADLINE)
 
-        blob_service_client = BlobServiceClient.from_connection_string(
-            settings.AZURE_CONNECTION_STRING
-        )
 
-        # 원본 이미지 업로드 (기존 container 사용)
-        blob_client = blob_service_client.get_blob_client(
-            container=settings.CONTAINER_NAME, blob=filename
+def save_image_to_blob(image_url, prompt, user_id, on_event=None):
+    """URL의 이미지를 한 번 내려받아 save_image_bytes_to_blob으로 저장
+
+    이미 저장된 blob의 URL이면 다운로드/업로드 없이 그대로 반환한다.
+    """
+    if StoredImage.objects.filter(blob_url=image_url).exists():
+        logging.info(f"이미 저장된 이미지입니다: {image_url}")
+        return image_url
+
+    try:
+        image_data = download_image(image_url)
+    except Exception as e:
+        logging.error(f"이미지 다운로드 중 오류 발생: {str(e)}", exc_info=True)
+        return None
+    try:
+        return save_image_bytes_to_blob(image_data, prompt, user_id, on_event=on_event)
+    except GenerationError as e:
+        logging.error(f"Blob Storage 저장 중 오류 발생: {str(e)}")
+        return None
+
+
+def get_upload_executor():
+    """원본/썸네일 업로드를 동시에 처리하기 위한 프로세스 공용 스레드 풀"""
+    global _upload_executor
+    if _upload_executor is None:
+        with _upload_executor_lock:
+            if _upload_executor is None:
+                _upload_executor = ThreadPoolExecutor(
+                    max_workers=settings.BLOB_UPLOAD_WORKERS,
+                    thread_name_prefix="blob-upload",
+                )
+    return _upload_executor
+
+
+def upload_original(blob_service_client, filename, image_data):
+    """원본 이미지를 기존 container에 업로드하고 (URL, 소요 시간)을 반환"""
+    started = time.monotonic()
+    blob_client = blob_service_client.get_blob_client(
+        container=settings.CONTAINER_NAME, blob=filename
+    )
+    # max_single_put_size보다 큰 원본은 블록 단위로 나뉘어 병렬 업로드된다.
+    with metrics.timed("upload"):
+        resilience.call(
+            "blob",
+            blob_client.upload_blob,
+            image_data,
+            overwrite=True,
+            max_concurrency=settings.BLOB_UPLOAD_MAX_CONCURRENCY,
+            deadline=settings.BLOB_DEADLINE,
         )
-        blob_client.upload_blob(response.content, overwrite=True)
-        logging.info(f"원본 이미지가 Blob Storage에 저장되었습니다: {filename}")
-
-        # Pillow를 이용해 이미지 리사이즈 및 썸네일 생성 (width=300)
-        image = Image.open(BytesIO(response.content))
-        orig_width, orig_height = image.size
-        new_width = 500
-        new_height = int(orig_height * (new_width / orig_width))
-        image.thumbnail((new_width, new_height))
-        thumb_buffer = BytesIO()
-        image.save(thumb_buffer, format="PNG")
-        thumb_buffer.seek(0)
-
-        # "resized" 컨테이너에 썸네일 업로드, filename 앞에 "thumb_" 접두어 추가
-        thumb_filename = "thumb_" + filename
-        thumb_blob_client = blob_service_client.get_blob_client(
-            container="resized", blob=thumb_filename
+    duration = round(time.monotonic() - started, 3)
+    logging.info(
+        f"원본 이미지가 Blob Storage에 저장되었습니다: {filename} ({duration}s)"
+    )
+    return blob_client.url, {"duration": duration}
+
+
+def upload_renditions(blob_service_client, content_hash, image_data):
+    """너비/형식별 렌디션을 만들어 'resized' 컨테이너에 업로드하고 (렌디션 목록, 소요 시간)을 반환"""
+    started = time.monotonic()
+    encoded = renditions.make_renditions(image_data)
+    resize = round(time.monotonic() - started, 3)
+
+    uploaded = []
+    # 렌디션 업로드 전체가 BLOB_DEADLINE 안에 끝나야 한다.
+    with resilience.deadline_scope(settings.BLOB_DEADLINE):
+        for width, fmt, data in encoded:
+            blob_client = blob_service_client.get_blob_client(
+                container=renditions.RENDITION_CONTAINER,
+                blob=renditions.blob_name(content_hash, width, fmt),
+            )
+            with metrics.timed("upload"):
+                resilience.call(
+                    "blob",
+                    blob_client.upload_blob,
+                    data,
+                    overwrite=True,
+                    content_settings=renditions.content_settings(fmt),
+                )
+            uploaded.append({"width": width, "format": fmt, "url": blob_client.url})
+    duration = round(time.monotonic() - started, 3)
+    logging.info(
+        f"렌디션 {len(uploaded)}개가 Blob Storage에 저장되었습니다: {content_hash} "
+        f"(리사이즈 {resize}s, 전체 {duration}s)"
+    )
+    return uploaded, {"duration": duration, "resize": resize}
+
+
+def save_image_bytes_to_blob(image_data, prompt, user_id, on_event=None):
+    """이미지를 Azure Blob Storage에 저장하고, 갤러리용 렌디션(너비별 WebP/AVIF)을 'resized' 컨테이너에 저장
+
+    blob 이름은 이미지 내용의 SHA-256 해시이며, 같은 내용이 이미 저장되어 있으면
+    업로드 없이 기존 URL을 반환한다.
+    image_data(bytes) 하나를 원본 업로드와 렌디션 생성에 그대로 함께 사용하며,
+    두 작업은 스레드 풀에서 동시에 진행된다. on_event가 주어지면 각 작업이 끝나는 순서대로
+    호출한 스레드에서 on_event(stage, duration=초, url=Blob URL, ...)를 호출한다.
+    thumbnail_uploaded 단계의 url은 대체 이미지(512px WebP)다.
+    """
+    try:
+        content_hash = hashlib.sha256(image_data).hexdigest()
+        stored = StoredImage.objects.filter(content_hash=content_hash).first()
+        if stored:
+            logging.info(
+                f"같은 내용의 이미지가 이미 저장되어 있습니다: {stored.blob_url} "
+                f"(user {user_id}, {prompt[:20]})"
+            )
+            if on_event:
+                on_event("original_uploaded", duration=0.0, url=stored.blob_url)
+                on_event("thumbnail_uploaded", duration=0.0, url=stored.thumb_url)
+            return stored.blob_url
+
+        filename = f"{content_hash}.png"
+
+        blob_service_client = get_blob_service_client()
+
+        executor = get_upload_executor()
+        futures = {
+            executor.submit(
+                upload_original, blob_service_client, filename, image_data
+            ): "original_uploaded",
+            executor.submit(
+                upload_renditions, blob_service_client, content_hash, image_data
+            ): "thumbnail_uploaded",
+        }
+        blob_url = uploaded = None
+        for future in as_completed(futures):
+            stage = futures[future]
+            result, part_timings = future.result()
+            if stage == "original_uploaded":
+                blob_url = url = result
+            else:
+                uploaded = result
+                url = renditions.fallback_url(uploaded)
+            if on_event:
+                on_event(stage, url=url, **part_timings)
+
+        StoredImage.objects.get_or_create(
+            content_hash=content_hash,
+            defaults={
+                "blob_url": blob_url,
+                "thumb_url": renditions.fallback_url(uploaded),
+                "renditions": uploaded,
+                "size": len(image_data),
+            },
         )
-        thumb_blob_client.upload_blob(thumb_buffer.read(), overwrite=True)
-        logging.info(f"썸네일 이미지가 Blob Storage에 저장되었습니다: {thumb_filename}")
 
-        # 원본 이미지 URL 반환 (원하는 경우 썸네일 URL도 함께 반환 가능)
-        return blob_client.url
+        # 원본 이미지 URL 반환
+        return blob_url
 
     except Exception as e:
+        if resilience.is_circuit_open(e):
+            raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
         logging.error(f"Blob Storage 저장 중 오류 발생: {str(e)}", exc_info=True)
         return None
 
@@ -296,7 +557,11 @@ def generate_image_with_dalle(prompt):
     try:
         logging.info("DALL-E를 사용해 이미지를 생성합니다...")
 
-        result = DALLE_CLIENT.images.generate(model="dall-e-3", prompt=prompt, n=1)
+        with metrics.timed("generate"):
+            with resilience.deadline_scope(settings.DALLE_DEADLINE):
+                result = get_openai_client("dalle").images.generate(
+                    model="dall-e-3", prompt=prompt, n=1
+                )
 
         if result and result.data:
             image_url = result.data[0].url
@@ -305,10 +570,138 @@ def generate_image_with_dalle(prompt):
         return None
 
     except Exception as e:
+        if rate_limit.is_rate_limited(e):
+            raise GenerationError(RATE_LIMITED_MESSAGE, status=503)
+        if resilience.is_circuit_open(e):
+            raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
         logging.error(f"DALL-E 호출 중 예외 발생: {str(e)}", exc_info=True)
         return None
 
 
+def generate_image_bytes_with_dalle(prompt):
+    """DALL-E 결과를 URL 대신 base64로 받아 bytes로 반환 (별도 다운로드 불필요)"""
+    try:
+        logging.info("DALL-E를 사용해 이미지를 생성합니다 (b64_json)...")
+
+        with metrics.timed("generate"):
+            with resilience.deadline_scope(settings.DALLE_DEADLINE):
+                result = get_openai_client("dalle").images.generate(
+                    model="dall-e-3", prompt=prompt, n=1, response_format="b64_json"
+                )
+
+        if result and result.data and result.data[0].b64_json:
+            # a2b_base64는 b64decode와 달리 ASCII 문자열을 bytes로 한 번 더 복사하지 않는다.
+            image_data = binascii.a2b_base64(result.data[0].b64_json)
+            logging.info(f"DALL-E 호출 성공! 이미지 크기: {len(image_data)} bytes")
+            return image_data
+        return None
+
+    except Exception as e:
+        if rate_limit.is_rate_limited(e):
+            raise GenerationError(RATE_LIMITED_MESSAGE, status=503)
+        if resilience.is_circuit_open(e):
+            raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
+        logging.error(f"DALL-E 호출 중 예외 발생: {str(e)}", exc_info=True)
+        return None
+
+
+UPLOAD_TIMING_KEYS = {
+    "original_uploaded": "upload_original",
+    "thumbnail_uploaded": "upload_thumbnail",
+}
+
+
+RATE_LIMITED_MESSAGE = (
+    "요청이 많아 지금은 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+)
+UNAVAILABLE_MESSAGE = (
+    "외부 서비스 장애로 지금은 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+)
+
+
+class GenerationError(Exception):
+    """이미지 생성 파이프라인의 특정 단계가 실패했을 때 발생. status는 응답 HTTP 상태 코드"""
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.status = status
+
+
+def generate_image_data(generated_prompt, timings):
+    """DALLE_RESPONSE_FORMAT에 따라 DALL-E 이미지를 bytes로 받는다. 실패하면 None
+
+    timings에 generate(와 url 방식이면 download) 소요 시간을 기록한다.
+    """
+    started = time.monotonic()
+    if settings.DALLE_RESPONSE_FORMAT == "b64_json":
+        image_data = generate_image_bytes_with_dalle(generated_prompt)
+        timings["generate"] = round(time.monotonic() - started, 3)
+        return image_data
+
+    image_url = generate_image_with_dalle(generated_prompt)
+    timings["generate"] = round(time.monotonic() - started, 3)
+    image_data = None
+    if image_url:
+        started = time.monotonic()
+        try:
+            image_data = download_image(image_url)
+        except Exception as e:
+            if resilience.is_circuit_open(e):
+                raise GenerationError(UNAVAILABLE_MESSAGE, status=503)
+            logging.error(f"이미지 다운로드 중 오류 발생: {str(e)}", exc_info=True)
+        timings["download"] = round(time.monotonic() - started, 3)
+    return image_data
+
+
+def run_generation_pipeline(prompt, user_id, on_event=None):
+    """프롬프트 정제 -> DALL-E 이미지 생성 -> Blob 저장을 순서대로 실행
+
+    각 단계가 끝날 때마다 on_event(stage, timings=..., **data)를 호출한다.
+    stage는 refined, generated, original_uploaded, thumbnail_uploaded, uploaded 순서이며
+    timings에는 지금까지의 단계별 소요 시간(초)이 담긴다.
+    """
+    timings = {}
+
+    def emit(stage, **data):
+        logging.info(f"이미지 생성 단계 완료 [{stage}]: {timings}")
+        if on_event:
+            on_event(stage, timings=dict(timings), **data)
+
+    def on_upload_event(stage, duration, url, resize=None):
+        timings[UPLOAD_TIMING_KEYS[stage]] = duration
+        if resize is not None:
+            timings["resize"] = resize
+        emit(stage, url=url)
+
+    started = time.monotonic()
+    # generated_prompt = generate_prompt_with_gpt4o(prompt)
+    generated_prompt = refine_for_user(prompt, user_id)
+    timings["refine"] = round(time.monotonic() - started, 3)
+    if not generated_prompt:
+        raise GenerationError("프롬프트 생성에 실패했습니다.")
+    emit("refined", generated_prompt=generated_prompt)
+
+    image_data = generate_image_data(generated_prompt, timings)
+    if not image_data:
+        raise GenerationError("이미지 생성에 실패했습니다.")
+    emit("generated")
+
+    started = time.monotonic()
+    blob_url = save_image_bytes_to_blob(
+        image_data, generated_prompt, user_id, on_event=on_upload_event
+    )
+    timings["upload"] = round(time.monotonic() - started, 3)
+    if not blob_url:
+        raise GenerationError("이미지 저장에 실패했습니다.")
+    emit("uploaded", image_url=blob_url)
+
+    return {
+        "generated_prompt": generated_prompt,
+        "image_url": blob_url,
+        "timings": timings,
+    }
+
+
 @login_required
 def generate_image(request):
     """이미지 생성 뷰"""
@@ -320,28 +713,209 @@ def generate_image(request):
         return JsonResponse({"error": "프롬프트를 입력해주세요."}, status=400)
 
     try:
-        # generated_prompt = generate_prompt_with_gpt4o(prompt)
-        generated_prompt = generate_prompt_with_gpt3o(prompt)
-        if not generated_prompt:
-            return JsonResponse({"error": "프롬프트 생성에 실패했습니다."}, status=500)
+        result = singleflight.run_once(
+            singleflight.make_key("generate", request.user.id, prompt),
+            lambda: run_generation_pipeline(prompt, request.user.id),
+        )
+        return JsonResponse(
+            {
+                "image_url": result["image_url"],
+                "generated_prompt": result["generated_prompt"],
+            }
+        )
 
-        image_url = generate_image_with_dalle(generated_prompt)
-        if not image_url:
-            return JsonResponse({"error": "이미지 생성에 실패했습니다."}, status=500)
+    except GenerationError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
 
-        blob_url = save_image_to_blob(image_url, generated_prompt, request.user.id)
+    except Exception as e:
+        logging.error(f"이미지 생성 중 오류 발생: {str(e)}", exc_info=True)
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+def get_variation_executor():
+    """변형 이미지를 동시에 생성하기 위한 프로세스 공용 스레드 풀"""
+    global _variation_executor
+    if _variation_executor is None:
+        with _variation_executor_lock:
+            if _variation_executor is None:
+                _variation_executor = ThreadPoolExecutor(
+                    max_workers=settings.VARIATION_WORKERS,
+                    thread_name_prefix="variation",
+                )
+    return _variation_executor
+
+
+def generate_variation(generated_prompt, user_id, context):
+    """정제된 프롬프트로 이미지 한 장을 생성해 저장. {"image_url", "timings"} 또는 None"""
+
+    def run():
+        timings = {}
+        image_data = generate_image_data(generated_prompt, timings)
+        if not image_data:
+            return None
+        started = time.monotonic()
+        blob_url = save_image_bytes_to_blob(image_data, generated_prompt, user_id)
+        timings["upload"] = round(time.monotonic() - started, 3)
         if not blob_url:
-            return JsonResponse({"error": "이미지 저장에 실패했습니다."}, status=500)
+            return None
+        return {"image_url": blob_url, "timings": timings}
+
+    close_old_connections()
+    try:
+        # 호출 스레드의 호출 한도 레인을 유지
+        return context.run(run)
+    finally:
+        close_old_connections()
+
+
+def run_variation_pipeline(prompt, user_id, count):
+    """프롬프트를 한 번만 정제한 뒤 이미지 count장을 동시에 생성해 저장
+
+    일부가 실패해도 성공한 이미지만 반환하며, 모두 실패하면 GenerationError를 발생시킨다.
+    """
+    timings = {}
+    started = time.monotonic()
+    generated_prompt = refine_for_user(prompt, user_id)
+    timings["refine"] = round(time.monotonic() - started, 3)
+    if not generated_prompt:
+        raise GenerationError("프롬프트 생성에 실패했습니다.")
+
+    started = time.monotonic()
+    executor = get_variation_executor()
+    futures = [
+        executor.submit(
+            generate_variation,
+            generated_prompt,
+            user_id,
+            contextvars.copy_context(),
+        )
+        for _ in range(count)
+    ]
+    images = []
+    unavailable = None
+    for future in as_completed(futures):
+        try:
+            result = future.result()
+        except GenerationError as e:
+            if e.status == 503:
+                unavailable = e
+            continue
+        except Exception as e:
+            # Blob, DB 오류 등으로 한 장이 실패해도 나머지는 반환한다.
+            logging.error(f"변형 이미지 생성 중 오류 발생: {str(e)}", exc_info=True)
+            if resilience.is_circuit_open(e):
+                unavailable = GenerationError(UNAVAILABLE_MESSAGE, status=503)
+            continue
+        if result:
+            images.append(result)
+    timings["variations"] = round(time.monotonic() - started, 3)
+    logging.info(f"변형 이미지 {len(images)}/{count}장 생성 완료: {timings}")
 
+    if not images:
+        if unavailable:
+            raise unavailable
+        raise GenerationError("이미지 생성에 실패했습니다.")
+    return {"generated_prompt": generated_prompt, "images": images, "timings": timings}
+
+
+@login_required
+@require_http_methods(["POST"])
+def generate_image_variations(request):
+    """프롬프트 하나로 이미지 여러 장(최대 VARIATION_MAX_COUNT)을 생성해 후보 목록을 반환"""
+    prompt = request.POST.get("prompt", "").strip()
+    if not prompt:
+        return JsonResponse({"error": "프롬프트를 입력해주세요."}, status=400)
+    try:
+        count = int(request.POST.get("count", settings.VARIATION_MAX_COUNT))
+    except ValueError:
+        return JsonResponse({"error": "잘못된 개수입니다."}, status=400)
+    count = max(1, min(count, settings.VARIATION_MAX_COUNT))
+
+    try:
+        # 여러 장 생성은 일괄 작업이므로 단일 이미지 생성보다 낮은 우선순위로 호출
+        with rate_limit.lane(rate_limit.BACKGROUND):
+            result = singleflight.run_once(
+                singleflight.make_key("variations", request.user.id, prompt, count),
+                lambda: run_variation_pipeline(prompt, request.user.id, count),
+            )
         return JsonResponse(
-            {"image_url": blob_url, "generated_prompt": generated_prompt}
+            {
+                "generated_prompt": result["generated_prompt"],
+                "images": [image["image_url"] for image in result["images"]],
+                "requested": count,
+            }
         )
 
+    except GenerationError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+
     except Exception as e:
-        logging.error(f"이미지 생성 중 오류 발생: {str(e)}", exc_info=True)
+        logging.error(f"변형 이미지 생성 중 오류 발생: {str(e)}", exc_info=True)
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@login_required
+@require_http_methods(["POST"])
+def generate_image_job(request):
+    """이미지 생성 작업을 등록하고 즉시 job id를 반환"""
+    prompt = request.POST.get("prompt", "").strip()
+    if not prompt:
+        return JsonResponse({"error": "프롬프트를 입력해주세요."}, status=400)
+
+    try:
+        job = start_generation_job(request.user, prompt)
+    except JobQueueFull:
+        return JsonResponse(
+            {"error": "요청이 많습니다. 잠시 후 다시 시도해주세요."}, status=503
+        )
+
+    return JsonResponse(
+        {
+            "job_id": str(job.id),
+            "status_url": reverse("generation_job_status", args=[job.id]),
+        },
+        status=202,
+    )
+
+
+@login_required
+@require_http_methods(["POST"])
+def generate_image_stream(request):
+    """이미지 생성 작업을 등록하고 단계별 진행 상황을 Server-Sent Events로 전송
+
+    응답이 끝날 때까지 연결을 유지하므로 ASGI 서버에서 사용한다 (GENERATION_PROGRESS_SSE).
+    """
+    prompt = request.POST.get("prompt", "").strip()
+    if not prompt:
+        return JsonResponse({"error": "프롬프트를 입력해주세요."}, status=400)
+
+    events = queue.Queue()
+    try:
+        job = start_generation_job(
+            request.user, prompt, listener=lambda event, data: events.put((event, data))
+        )
+    except JobQueueFull:
+        return JsonResponse(
+            {"error": "요청이 많습니다. 잠시 후 다시 시도해주세요."}, status=503
+        )
+
+    response = StreamingHttpResponse(
+        stream_job_events(job, events), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@login_required
+@require_GET
+def generation_job_status(request, job_id):
+    """이미지 생성 작업의 진행 단계, 단계별 소요 시간, 결과 URL을 반환"""
+    job = get_object_or_404(GenerationJob, pk=job_id, user=request.user)
+    job = expire_stale_job(job)
+    return JsonResponse(job.as_dict())
+
+
 @require_http_methods(["POST"])
 def read_text(request: HttpRequest) -> HttpResponse:
     try:
@@ -349,12 +923,16 @@ def read_text(request: HttpRequest) -> HttpResponse:
         caption = data.get("caption", "").strip()
         if not caption:
             return JsonResponse({"error": "캡션이 제공되지 않았습니다."}, status=400)
+        from util.common.azure_speech import synthesize_text_to_speech
+
         audio_data = synthesize_text_to_speech(caption)
         if not audio_data:
             raise Exception("음성 데이터를 생성하지 못했습니다.")
         response = HttpResponse(audio_data, content_type="audio/wav")
         response["Content-Disposition"] = 'attachment; filename="caption.wav"'
         return response
+    except resilience.CircuitOpenError:
+        return JsonResponse({"error": UNAVAILABLE_MESSAGE}, status=503)
     except Exception as e:
         logging.error("read_text 에러", exc_info=True)
         return JsonResponse({"error": str(e)}, status=500)
@@ -383,6 +961,8 @@ def post_detail(request: HttpRequest, pk: int) -> HttpResponse:
         if request.user.is_authenticated
         else False
     )
+    retry_if_stale(post)
+    renditions.attach([post])
     curation_text = ""
     previous_url = request.META.get("HTTP_REFERER", "")
     logging.info(f"이전 화면의 주소: {previous_url}")
@@ -398,6 +978,21 @@ def post_detail(request: HttpRequest, pk: int) -> HttpResponse:
     )
 
 
+@login_required
+@require_GET
+def post_enrichment_status(request, pk):
+    """게시물의 캡션/태그 분석 상태와 결과를 반환"""
+    post = get_object_or_404(Post, pk=pk)
+    retry_if_stale(post)
+    return JsonResponse(
+        {
+            "status": post.enrichment_status,
+            "caption": post.caption,
+            "tags": post.tags or [],
+        }
+    )
+
+
 @login_required
 @require_http_methods(["POST"])
 def generate_curation(request, pk):
@@ -412,74 +1007,66 @@ def generate_curation(request, pk):
     except Exception:
         selected_style = "Emotional"
 
-    # generate_ai_curation returns a dict with various style keys.
-    curation_text = generate_ai_curation(
-        selected_style, post.title, caption_str, ", ".join(tags)
-    )
+    # 실패는 공유하지 않도록 generate_ai_curation은 예외를 던지고, 여기서 오류 메시지로 바꾼다.
+    try:
+        curation_text = singleflight.run_once(
+            singleflight.make_key("curation", request.user.id, pk, selected_style),
+            lambda: generate_ai_curation(
+                selected_style, post.title, caption_str, ", ".join(tags or [])
+            ),
+        )
+    except Exception as e:
+        logging.error(f"큐레이션 생성 중 오류 발생: {str(e)}", exc_info=True)
+        curation_text = curation_error_message(selected_style, e)
     return JsonResponse({"curation_text": curation_text})
 
 
-def generate_ai_curation(selected_style, user_prompt, captions, tags):
-    """
-    한글로 각 스타일별 큐레이션을 생성하는 함수
-
-    Args:
-        user_prompt (str): 사용자 프롬프트
-        captions (str): 이미지 설명
-        tags (str): 태그들
-
-    Returns:
-        dict: 한글 스타일명과 큐레이션을 담은 딕셔너리
-    """
-
-    combined_text = f"프롬프트: {user_prompt}\n이미지 설명: {captions}\n태그: {tags}"
-
-    # 스타일별 프롬프트 설정
-    style_prompts = {
-        "Emotional": """Explore the emotions and sentiments contained in this artwork in depth. Write lyrically, including the following elements:
+# 큐레이션 스타일별 프롬프트
+CURATION_STYLE_PROMPTS = {
+    "Emotional": """Explore the emotions and sentiments contained in this artwork in depth. Write lyrically, including the following elements:
             - The main emotions and atmosphere conveyed by the work
             - Emotional responses evoked by visual elements
             - The special emotions given by the moment in the work
             - Empathy and resonance that viewers can feel
             - Lyrical characteristics and poetic expressions of the work""",
-        "Interpretive": """Analyze the meaning and artistic techniques of the work in depth. Interpret it by including the following elements:
+    "Interpretive": """Analyze the meaning and artistic techniques of the work in depth. Interpret it by including the following elements:
             - The main visual elements of the work and their symbolism
             - The effects of composition and color sense
             - The artist's intention and message
             - Artistic techniques used and their effects
             - Philosophical/conceptual meaning conveyed by the work""",
-        "Historical": """Analyze the work in depth in its historical and art historical context. Explain it by including the following elements:
+    "Historical": """Analyze the work in depth in its historical and art historical context. Explain it by including the following elements:
             - The historical background and characteristics of the era in which the work was produced
             - Relationship with similar art trends or works
             - Position and significance in modern art history
             - Artistic/social impact of the work
             - Interpretation of the work in its historical context""",
-        "Critical": """Provide a professional and balanced critique of the work. Evaluate it by including the following elements:
+    "Critical": """Provide a professional and balanced critique of the work. Evaluate it by including the following elements:
             - Technical completeness and artistry of the work
             - Analysis of creativity and innovation
             - Strengths and areas for improvement
             - Artistic achievement and limitations
             - Uniqueness and differentiation of the work""",
-        "Narrative": """Unravel the work into an attractive story. Describe it by including the following elements:
+    "Narrative": """Unravel the work into an attractive story. Describe it by including the following elements:
             - Vivid description of the scene in the work
             - Relationship and story between the elements of appearance
             - Flow and changes in time in the work
             - Hidden drama and narrative in the scene
             - Context before and after that viewers can imagine""",
-        "Trend": """Analyze the work from the perspective of contemporary art trends. Evaluate it by including the following elements:
+    "Trend": """Analyze the work from the perspective of contemporary art trends. Evaluate it by including the following elements:
             - Relevance to contemporary art trends
             - Digital/technological innovation elements
             - Meaning in the context of modern society/culture
             - Contact with the latest art trends
             - Implications for future art development""",
-        "Money": """You are an art price evaluation expert with decades of experience in the art market. Provide a detailed and professional price analysis for the given artwork. Consider the following elements to determine and explain the precise price of the work:
+    "Money": """You are an art price evaluation expert with decades of experience in the art market. Provide a detailed and professional price analysis for the given artwork. Consider the following elements to determine and explain the precise price of the work:
             - Artist's reputation and market value
             - Size, materials, and year of creation of the artwork
             - Rarity and condition of the piece
             - Recent auction prices of similar works
             - Current art market trends and demand
             The price evaluation should be written in a specific and persuasive manner, clearly revealing the monetary value of the work from a professional perspective. Finally, present an estimated price range and explain its basis in detail. Ensure that your analysis does not exceed 800 characters.""",
-        "Praise": """You are a passionate art advocate with a deep affection and understanding of contemporary art. Provide a positive and inspiring analysis of the given artwork. Consider the following elements to enthusiastically praise the work:
+    "Praise": """You are a passionate art advocate with a deep affection and understanding of contemporary art. Provide a positive and inspiring analysis of the given artwork. Consider the following elements to enthusiastically praise the work:
             - Innovative aspects and originality of the piece
             - Excellent use of color and composition
             - The artist's vision and its superb expression
@@ -487,7 +1074,7 @@ def generate_ai_curation(selected_style, user_prompt, captions, tags):
             - Significance in the context of contemporary art history
             The analysis should be written in an enthusiastic and persuasive tone.Emphasize the work's strengths and vividly describe its artistic value. Explain how the piece stimulates the audience's emotions and presents new perspectives. Also, mention the positive influence this work has on the art world and the inspiration it can provide to future generations. 
             Throughout your curation, intersperse appropriate exclamations and expressions of awe to convey your genuine excitement and admiration for the artwork. Use phrases like "Wow!", "Incredible!", "Absolutely stunning!", or "What a masterpiece!" to enhance the enthusiastic tone of your analysis. Ensure that your analysis does not exceed 800 characters.""",
-        "Blind": """You are an expert in describing images for visually impaired individuals. Your goal is to provide clear, detailed, and vivid descriptions that help them mentally visualize the image.
+    "Blind": """You are an expert in describing images for visually impaired individuals. Your goal is to provide clear, detailed, and vivid descriptions that help them mentally visualize the image.
             #Key Elements to Include
             - General composition and main elements of the image.
             - Detailed descriptions of colors, shapes, and textures.
@@ -503,38 +1090,64 @@ def generate_ai_curation(selected_style, user_prompt, captions, tags):
             - Provide context or purpose of the image to aid understanding.
             #Objective
             Enable visually impaired individuals to form a vivid mental picture of the image through your descriptive language.""",
-    }
+}
 
-    # 결과를 저장할 딕셔너리
-    curations = {}
 
-    # 선택된 스타일에 해당하는 큐레이션 생성
-    style_prompt = style_prompts.get(selected_style, "")
-    if style_prompt:
-        try:
-            response = GPT_CLIENT.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"""You are an art curation expert. Provide a very detailed and professional analysis of the given work.
+def curation_messages(selected_style, user_prompt, captions, tags):
+    """선택한 스타일의 큐레이션 요청 메시지 목록. 지원하지 않는 스타일이면 None"""
+    style_prompt = CURATION_STYLE_PROMPTS.get(selected_style, "")
+    if not style_prompt:
+        return None
+
+    combined_text = f"프롬프트: {user_prompt}\n이미지 설명: {captions}\n태그: {tags}"
+    return [
+        {
+            "role": "system",
+            "content": f"""You are an art curation expert. Provide a very detailed and professional analysis of the given work.
                         {style_prompt} The analysis should be written in a specific and persuasive manner,
                         and should clearly reveal the characteristics and value of the work from a professional perspective.
                         As an expert in evaluating artwork, please provide an assessment of the piece within 100 words, utilizing the provided information.
                         Please write a curation in Korean based on the following information.""",
-                    },
-                    {"role": "user", "content": combined_text},
-                ],
-            )
-            curations[selected_style] = response.choices[0].message.content
-        except Exception as e:
-            curations[selected_style] = (
-                f"Error generating {selected_style} curation: {str(e)}"
+        },
+        {"role": "user", "content": combined_text},
+    ]
+
+
+def generate_ai_curation(selected_style, user_prompt, captions, tags):
+    """
+    한글로 선택한 스타일의 큐레이션을 생성하는 함수
+
+    Args:
+        selected_style (str): CURATION_STYLE_PROMPTS의 스타일명
+        user_prompt (str): 사용자 프롬프트
+        captions (str): 이미지 설명
+        tags (str): 태그들
+
+    Returns:
+        str: 생성된 큐레이션
+
+    Raises:
+        ValueError: 지원하지 않는 스타일
+        openai.OpenAIError 등: 호출 실패 (single-flight가 실패를 공유하지 않도록 그대로 던진다)
+    """
+    messages = curation_messages(selected_style, user_prompt, captions, tags)
+    if messages is None:
+        raise ValueError("Invalid style selected.")
+
+    # 큐레이션은 이미지 생성보다 우선순위가 낮은 background 레인으로 호출
+    with rate_limit.lane(rate_limit.BACKGROUND), metrics.timed("curation"):
+        with resilience.deadline_scope(settings.OPENAI_DEADLINE):
+            response = get_openai_client("gpt").chat.completions.create(
+                model="gpt-4o", messages=messages
             )
-    else:
-        curations[selected_style] = "Invalid style selected."
+    return response.choices[0].message.content
+
 
-    return curations[selected_style]
+def curation_error_message(selected_style, error):
+    """generate_ai_curation이 실패했을 때 화면에 보여줄 문구"""
+    if isinstance(error, ValueError):
+        return str(error)
+    return f"Error generating {selected_style} curation: {str(error)}"
 
 
 @login_required
@@ -547,35 +1160,36 @@ def create_post(request: HttpRequest) -> HttpResponse:
 
             generated_image_url = request.POST.get("generated_image_url")
             generated_prompt = request.POST.get("generated_prompt")
-            caption, tags = get_image_caption_and_tags(generated_image_url)
 
             if generated_image_url:
                 blob_url = save_image_to_blob(
                     generated_image_url, form.cleaned_data["prompt"], request.user.id
                 )
                 if blob_url:
-                    post.image = generated_image_url
+                    post.image = blob_url
 
                     AIGeneration.objects.create(
                         user=request.user,
                         prompt=form.cleaned_data["prompt"],
+                        source_prompt=request.POST.get("source_prompt", ""),
                         generated_prompt=generated_prompt,
                         image_url=blob_url,
                     )
             if generated_prompt:
                 post.generated_prompt = generated_prompt
-            if caption:
-                post.caption = caption[0]
-            if tags:
-                # tags를 리스트 형태로 저장
-                post.tags = tags
+
+            # 캡션/태그 분석은 저장 후 백그라운드에서 진행
+            if post.image:
+                post.enrichment_status = Post.ENRICHMENT_PENDING
+                post.enrichment_requested_at = timezone.now()
 
             post.save()
             form.save_m2m()
 
-            # 분석된 tags 정보를 TagUsage 업데이트
-            if tags:
-                update_tag_usage_on_create(tags)
+            if post.enrichment_status == Post.ENRICHMENT_PENDING:
+                transaction.on_commit(
+                    functools.partial(enqueue_post_enrichment, post.pk)
+                )
 
             return redirect("post_detail", pk=post.pk)
     else:
@@ -692,9 +1306,7 @@ def my_gallery(request):
     posts = posts_list[offset : offset + post_cnt]
     has_more = (offset + post_cnt) < total_count
 
-    for post in posts:
-        if post.image:
-            post.thumb = post.image.replace("uploads/", "resized/thumb_")
+    renditions.attach(posts)
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         html_fragment = render_to_string(
@@ -748,10 +1360,8 @@ def public_gallery(request):
 
     has_more = (offset + post_cnt) < total_count
 
-    # 추가: 각 포스트의 image 필드에 uploads/를 resized/thumb_로 대체하여 썸네일 URL을 post.thumb에 저장
-    for post in posts:
-        if post.image:
-            post.thumb = post.image.replace("uploads/", "resized/thumb_")
+    # 각 포스트에 썸네일 URL(post.thumb)과 렌디션 srcset을 붙인다.
+    renditions.attach(posts)
 
     # AJAX 요청 시 HTML 프래그먼트 반환
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -762,9 +1372,7 @@ def public_gallery(request):
 
     top_tags = TagUsage.objects.order_by("-count")[:10]
     top_posts = get_top_liked_posts()
-    for post in top_posts:
-        if post.image:
-            post.thumb = post.image.replace("uploads/", "resized/thumb_")
+    renditions.attach(top_posts)
 
     return render(
         request,
@@ -875,7 +1483,11 @@ def custom_admin(request):
 
 
 def home(request):
-    return render(request, "app/home.html")
+    return render(
+        request,
+        "app/home.html",
+        {"generation_sse": settings.GENERATION_PROGRESS_SSE},
+    )
 
 
 def about(request):
@@ -930,6 +1542,7 @@ def fullscreen_gallery(request):
         .exclude(image__exact="")
         .order_by("-date_posted")
     )
+    renditions.attach(posts)
 
     return render(request, "app/fullscreen_gallery.html", {"posts": posts})
 
@@ -996,3 +1609,71 @@ def gpt4o_stt_api(request):
         return JsonResponse({"result": result})
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
+
+
+# 스트리밍 도중 오류가 나면 이 문자 뒤에 오류 메시지를 붙여 응답을 끝낸다.
+# 모델 출력에는 나오지 않는 문자이며, 클라이언트는 이 문자가 오면 받은 텍스트를 버린다.
+STREAM_ERROR_MARKER = "\x00"
+
+
+def streaming_text_response(tokens):
+    """텍스트 조각 제너레이터를 chunked text/plain 응답으로 전달
+
+    응답 상태(200)는 이미 보냈으므로 도중의 오류는 STREAM_ERROR_MARKER로 알린다.
+    GenerationError면 그 메시지를, 그 외에는 일반 오류 메시지를 보낸다.
+    """
+
+    def guarded():
+        try:
+            yield from tokens
+        except GenerationError as e:
+            logging.warning(f"스트리밍 응답 중 오류 발생: {str(e)}")
+            yield f"{STREAM_ERROR_MARKER}{str(e)}"
+        except Exception as e:
+            logging.error(f"스트리밍 응답 중 오류 발생: {str(e)}", exc_info=True)
+            yield f"{STREAM_ERROR_MARKER}응답 생성 중 오류가 발생했습니다."
+
+    response = StreamingHttpResponse(
+        guarded(), content_type="text/plain; charset=utf-8"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_http_methods(["POST"])
+def gpt4o_stt_stream_api(request):
+    """gpt4o_stt_api의 스트리밍 버전. 변환된 텍스트를 생성되는 대로 전송"""
+    user_input = request.POST.get("text", "").strip()
+    user_style = request.POST.get("style", "default").strip()
+    if not user_input:
+        return JsonResponse({"error": "텍스트가 제공되지 않았습니다."}, status=400)
+    return streaming_text_response(stream_stt_with_gpt4o(user_input, user_style))
+
+
+@login_required
+@require_http_methods(["POST"])
+def speculate_prompt(request):
+    """입력이 잠시 멈췄을 때 프롬프트를 미리 정제 (결과는 이미지 생성 시 사용)"""
+    prompt = request.POST.get("prompt", "").strip()
+    status = speculation.start(request.user, prompt)
+    return JsonResponse(
+        {"status": status}, status=429 if status == speculation.LIMITED else 202
+    )
+
+
+@login_required
+@require_http_methods(["POST"])
+def cancel_prompt_speculation(request):
+    """진행 중인 미리 정제 요청을 취소"""
+    return JsonResponse({"cancelled": speculation.cancel(request.user)})
+
+
+@login_required
+@require_http_methods(["POST"])
+def refine_prompt_stream(request):
+    """DALL-E용 프롬프트 정제 결과를 생성되는 대로 전송"""
+    prompt = request.POST.get("prompt", "").strip()
+    if not prompt:
+        return JsonResponse({"error": "프롬프트를 입력해주세요."}, status=400)
+    return streaming_text_response(stream_prompt_with_gpt3o(prompt, request.user.id))
@@ -0,0 +1,58 @@
+"""벤치마크 실행용 Django 초기화
+
+Azure 자격 증명 없이도 실행할 수 있도록 필수 환경 변수에 더미 값을 채우고,
+DB는 별도 지정이 없으면 메모리 SQLite를 사용한다.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PLACEHOLDER_ENV = {
+    "DATABASE_ENGINE": "django.db.backends.sqlite3",
+    "DATABASE_NAME": ":memory:",
+    "DATABASE_USER": "",
+    "DATABASE_PASSWORD": "",
+    "DATABASE_HOST": "",
+    "DATABASE_PORT": "",
+    "STORAGE_ACCOUNT_NAME": "benchaccount",
+    "STORAGE_ACCOUNT_KEY": "YmVuY2g=",
+    "CONTAINER_NAME": "uploads",
+    "AZURE_OPENAI_ENDPOINT": "http://127.0.0.1:9/",
+    "AZURE_OPENAI_API_KEY": "bench",
+    "AZURE_OPENAI_API_VERSION": "2024-10-21",
+    "AZURE_DALLE_ENDPOINT": "http://127.0.0.1:9/",
+    "AZURE_DALLE_API_KEY": "bench",
+    "AZURE_DALLE_API_VERSION": "2024-10-21",
+    "AZURE_3OMINI_ENDPOINT": "http://127.0.0.1:9/",
+    "AZURE_3OMINI_API_KEY": "bench",
+    "AZURE_3OMINI_API_VERSION": "2024-12-01-preview",
+    "AZURE_SPEECH_API_KEY": "bench",
+    "AZURE_SPEECH_SERVICE_REGION": "koreacentral",
+    "AZURE_COMPUTER_VISION_API_KEY": "bench",
+    "AZURE_COMPUTER_VISION_ENDPOINT": "http://127.0.0.1:9/",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "25",
+    "EMAIL_USE_TLS": "False",
+    "EMAIL_HOST_USER": "bench",
+    "EMAIL_HOST_PASSWORD": "bench",
+    "DEFAULT_FROM_EMAIL": "bench@localhost",
+}
+
+
+def setup(migrate=False):
+    for key, value in PLACEHOLDER_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "team6.settings")
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+
+    import django
+
+    django.setup()
+    if migrate:
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
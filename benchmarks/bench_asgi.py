@@ -0,0 +1,174 @@
+"""WSGI(동기 뷰)와 ASGI(비동기 뷰)의 동시 처리 용량 비교 벤치마크
+
+Azure OpenAI를 고정 지연으로 응답하는 로컬 스텁으로 대체하고, 같은 요청 N개를 동시에 보낸다.
+- wsgi: gpt4o_stt_api(동기)를 WSGI 핸들러로 --threads 개의 워커 스레드에서 처리 (gthread 워커 1개)
+- asgi: gpt4o_stt_api(비동기)를 ASGI 핸들러로 이벤트 루프 하나에서 처리 (uvicorn 워커 1개)
+
+모드별로 처리량, 지연 분포, 스텁이 관측한 최대 동시 요청 수를 JSON 한 줄씩 출력한다.
+
+사용법:
+    python -m benchmarks.bench_asgi --requests 200 --threads 8 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CHAT_RESPONSE = json.dumps(
+    {
+        "id": "bench",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "벤치마크 응답"},
+            }
+        ],
+    }
+).encode("utf-8")
+
+
+class StubBackend:
+    """모든 요청에 latency초 뒤 chat completion을 돌려주는 keep-alive HTTP 서버"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self.handle, "127.0.0.1", 0, backlog=1024)
+        )
+        self.url = f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/"
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def reset(self):
+        self.max_in_flight = 0
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                await reader.readexactly(length)
+
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                await asyncio.sleep(self.latency)
+                self.in_flight -= 1
+
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n" % len(CHAT_RESPONSE) + CHAT_RESPONSE
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def summarize(mode, workers, latencies, wall, backend, args):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "requests": len(latencies),
+        "backend_latency_ms": round(args.latency * 1000),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(quantiles[49] * 1000, 1),
+        "p95_ms": round(quantiles[94] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "backend_max_in_flight": backend.max_in_flight,
+    }
+
+
+def run_wsgi(args, backend):
+    from django.test import Client
+
+    def call(submitted):
+        response = Client().post(
+            "/ai/gpt4o/", {"text": "안녕하세요", "style": "default"}
+        )
+        assert response.status_code == 200, response.content
+        return time.perf_counter() - submitted
+
+    backend.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        futures = [
+            executor.submit(call, time.perf_counter()) for _ in range(args.requests)
+        ]
+        latencies = [future.result() for future in futures]
+    wall = time.perf_counter() - started
+    return summarize("wsgi", f"{args.threads} threads", latencies, wall, backend, args)
+
+
+def run_asgi(args, backend):
+    from django.test import AsyncClient
+
+    async def call(client):
+        submitted = time.perf_counter()
+        response = await client.post(
+            "/async/ai/gpt4o/", {"text": "안녕하세요", "style": "default"}
+        )
+        assert response.status_code == 200, response.content
+        return time.perf_counter() - submitted
+
+    async def main():
+        client = AsyncClient()
+        # 클라이언트 생성/연결 비용을 측정에서 제외
+        await call(client)
+        backend.reset()
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(call(client) for _ in range(args.requests)))
+        return latencies, time.perf_counter() - started
+
+    latencies, wall = asyncio.run(main())
+    return summarize("asgi", "1 event loop", latencies, wall, backend, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5, help="스텁 응답 지연(초)")
+    args = parser.parse_args()
+
+    backend = StubBackend(args.latency)
+    os.environ["AZURE_OPENAI_ENDPOINT"] = backend.url
+
+    from benchmarks import _django
+
+    _django.setup()
+
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    logging.disable(logging.INFO)
+
+    # 동기 뷰의 print 출력은 버린다.
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [run_wsgi(args, backend), run_asgi(args, backend)]
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,623 @@
+"""이미지 생성/게시/큐레이션/음성 변환 뷰의 처리량 벤치마크 (외부 서비스는 프로세스 내 스텁)
+
+OpenAI(o3-mini 정제, gpt-4o 큐레이션, DALL-E), Blob Storage, 이미지 다운로드, Computer Vision,
+Speech 호출을 지정한 지연 분포로 응답하는 스텁으로 바꾸고, 다음 시나리오를 --concurrency개
+스레드에서 Django 테스트 클라이언트로 호출한다. Azure 사용량 없이 파이프라인 코드 자체의 성능
+변화를 확인하기 위한 것이다.
+
+- generate_image: POST /app/ai/generate/ (정제 -> DALL-E -> 원본/썸네일 업로드)
+- create_post: POST /app/create/ (이미지 다운로드 -> 업로드 -> 게시물 저장, 분석은 백그라운드)
+- generate_curation: POST /app/posts/<pk>/generate_curation/
+- read_text: POST /app/read_text/
+
+DB는 DATABASE_* 환경 변수가 없으면 임시 파일 SQLite를 사용한다. SQLite는 쓰기를 하나씩만
+처리하므로 운영과 같은 조건으로 비교하려면 PostgreSQL을 지정한다.
+
+시나리오마다 새 프로세스에서 실행하며, 처리량, 지연 백분위수(p50/p95/p99), 최대 RSS를 JSON 한
+줄씩 출력한다. --output을 주면 같은 결과를 JSON 배열로 파일에 저장한다.
+
+지연 분포는 --latency 단계=분포 형식으로 바꾼다. 단계는 refine, curation, generate, upload,
+download, vision, speech이고 분포 형식은 util.faults와 같다. (0.2, uniform:0.1:0.3,
+lognormal:0.2:0.5, exp:0.2, percentiles:50=0.1,99=0.5. 단위: 초)
+
+--profile을 주면 스텁 대신 그 장애 프로필(util.faults)을 주입하는 azure_standin 서버를 별도
+프로세스로 띄우고 실제 SDK로 호출한다. 타임아웃, 재시도, 서킷 브레이커까지 포함한 동작을 본다.
+--profile을 여러 번 주면 시나리오 x 프로필 조합마다 실행한다. 같은 --seed면 주입되는 장애가 같다.
+AZURE_OPENAI_RATE_LIMITS를 설정했다면 앱의 배포별 호출 한도도 그대로 적용되므로, 한도와
+무관한 동작을 보려면 환경 변수로 한도를 높이거나 비운다.
+
+--rate를 주면 초당 그만큼의 요청이 포아송 과정으로 도착하고 --concurrency개 워커가 처리한다
+(open loop). 이때 지연은 대기 시간을 포함하며, 대기열 길이(queue depth)를 0.1초마다 재서 함께
+보고한다. --report를 주면 결과를 프로필별로 비교하는 Markdown 표를 저장한다.
+
+사용법:
+    python -m benchmarks.bench_pipeline --requests 200 --concurrency 8
+    python -m benchmarks.bench_pipeline --scenarios generate_image \\
+        --latency generate=lognormal:0.5:0.3 --output pipeline.json
+    python -m benchmarks.bench_pipeline --scenarios generate_image --rate 2 \\
+        --concurrency 4 --profile baseline --profile dalle_p99_60s --report faults.md
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from util import faults
+
+SCENARIOS = ["generate_image", "create_post", "generate_curation", "read_text"]
+
+DEFAULT_LATENCY = {
+    "refine": "lognormal:0.05:0.3",
+    "curation": "lognormal:0.05:0.3",
+    "generate": "lognormal:0.1:0.3",
+    "upload": "lognormal:0.02:0.3",
+    "download": "lognormal:0.02:0.3",
+    "vision": "lognormal:0.03:0.3",
+    "speech": "lognormal:0.03:0.3",
+}
+
+# WAV 헤더만 있는 44바이트 무음
+SILENT_WAV = (
+    b"RIFF$\x00\x00\x00WAVEfmt \x10\x00\x00\x00\x01\x00\x01\x00"
+    b"\x80>\x00\x00\x00}\x00\x00\x02\x00\x10\x00data\x00\x00\x00\x00"
+)
+
+
+def parse_latency(values):
+    specs = dict(DEFAULT_LATENCY)
+    for value in values or []:
+        stage, _, spec = value.partition("=")
+        if stage not in specs:
+            raise SystemExit(f"알 수 없는 단계: {stage} ({', '.join(specs)})")
+        specs[stage] = spec
+    for spec in specs.values():
+        try:
+            faults.parse_distribution(spec)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    return specs
+
+
+class StubImages:
+    """PNG 하나를 만들어 두고 끝에 임의의 바이트를 붙여 매번 다른 해시의 이미지를 만든다.
+
+    PIL은 IEND 뒤의 데이터를 무시하므로 썸네일 생성 비용은 실제 이미지와 같다.
+    """
+
+    def __init__(self, size):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.effect_noise((size, size), 64).convert("RGB").save(buffer, format="PNG")
+        png = buffer.getvalue()
+        # base64를 이어 붙일 수 있도록 길이를 3의 배수로 맞춘다.
+        self.png = png + b"\0" * (-len(png) % 3)
+        self.png_b64 = base64.b64encode(self.png).decode("ascii")
+
+    def unique_png(self):
+        return self.png + os.urandom(12)
+
+    def unique_b64(self):
+        return self.png_b64 + base64.b64encode(os.urandom(12)).decode("ascii")
+
+
+class Stubs:
+    """OpenAI, Blob, HTTP 세션, Computer Vision 스텁. 호출마다 단계별 지연 분포만큼 잠든다."""
+
+    def __init__(self, latency, image_size):
+        self.delay = {
+            stage: faults.parse_distribution(spec) for stage, spec in latency.items()
+        }
+        self.images = StubImages(image_size)
+
+    def sleep(self, stage):
+        time.sleep(self.delay[stage](random))
+
+    def openai_client(self, name):
+        stubs = self
+
+        def chat_create(model, messages, **kwargs):
+            stubs.sleep("curation" if name == "gpt" else "refine")
+            return SimpleNamespace(
+                choices=[
+                    SimpleNamespace(
+                        message=SimpleNamespace(
+                            content=f"bench {model}: {messages[-1]['content'][:40]}"
+                        )
+                    )
+                ]
+            )
+
+        def images_generate(model, prompt, n=1, response_format="url", **kwargs):
+            stubs.sleep("generate")
+            if response_format == "b64_json":
+                data = SimpleNamespace(b64_json=stubs.images.unique_b64(), url=None)
+            else:
+                data = SimpleNamespace(
+                    b64_json=None,
+                    url=f"https://bench.openai/{os.urandom(8).hex()}.png",
+                )
+            return SimpleNamespace(data=[data])
+
+        return SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=chat_create)),
+            images=SimpleNamespace(generate=images_generate),
+        )
+
+    def blob_service_client(self):
+        stubs = self
+
+        class BlobClient:
+            def __init__(self, container, blob):
+                self.url = f"https://bench.blob.core.windows.net/{container}/{blob}"
+
+            def upload_blob(self, data, overwrite=False, **kwargs):
+                if hasattr(data, "read"):
+                    data.read()
+                stubs.sleep("upload")
+
+            def delete_blob(self, *args, **kwargs):
+                stubs.sleep("upload")
+
+        class BlobServiceClient:
+            def get_blob_client(self, container, blob):
+                return BlobClient(container, blob)
+
+            def get_container_client(self, container):
+                return BlobClient(container, "")
+
+        return BlobServiceClient()
+
+    def http_session(self):
+        stubs = self
+
+        class Response:
+            status_code = 200
+
+            def __init__(self, content):
+                self.content = content
+
+            def raise_for_status(self):
+                pass
+
+        class Session:
+            def get(self, url, **kwargs):
+                stubs.sleep("download")
+                return Response(stubs.images.unique_png())
+
+            def post(self, url, **kwargs):
+                stubs.sleep("speech")
+                return Response(SILENT_WAV)
+
+        return Session()
+
+    def computer_vision_client(self):
+        stubs = self
+
+        def analyze(*args, **kwargs):
+            stubs.sleep("vision")
+            return SimpleNamespace(
+                description=SimpleNamespace(
+                    captions=[SimpleNamespace(text="a benchmark image")]
+                ),
+                tags=[SimpleNamespace(name="bench"), SimpleNamespace(name="noise")],
+            )
+
+        return SimpleNamespace(analyze_image_in_stream=analyze, analyze_image=analyze)
+
+    def install(self):
+        from app import views
+        from util.common import azure_computer_vision, clients
+
+        session = self.http_session()
+        blob_service_client = self.blob_service_client()
+        computer_vision_client = self.computer_vision_client()
+        views.get_openai_client = self.openai_client
+        views.get_blob_service_client = lambda: blob_service_client
+        views.get_http_session = lambda: session
+        clients.get_http_session = lambda: session
+        azure_computer_vision.get_computer_vision_client = (
+            lambda: computer_vision_client
+        )
+
+
+def percentile(quantiles, p):
+    return round(quantiles[p - 1] * 1000, 1)
+
+
+def run_closed_loop(timed_call, indices, args):
+    """--concurrency개 스레드가 쉬지 않고 호출. [(성공 여부, 지연, 대기 시간)]"""
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(timed_call, indices))
+    return [(ok, latency, 0.0) for ok, latency in results], None
+
+
+def run_open_loop(timed_call, indices, args):
+    """초당 --rate개가 포아송 과정으로 도착하고 --concurrency개 워커가 처리.
+
+    ([(성공 여부, 대기 포함 지연, 대기 시간)], 0.1초마다 잰 대기열 길이 목록)
+    """
+    rng = random.Random(args.seed)
+    lock = threading.Lock()
+    waiting = [0]
+    depths = []
+    done = threading.Event()
+
+    def job(i, arrived):
+        wait = time.perf_counter() - arrived
+        with lock:
+            waiting[0] -= 1
+        ok, latency = timed_call(i)
+        return ok, wait + latency, wait
+
+    def sample():
+        while not done.wait(0.1):
+            with lock:
+                depths.append(waiting[0])
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    futures = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        arrival = time.perf_counter()
+        for i in indices:
+            arrival += rng.expovariate(args.rate)
+            time.sleep(max(0.0, arrival - time.perf_counter()))
+            with lock:
+                waiting[0] += 1
+            futures.append(executor.submit(job, i, time.perf_counter()))
+        results = [future.result() for future in futures]
+    done.set()
+    sampler.join()
+    return results, depths
+
+
+def run_scenario(name, args):
+    """현재 프로세스에서 시나리오 하나를 실행하고 결과 dict를 반환"""
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    from app.models import Post
+
+    user = User.objects.create_user(f"bench-{name}", password="bench")
+    total = args.warmup + args.requests
+    posts = []
+    if name == "generate_curation":
+        Post.objects.bulk_create(
+            Post(
+                user=user,
+                title=f"bench {i}",
+                content="bench",
+                image="https://bench.blob.core.windows.net/uploads/bench.png",
+                caption="a benchmark image",
+                tags=["bench", "noise"],
+            )
+            for i in range(total)
+        )
+        posts = list(Post.objects.filter(user=user).order_by("pk"))
+
+    # stand-in은 처음 보는 이름의 이미지도 만들어 준다.
+    image_base = args.standin_url or "https://bench.openai"
+    if args.standin_url:
+        image_base += "/standin/images"
+
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = Client()
+            local.client.force_login(user)
+        return local.client
+
+    def call(i):
+        token = f"{i}-{os.urandom(4).hex()}"
+        if name == "generate_image":
+            response = client().post(
+                "/app/ai/generate/", {"prompt": f"벤치마크 {token} 바닷가의 등대"}
+            )
+            return response.status_code == 200
+        if name == "create_post":
+            response = client().post(
+                "/app/create/",
+                {
+                    "title": f"bench {token}",
+                    "content": "bench",
+                    "prompt": f"벤치마크 {token}",
+                    "generated_image_url": f"{image_base}/{token}.png",
+                    "generated_prompt": f"bench prompt {token}",
+                },
+            )
+            return response.status_code == 302
+        if name == "generate_curation":
+            response = client().post(
+                f"/app/posts/{posts[i].pk}/generate_curation/",
+                json.dumps({"style": "Emotional"}),
+                content_type="application/json",
+            )
+            return response.status_code == 200
+        response = client().post(
+            "/app/read_text/",
+            json.dumps({"caption": f"벤치마크 캡션 {token}"}),
+            content_type="application/json",
+        )
+        return response.status_code == 200
+
+    def timed_call(i):
+        started = time.perf_counter()
+        try:
+            ok = call(i)
+        except Exception:
+            logging.exception(f"{name} 요청 실패")
+            ok = False
+        return ok, time.perf_counter() - started
+
+    for i in range(args.warmup):
+        timed_call(i)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    run = run_open_loop if args.rate else run_closed_loop
+    started = time.perf_counter()
+    results, depths = run(timed_call, range(args.warmup, total), args)
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency, _ in results)
+    quantiles = statistics.quantiles(latencies, n=100)
+    # Linux의 ru_maxrss 단위는 KB
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = {
+        "scenario": name,
+        "profile": args.child_profile,
+        "seed": args.seed,
+        "requests": len(results),
+        "errors": sum(1 for ok, _, _ in results if not ok),
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(results) / wall, 1),
+        "p50_ms": percentile(quantiles, 50),
+        "p95_ms": percentile(quantiles, 95),
+        "p99_ms": percentile(quantiles, 99),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "peak_rss_mb": round(peak_rss / 1024, 1),
+        "rss_before_mb": round(rss_before / 1024, 1),
+    }
+    if depths is not None:
+        waits = statistics.quantiles(sorted(wait for _, _, wait in results), n=100)
+        result.update(
+            {
+                "queue_wait_p50_ms": percentile(waits, 50),
+                "queue_wait_p95_ms": percentile(waits, 95),
+                "queue_depth_mean": round(statistics.fmean(depths or [0]), 2),
+                "queue_depth_p95": (
+                    statistics.quantiles(depths, n=100)[94] if len(depths) > 1 else 0
+                ),
+                "queue_depth_max": max(depths or [0]),
+            }
+        )
+    if args.child_profile is None:
+        result["latency"] = args.latency_specs
+    return result
+
+
+def start_standin(args):
+    """--child-profile 장애를 주입하는 azure_standin을 띄우고 앱이 그쪽을 보도록 환경 변수를 설정"""
+    from benchmarks._django import BASE_DIR, PLACEHOLDER_ENV
+
+    command = [
+        sys.executable,
+        str(BASE_DIR / "manage.py"),
+        "azure_standin",
+        "--port",
+        "0",
+        "--seed",
+        str(args.seed),
+        "--profile",
+        args.child_profile,
+    ]
+    if args.profiles:
+        command += ["--profiles", args.profiles]
+    process = subprocess.Popen(
+        command,
+        env={**PLACEHOLDER_ENV, **os.environ},
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    for line in process.stdout:
+        key, _, value = line.rstrip("\n").partition("=")
+        if re.fullmatch(r"[A-Z0-9_]+", key):
+            os.environ[key] = value
+        if key == "AZURE_CONNECTION_STRING":
+            break
+    else:
+        raise SystemExit("azure_standin을 시작하지 못했습니다.")
+    args.standin_url = os.environ["AZURE_OPENAI_ENDPOINT"].rstrip("/")
+    return process
+
+
+def standin_stats(args):
+    with urllib.request.urlopen(f"{args.standin_url}/standin/stats") as response:
+        return json.load(response)
+
+
+def run_in_process(name, args):
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    # 스레드마다 같은 DB를 쓰도록 메모리 대신 파일 SQLite를 사용한다.
+    os.environ.setdefault("DATABASE_NAME", os.path.join(workdir, "db.sqlite3"))
+    os.environ.setdefault(
+        "PROMPT_INDEX_PATH", os.path.join(workdir, "prompt_index.npz")
+    )
+    random.seed(args.seed)
+    standin = start_standin(args) if args.child_profile else None
+
+    try:
+        from benchmarks import _django
+
+        _django.setup()
+
+        from django.conf import settings
+        from django.core.management import call_command
+
+        database = settings.DATABASES["default"]
+        if database["ENGINE"].endswith("sqlite3"):
+            # 동시 쓰기가 바로 "database is locked"로 실패하지 않고 잠금을 기다리게 한다.
+            database.setdefault("OPTIONS", {}).update(
+                {"timeout": 30, "transaction_mode": "IMMEDIATE"}
+            )
+        call_command("migrate", verbosity=0)
+
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        logging.disable(logging.WARNING if args.verbose else logging.CRITICAL)
+
+        if standin is None:
+            Stubs(args.latency_specs, args.image_size).install()
+        # 뷰의 print 출력은 버린다.
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_scenario(name, args)
+        if standin is not None:
+            result["injected"] = standin_stats(args)["faults"]
+        return result
+    finally:
+        if standin is not None:
+            standin.terminate()
+            standin.wait()
+
+
+def run_in_subprocess(name, profile, argv):
+    """시나리오마다 최대 RSS를 따로 재기 위해 새 인터프리터에서 실행"""
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.bench_pipeline",
+        *argv,
+        "--child",
+        name,
+    ]
+    if profile:
+        command += ["--child-profile", profile]
+    output = subprocess.run(
+        command,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+REPORT_COLUMNS = [
+    ("scenario", "시나리오"),
+    ("profile", "프로필"),
+    ("throughput_rps", "처리량(rps)"),
+    ("errors", "오류"),
+    ("p50_ms", "p50(ms)"),
+    ("p95_ms", "p95(ms)"),
+    ("p99_ms", "p99(ms)"),
+    ("queue_wait_p95_ms", "대기 p95(ms)"),
+    ("queue_depth_mean", "대기열 평균"),
+    ("queue_depth_max", "대기열 최대"),
+]
+
+
+def write_report(results, args):
+    """프로필별 지연과 대기열 길이를 비교하는 Markdown 표"""
+    lines = [
+        "# 장애 프로필별 파이프라인 지연",
+        "",
+        f"- 요청 {args.requests}개, 워커 {args.concurrency}개, "
+        f"도착률 {f'{args.rate}/s' if args.rate else '없음 (closed loop)'}, "
+        f"seed {args.seed}",
+        "",
+        "| " + " | ".join(title for _, title in REPORT_COLUMNS) + " | 주입한 장애 |",
+        "|" + "---|" * (len(REPORT_COLUMNS) + 1),
+    ]
+    for result in results:
+        injected = ", ".join(
+            f"{dependency} 지연 {counts['delay']}s/오류 {counts['errors']}"
+            f"/429 {counts['throttled']}"
+            for dependency, counts in (result.get("injected") or {}).items()
+        )
+        cells = [str(result.get(key, "-")) for key, _ in REPORT_COLUMNS]
+        lines.append("| " + " | ".join(cells) + f" | {injected or '-'} |")
+    with open(args.report, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"쉼표로 구분 ({', '.join(SCENARIOS)})",
+    )
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--image-size", type=int, default=1024)
+    parser.add_argument(
+        "--latency", action="append", metavar="STAGE=DIST", help="단계별 지연 분포"
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        help="azure_standin에 주입할 장애 프로필. 여러 번 지정 가능",
+    )
+    parser.add_argument("--profiles", help="프로필을 추가로 정의한 JSON 파일")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--rate", type=float, help="초당 도착 요청 수 (open loop, 대기열 길이 측정)"
+    )
+    parser.add_argument("--output", help="결과를 JSON 배열로 저장할 파일")
+    parser.add_argument("--report", help="프로필 비교 Markdown 표를 저장할 파일")
+    parser.add_argument("--verbose", action="store_true", help="경고 로그 출력")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--child-profile", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.latency_specs = parse_latency(args.latency)
+    args.standin_url = None
+
+    if args.child:
+        print(json.dumps(run_in_process(args.child, args), ensure_ascii=False))
+        return
+
+    profiles = args.profile or [None]
+    for profile in args.profile or []:
+        try:
+            faults.get_profile(profile, args.profiles)
+        except (OSError, ValueError) as e:
+            raise SystemExit(str(e))
+
+    results = []
+    for name in args.scenarios.split(","):
+        if name not in SCENARIOS:
+            raise SystemExit(f"알 수 없는 시나리오: {name}")
+        for profile in profiles:
+            result = run_in_subprocess(name, profile, sys.argv[1:])
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.report:
+        write_report(results, args)
+
+
+if __name__ == "__main__":
+    main()
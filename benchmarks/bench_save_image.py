@@ -0,0 +1,143 @@
+"""이미지 저장 단계의 요청 당 최대 메모리 사용량 벤치마크
+
+Blob Storage와 이미지 다운로드를 메모리 스텁으로 대체하고, 다음 세 경로의
+tracemalloc 최대 할당량과 소요 시간을 비교한다.
+
+- legacy: 변경 전 save_image_to_blob (stream=True 다운로드 후 content를 업로드/썸네일에 각각 사용)
+- url: DALL-E URL을 한 번 다운로드한 bytes를 save_image_bytes_to_blob에 전달
+- b64_json: DALL-E 응답의 base64를 디코딩한 bytes를 save_image_bytes_to_blob에 전달
+
+사용법:
+    python -m benchmarks.bench_save_image --repeat 5
+"""
+
+import argparse
+import base64
+import binascii
+import json
+import statistics
+import time
+import tracemalloc
+from io import BytesIO
+
+from benchmarks import _django
+
+_django.setup(migrate=True)
+
+from PIL import Image  # noqa: E402
+
+from app import views  # noqa: E402
+from app.models import StoredImage  # noqa: E402
+
+
+class FakeBlobClient:
+    def __init__(self, container, blob):
+        self.url = f"https://bench.blob.core.windows.net/{container}/{blob}"
+
+    def upload_blob(self, data, overwrite=False, **kwargs):
+        # 실제 SDK처럼 전송을 위해 데이터를 끝까지 읽기만 한다.
+        if hasattr(data, "read"):
+            data = data.read()
+        return len(data)
+
+
+class FakeBlobServiceClient:
+    def get_blob_client(self, container, blob):
+        return FakeBlobClient(container, blob)
+
+
+class FakeSession:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get(self, url, **kwargs):
+        return FakeResponse(self.payload)
+
+
+class FakeResponse:
+    """requests.Response 대체. content는 네트워크에서 새로 받은 것처럼 매번 새 bytes"""
+
+    def __init__(self, payload):
+        self._payload = payload
+        self._content = None
+
+    def raise_for_status(self):
+        pass
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = bytes(memoryview(self._payload))
+        return self._content
+
+
+def make_png(size=1024):
+    buffer = BytesIO()
+    Image.effect_noise((size, size), 64).convert("RGB").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def legacy_save_image_to_blob(image_url, prompt, user_id):
+    """변경 전 save_image_to_blob의 다운로드/업로드/썸네일 경로"""
+    response = views.get_http_session().get(image_url, stream=True)
+    response.raise_for_status()
+    blob_service_client = views.get_blob_service_client()
+    blob_client = blob_service_client.get_blob_client(container="uploads", blob="a")
+    blob_client.upload_blob(response.content, overwrite=True)
+    image = Image.open(BytesIO(response.content))
+    orig_width, orig_height = image.size
+    image.thumbnail((500, int(orig_height * (500 / orig_width))))
+    thumb_buffer = BytesIO()
+    image.save(thumb_buffer, format="PNG")
+    thumb_buffer.seek(0)
+    thumb_client = blob_service_client.get_blob_client(container="resized", blob="b")
+    thumb_client.upload_blob(thumb_buffer.read(), overwrite=True)
+    return blob_client.url
+
+
+def measure(fn, repeat):
+    peaks, durations = [], []
+    for _ in range(repeat):
+        # 같은 이미지가 중복 저장으로 처리되지 않도록 매번 비운다.
+        StoredImage.objects.all().delete()
+        tracemalloc.start()
+        started = time.perf_counter()
+        assert fn()
+        durations.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {
+        "peak_bytes": max(peaks),
+        "median_seconds": round(statistics.median(durations), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--size", type=int, default=1024)
+    args = parser.parse_args()
+
+    png = make_png(args.size)
+    b64_payload = base64.b64encode(png).decode("ascii")
+
+    blob_service_client = FakeBlobServiceClient()
+    session = FakeSession(png)
+    views.get_blob_service_client = lambda: blob_service_client
+    views.get_http_session = lambda: session
+
+    scenarios = {
+        "legacy": lambda: legacy_save_image_to_blob("http://dalle/img.png", "p", 1),
+        "url": lambda: views.save_image_to_blob("http://dalle/img.png", "p", 1),
+        "b64_json": lambda: views.save_image_bytes_to_blob(
+            binascii.a2b_base64(b64_payload), "p", 1
+        ),
+    }
+    for name, fn in scenarios.items():
+        result = {"scenario": name, "image_bytes": len(png)}
+        result.update(measure(fn, args.repeat))
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
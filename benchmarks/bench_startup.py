@@ -0,0 +1,129 @@
+"""Django 워커 기동 시간 벤치마크
+
+새 인터프리터에서 django.setup()과 URLconf 로딩(모든 views import)을 `python -X importtime`
+으로 반복 실행하고, 기동 시간 중앙값과 누적 import 시간이 큰 모듈, 기동 시점에 불러온
+무거운 SDK 목록을 JSON 한 줄로 출력한다. 릴리스마다 실행해 결과를 비교한다.
+
+사용법:
+    python -m benchmarks.bench_startup --repeat 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks._django import BASE_DIR, PLACEHOLDER_ENV
+
+# 기동 시점에 불러오지 않아야 하는 무거운 모듈
+HEAVY_MODULES = [
+    "openai",
+    "numpy",
+    "PIL.Image",
+    "requests",
+    "azure.storage.blob",
+    "azure.cognitiveservices.speech",
+    "azure.cognitiveservices.vision.computervision",
+]
+
+CHILD_CODE = """
+import json, sys, time
+started = time.perf_counter()
+from benchmarks import _django
+_django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+boot = time.perf_counter() - started
+print(json.dumps({
+    "boot_seconds": boot,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (
+    HEAVY_MODULES,
+)
+
+
+def parse_importtime(stderr):
+    """-X importtime 출력을 {모듈: (self_us, cumulative_us)}로 변환"""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        result[module.strip()] = (int(self_us), int(cumulative_us))
+    return result
+
+
+def run_once():
+    env = dict(os.environ)
+    for key, value in PLACEHOLDER_ENV.items():
+        env.setdefault(key, value)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    process_seconds = time.perf_counter() - started
+    child = json.loads(completed.stdout.strip().splitlines()[-1])
+    return process_seconds, child, parse_importtime(completed.stderr)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--label", default=None, help="기본값: git 리비전")
+    args = parser.parse_args()
+
+    process_times, boot_times, cumulative = [], [], {}
+    loaded = []
+    for _ in range(args.repeat):
+        process_seconds, child, imports = run_once()
+        process_times.append(process_seconds)
+        boot_times.append(child["boot_seconds"])
+        loaded = child["loaded"]
+        for module, (_, cumulative_us) in imports.items():
+            cumulative.setdefault(module, []).append(cumulative_us)
+
+    top = sorted(
+        ((statistics.median(v), m) for m, v in cumulative.items()), reverse=True
+    )[: args.top]
+    print(
+        json.dumps(
+            {
+                "label": args.label or git_revision(),
+                "python": sys.version.split()[0],
+                "repeat": args.repeat,
+                "boot_seconds_median": round(statistics.median(boot_times), 4),
+                "process_seconds_median": round(statistics.median(process_times), 4),
+                "heavy_modules_loaded": loaded,
+                "top_cumulative_imports_ms": [
+                    {"module": m, "ms": round(us / 1000, 1)} for us, m in top
+                ],
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
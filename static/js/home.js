@@ -5,6 +5,7 @@ document.addEventListener('DOMContentLoaded', function () {
     const aiVoiceInputBtn = document.getElementById('aiVoiceInputBtn');
     const speechModal = document.getElementById('speechRecognitionModal');
     const aiModal = document.getElementById('aiProcessingModal');
+    const generationProgress = document.getElementById('generationProgress');
 
     function showModal(modal) {
         modal.style.display = 'flex';
@@ -14,6 +15,155 @@ document.addEventListener('DOMContentLoaded', function () {
         modal.style.display = 'none';
     }
 
+    const stageLabels = {
+        '': '대기중...',
+        queued: '대기중...',
+        refined: '이미지 생성중...',
+        generated: '이미지 저장중...',
+        original_uploaded: '저장중...',
+        thumbnail_uploaded: '저장중...',
+        uploaded: '완료'
+    };
+
+    function showStage(stage) {
+        const label = stageLabels[stage] || '생성중...';
+        generateBtn.innerHTML = `<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> ${label}`;
+    }
+
+    // 입력이 잠시 멈추면 프롬프트를 미리 정제해 두어 생성 버튼을 누른 뒤의 대기 시간을 줄인다.
+    const SPECULATE_DELAY_MS = 1200;
+    const SPECULATE_MIN_LENGTH = 10;
+    let speculateTimer = null;
+    let speculateController = null;
+    let speculatedPrompt = '';
+
+    function postForm(url, body, signal) {
+        return fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-CSRFToken': document.querySelector('[name="csrfmiddlewaretoken"]').value
+            },
+            body,
+            signal
+        });
+    }
+
+    function cancelSpeculation() {
+        clearTimeout(speculateTimer);
+        if (speculateController) {
+            speculateController.abort();
+            speculateController = null;
+        }
+        if (speculatedPrompt) {
+            speculatedPrompt = '';
+            postForm('/app/ai/prompt/speculate/cancel/', '').catch(() => {});
+        }
+    }
+
+    function scheduleSpeculation() {
+        clearTimeout(speculateTimer);
+        const prompt = searchInput.value.trim();
+        if (prompt.length < SPECULATE_MIN_LENGTH) {
+            cancelSpeculation();
+            return;
+        }
+        speculateTimer = setTimeout(async () => {
+            if (prompt === speculatedPrompt || prompt !== searchInput.value.trim()) {
+                return;
+            }
+            if (speculateController) {
+                speculateController.abort();
+            }
+            speculateController = new AbortController();
+            speculatedPrompt = prompt;
+            try {
+                await postForm(
+                    '/app/ai/prompt/speculate/',
+                    `prompt=${encodeURIComponent(prompt)}`,
+                    speculateController.signal
+                );
+            } catch (error) {
+                // 미리 정제는 실패해도 생성에는 영향이 없다.
+            }
+        }, SPECULATE_DELAY_MS);
+    }
+
+    const STREAM_ERROR_MARKER = '\0';
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    async function waitForJob(statusUrl) {
+        while (true) {
+            const response = await fetch(statusUrl);
+            if (!response.ok) {
+                throw new Error('이미지 생성에 실패했습니다.');
+            }
+
+            const job = await response.json();
+            if (job.status === 'done') {
+                return job;
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || '이미지 생성에 실패했습니다.');
+            }
+
+            showStage(job.stage);
+            await sleep(1000);
+        }
+    }
+
+    async function readJobStream(response) {
+        // text/event-stream 응답을 읽으면서 단계별 진행 상황을 표시
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let jobId = null;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const message = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                message.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                if (!data) continue;
+
+                const payload = JSON.parse(data);
+                if (event === 'queued') {
+                    jobId = payload.job_id;
+                } else if (event === 'done') {
+                    return payload;
+                } else if (event === 'failed') {
+                    throw new Error(payload.error || '이미지 생성에 실패했습니다.');
+                } else if (event === 'refined' && generationProgress) {
+                    generationProgress.textContent = payload.generated_prompt;
+                    generationProgress.style.display = 'block';
+                }
+                showStage(event);
+            }
+        }
+
+        // 스트림이 중간에 끊긴 경우 작업 상태 조회로 전환
+        if (!jobId) {
+            throw new Error('이미지 생성에 실패했습니다.');
+        }
+        return waitForJob(`/app/ai/generate/jobs/${jobId}/`);
+    }
+
     async function generateImage() {
         const prompt = searchInput.value.trim();
 
@@ -22,26 +172,26 @@ document.addEventListener('DOMContentLoaded', function () {
             return;
         }
 
+        clearTimeout(speculateTimer);
         generateBtn.disabled = true;
         const originalText = generateBtn.innerHTML;
         generateBtn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> 생성중...';
 
         try {
-            const csrfToken = document.querySelector('input[name="csrfmiddlewaretoken"]').value;
-            const response = await fetch('/app/ai/generate/', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                    'X-CSRFToken': csrfToken
-                },
-                body: `prompt=${encodeURIComponent(prompt)}`
-            });
+            // SSE는 ASGI에서만 켠다. WSGI에서는 작업을 등록하고 상태를 폴링해 워커를 붙잡지 않는다.
+            const useStream = generateBtn.dataset.stream === 'true';
+            const response = await postForm(
+                useStream ? '/app/ai/generate/stream/' : '/app/ai/generate/jobs/',
+                `prompt=${encodeURIComponent(prompt)}`
+            );
 
             if (!response.ok) {
                 throw new Error('이미지 생성에 실패했습니다.');
             }
 
-            const data = await response.json();
+            const data = useStream
+                ? await readJobStream(response)
+                : await waitForJob((await response.json()).status_url);
 
             window.location.href = `/app/create/?${new URLSearchParams({
                 image_url: data.image_url,
@@ -80,7 +230,7 @@ document.addEventListener('DOMContentLoaded', function () {
             if (useAI) {
                 showModal(aiModal);
                 try {
-                    const response = await fetch('/app/ai/gpt4o/', {
+                    const response = await fetch('/app/ai/gpt4o/stream/', {
                         method: 'POST',
                         headers: {
                             'Content-Type': 'application/x-www-form-urlencoded',
@@ -90,8 +240,26 @@ document.addEventListener('DOMContentLoaded', function () {
                     });
 
                     if (!response.ok) throw new Error('AI 처리 실패');
-                    const data = await response.json();
-                    searchInput.value = data.result || transcript;
+
+                    // 첫 토큰이 도착하면 모달을 닫고 입력창에 바로 이어 붙임
+                    const reader = response.body.getReader();
+                    const decoder = new TextDecoder();
+                    let result = '';
+                    while (true) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+                        result += decoder.decode(value, { stream: true });
+                        // 서버가 도중에 실패하면 STREAM_ERROR_MARKER(\0) 뒤에 오류 메시지를 보낸다.
+                        const errorAt = result.indexOf(STREAM_ERROR_MARKER);
+                        if (errorAt !== -1) {
+                            throw new Error(result.slice(errorAt + 1));
+                        }
+                        if (result) {
+                            hideModal(aiModal);
+                            searchInput.value = result;
+                        }
+                    }
+                    searchInput.value = result.trim() || transcript;
                 } catch (error) {
                     console.error('AI 처리 오류:', error);
                     searchInput.value = transcript;
@@ -101,6 +269,7 @@ document.addEventListener('DOMContentLoaded', function () {
             } else {
                 searchInput.value = transcript;
             }
+            scheduleSpeculation();
         };
 
         recognition.onerror = function(event) {
@@ -118,6 +287,8 @@ document.addEventListener('DOMContentLoaded', function () {
     voiceInputBtn.addEventListener('click', () => handleVoiceInput(false));
     aiVoiceInputBtn.addEventListener('click', () => handleVoiceInput(true));
 
+    searchInput.addEventListener('input', scheduleSpeculation);
+
     searchInput.addEventListener('keypress', function (e) {
         if (e.key === 'Enter') {
             e.preventDefault();
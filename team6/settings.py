@@ -81,6 +81,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "util.middleware.db_metrics_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -197,9 +198,13 @@ STORAGE_ACCOUNT_NAME = env("STORAGE_ACCOUNT_NAME")
 STORAGE_ACCOUNT_KEY = env("STORAGE_ACCOUNT_KEY")
 CONTAINER_NAME = env("CONTAINER_NAME")
 
-AZURE_CONNECTION_STRING = (
-    f"DefaultEndpointsProtocol=https;AccountName={STORAGE_ACCOUNT_NAME};"
-    f"AccountKey={STORAGE_ACCOUNT_KEY};EndpointSuffix=core.windows.net"
+# 로컬 stand-in(manage.py azure_standin) 등 다른 엔드포인트를 쓰려면 환경 변수로 지정
+AZURE_CONNECTION_STRING = env(
+    "AZURE_CONNECTION_STRING",
+    default=(
+        f"DefaultEndpointsProtocol=https;AccountName={STORAGE_ACCOUNT_NAME};"
+        f"AccountKey={STORAGE_ACCOUNT_KEY};EndpointSuffix=core.windows.net"
+    ),
 )
 
 DEFAULT_FILE_STORAGE = "storages.backends.azure_storage.AzureStorage"
@@ -208,6 +213,59 @@ AZURE_ACCOUNT_KEY = env("STORAGE_ACCOUNT_KEY")
 AZURE_CONTAINER = env("CONTAINER_NAME")
 AZURE_URL_EXPIRATION_SECS = 3600  # URL expiration time in seconds
 
+# Blob 업로드 설정: max_single_put_size보다 큰 파일은 max_block_size 단위 블록으로
+# 나뉘어 max_concurrency 개씩 병렬 업로드된다.
+BLOB_UPLOAD_WORKERS = env.int("BLOB_UPLOAD_WORKERS", default=8)
+BLOB_UPLOAD_MAX_CONCURRENCY = env.int("BLOB_UPLOAD_MAX_CONCURRENCY", default=4)
+BLOB_MAX_SINGLE_PUT_SIZE = env.int("BLOB_MAX_SINGLE_PUT_SIZE", default=2 * 1024 * 1024)
+BLOB_MAX_BLOCK_SIZE = env.int("BLOB_MAX_BLOCK_SIZE", default=1024 * 1024)
+
+# 갤러리용 이미지 렌디션 (app.renditions): 'resized' 컨테이너에 너비별로 저장하고 srcset으로 제공
+IMAGE_RENDITION_WIDTHS = env.list(
+    "IMAGE_RENDITION_WIDTHS", cast=int, default=[256, 512, 1024]
+)
+# avif는 Pillow가 AVIF 인코더를 지원할 때만 만든다 (Pillow 11.2+ 또는 pillow-avif-plugin).
+IMAGE_RENDITION_FORMATS = env.list("IMAGE_RENDITION_FORMATS", default=["avif", "webp"])
+IMAGE_RENDITION_QUALITY = env.json(
+    "IMAGE_RENDITION_QUALITY", default={"webp": 80, "avif": 60}
+)
+# 렌디션은 내용 해시로 이름 붙이므로 브라우저가 오래 캐시해도 된다.
+IMAGE_RENDITION_CACHE_CONTROL = env(
+    "IMAGE_RENDITION_CACHE_CONTROL", default="public, max-age=31536000, immutable"
+)
+
+# 외부 서비스 HTTP keep-alive 연결 풀 크기 (util.common.clients)
+HTTP_POOL_CONNECTIONS = env.int("HTTP_POOL_CONNECTIONS", default=10)
+HTTP_POOL_MAXSIZE = env.int("HTTP_POOL_MAXSIZE", default=20)
+# 비동기(ASGI) 뷰는 스레드를 점유하지 않으므로 동시 연결 수를 더 크게 둔다.
+ASYNC_HTTP_POOL_MAXSIZE = env.int("ASYNC_HTTP_POOL_MAXSIZE", default=200)
+
+# 외부 서비스 호출 시간 제한 (초, util.common.clients)
+HTTP_CONNECT_TIMEOUT = env.float("HTTP_CONNECT_TIMEOUT", default=5.0)
+HTTP_READ_TIMEOUT = env.float("HTTP_READ_TIMEOUT", default=30.0)
+OPENAI_TIMEOUT = env.float("OPENAI_TIMEOUT", default=60.0)
+DALLE_TIMEOUT = env.float("DALLE_TIMEOUT", default=120.0)
+VISION_TIMEOUT = env.float("VISION_TIMEOUT", default=20.0)
+# 일시적인 오류(연결 실패, 시간 초과, 5xx) 재시도 횟수와 백오프 (util.common.resilience)
+RESILIENCE_MAX_RETRIES = env.int("RESILIENCE_MAX_RETRIES", default=2)
+RESILIENCE_BACKOFF_BASE = env.float("RESILIENCE_BACKOFF_BASE", default=0.5)
+RESILIENCE_BACKOFF_MAX = env.float("RESILIENCE_BACKOFF_MAX", default=5.0)
+# 재시도를 포함한 단계별 전체 시간 제한 (초, resilience.deadline_scope). 생성 작업은 프롬프트 정제,
+# DALL-E, 이미지 다운로드, Blob 업로드를 차례로 거치므로
+# OPENAI_DEADLINE + DALLE_DEADLINE + 2 * BLOB_DEADLINE이 GENERATION_JOB_TIMEOUT보다 작아야 한다.
+# 프롬프트 정제 단계의 OPENAI_DEADLINE에는 미리 정제한 결과를 기다리는 시간(SPECULATION_JOIN_TIMEOUT)도
+# 포함된다.
+OPENAI_DEADLINE = env.float("OPENAI_DEADLINE", default=60.0)
+DALLE_DEADLINE = env.float("DALLE_DEADLINE", default=140.0)
+BLOB_DEADLINE = env.float("BLOB_DEADLINE", default=30.0)
+# 연속 실패가 CIRCUIT_FAILURE_THRESHOLD번이면 CIRCUIT_RESET_TIMEOUT초 동안 호출을 막는다.
+CIRCUIT_FAILURE_THRESHOLD = env.int("CIRCUIT_FAILURE_THRESHOLD", default=5)
+CIRCUIT_RESET_TIMEOUT = env.int("CIRCUIT_RESET_TIMEOUT", default=30)
+
+# /metrics 접근 토큰 (Authorization: Bearer <토큰>). 비어 있으면 관리자만 볼 수 있다.
+# 워커 프로세스가 여러 개면 PROMETHEUS_MULTIPROC_DIR 환경 변수도 설정한다. (util.common.metrics)
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
 MEDIA_URL = f"https://{AZURE_ACCOUNT_NAME}.blob.core.windows.net/{AZURE_CONTAINER}/"
 
 # Redirect to home URL after login (Default redirects to /accounts/profile/)
@@ -232,6 +290,25 @@ LOGOUT_REDIRECT_URL = "/"
 #     },
 # }
 
+# 애플리케이션 로그: 콘솔과 ai_generation.log (파일은 첫 기록 시점에 연다)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {"format": "%(asctime)s [%(levelname)s] %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "default"},
+        "file": {
+            "class": "logging.FileHandler",
+            "filename": "ai_generation.log",
+            "formatter": "default",
+            "delay": True,
+        },
+    },
+    "root": {"handlers": ["console", "file"], "level": "INFO"},
+}
+
 # Azure OpenAI (GPT-4) 설정
 AZURE_OPENAI_ENDPOINT = env("AZURE_OPENAI_ENDPOINT")
 AZURE_OPENAI_API_KEY = env("AZURE_OPENAI_API_KEY")
@@ -241,10 +318,14 @@ AZURE_OPENAI_API_VERSION = env("AZURE_OPENAI_API_VERSION")
 AZURE_DALLE_ENDPOINT = env("AZURE_DALLE_ENDPOINT")
 AZURE_DALLE_API_KEY = env("AZURE_DALLE_API_KEY")
 AZURE_DALLE_API_VERSION = env("AZURE_DALLE_API_VERSION")
+# "b64_json": 이미지를 응답 본문으로 바로 받음, "url": 생성된 URL에서 한 번 다운로드
+DALLE_RESPONSE_FORMAT = env("DALLE_RESPONSE_FORMAT", default="b64_json")
 
 # Azure Speech Service 설정
 AZURE_SPEECH_API_KEY = env("AZURE_SPEECH_API_KEY")
 AZURE_SPEECH_SERVICE_REGION = env("AZURE_SPEECH_SERVICE_REGION")
+# 비워 두면 https://<region>.tts.speech.microsoft.com/cognitiveservices/v1
+AZURE_SPEECH_TTS_ENDPOINT = env("AZURE_SPEECH_TTS_ENDPOINT", default="")
 
 # Azure Computer Vision 설정
 AZURE_COMPUTER_VISION_API_KEY = env("AZURE_COMPUTER_VISION_API_KEY")
@@ -255,6 +336,117 @@ AZURE_3OMINI_API_KEY = env("AZURE_3OMINI_API_KEY")
 AZURE_3OMINI_ENDPOINT = env("AZURE_3OMINI_ENDPOINT")
 AZURE_3OMINI_API_VERSION = env("AZURE_3OMINI_API_VERSION")
 
+# 이미지 생성 작업(job) 설정
+GENERATION_JOB_WORKERS = env.int("GENERATION_JOB_WORKERS", default=4)
+GENERATION_JOB_QUEUE_SIZE = env.int("GENERATION_JOB_QUEUE_SIZE", default=16)
+GENERATION_JOB_TIMEOUT = env.int("GENERATION_JOB_TIMEOUT", default=300)
+# 홈 화면에서 진행 상황을 SSE(/ai/generate/stream/)로 받을지 여부. SSE 응답은 생성이 끝날 때까지
+# 연결을 붙잡으므로 WSGI에서는 워커를 하나씩 점유한다. ASGI로 실행할 때만 켜고, 끄면 작업 상태를 폴링한다.
+GENERATION_PROGRESS_SSE = env.bool("GENERATION_PROGRESS_SSE", default=False)
+
+# 프롬프트 하나로 여러 장을 생성하는 변형 이미지 설정
+VARIATION_MAX_COUNT = env.int("VARIATION_MAX_COUNT", default=4)
+# 프로세스 전체에서 동시에 진행하는 DALL-E 호출 수
+VARIATION_WORKERS = env.int("VARIATION_WORKERS", default=8)
+
+# 게시물 캡션/태그 백그라운드 분석 설정. 이미지 생성 작업과 따로 두는 전용 스레드 풀을 사용
+ENRICHMENT_WORKERS = env.int("ENRICHMENT_WORKERS", default=2)
+ENRICHMENT_QUEUE_SIZE = env.int("ENRICHMENT_QUEUE_SIZE", default=64)
+# 이 시간(초)이 지나도 분석 중인 게시물은 작업이 유실된 것으로 보고 다시 등록
+ENRICHMENT_RETRY_AFTER = env.int("ENRICHMENT_RETRY_AFTER", default=120)
+# Vision 장애나 서킷 브레이커가 열려 실패하면 ENRICHMENT_RETRY_DELAY초부터 두 배씩 늘려 다시 분석하고,
+# ENRICHMENT_MAX_ATTEMPTS번 모두 실패하면 실패로 표시한다.
+ENRICHMENT_MAX_ATTEMPTS = env.int("ENRICHMENT_MAX_ATTEMPTS", default=5)
+ENRICHMENT_RETRY_DELAY = env.float("ENRICHMENT_RETRY_DELAY", default=30.0)
+
+# 정제 프롬프트 캐시 설정 (TTL: 초)
+PROMPT_CACHE_TTL = env.int("PROMPT_CACHE_TTL", default=60 * 60 * 24 * 7)
+PROMPT_CACHE_MAX_ENTRIES = env.int("PROMPT_CACHE_MAX_ENTRIES", default=512)
+
+# 유사 입력 재사용을 위한 MinHash/LSH 인덱스 설정
+PROMPT_INDEX_PATH = env("PROMPT_INDEX_PATH", default=str(BASE_DIR / "prompt_index.npz"))
+# LSH 후보로 볼 추정 Jaccard 유사도(문자 n-gram)
+PROMPT_SIMILARITY_THRESHOLD = env.float("PROMPT_SIMILARITY_THRESHOLD", default=0.9)
+# 후보를 실제로 재사용할 정규화한 토큰 집합의 Jaccard 유사도. 기본값 1.0은 조사, 구두점,
+# 대소문자, 어순만 다른 입력만 재사용한다는 뜻이다. 낮추면 단어가 다른 입력의 프롬프트도 재사용한다.
+PROMPT_REUSE_TOKEN_SIMILARITY = env.float("PROMPT_REUSE_TOKEN_SIMILARITY", default=1.0)
+
+# 동일 요청 중복 실행 방지(single-flight) 설정 (초)
+SINGLEFLIGHT_RESULT_TTL = env.int("SINGLEFLIGHT_RESULT_TTL", default=10)
+SINGLEFLIGHT_WAIT_TIMEOUT = env.int("SINGLEFLIGHT_WAIT_TIMEOUT", default=120)
+
+# Azure OpenAI 배포별 호출 한도 (rpm: 분당 요청 수, tpm: 분당 토큰 수)
+# completion_tokens: max_tokens를 지정하지 않은 요청의 예상 응답 토큰 수
+# 기본값은 제한 없음. 실제 배포의 할당량(Azure Portal > 배포 > 속도 제한)을 확인해 배포별로 넣는다.
+# 예: {"gpt-4o": {"rpm": 60, "tpm": 60000}, "dall-e-3": {"rpm": 6}}
+AZURE_OPENAI_RATE_LIMITS = env.json("AZURE_OPENAI_RATE_LIMITS", default={})
+# 모델 이름별 Azure OpenAI 엔드포인트 풀. 엔드포인트를 추가하면 호출이 분산된다.
+# 항목: endpoint, api_key(또는 api_key_env: 키를 담은 환경 변수 이름),
+#       api_version(생략 시 클라이언트 설정), deployment(생략 시 모델 이름),
+#       name(호출 한도 버킷 이름, 생략 시 "모델@호스트")
+# AZURE_OPENAI_RATE_LIMITS에 name으로 한도를 따로 주지 않으면 모델 이름의 한도를 사용한다.
+AZURE_OPENAI_DEPLOYMENTS = env.json(
+    "AZURE_OPENAI_DEPLOYMENTS",
+    default={
+        model: [{"endpoint": endpoint, "api_key": api_key, "api_version": version}]
+        for model, endpoint, api_key, version in [
+            (
+                "gpt-4o",
+                AZURE_OPENAI_ENDPOINT,
+                AZURE_OPENAI_API_KEY,
+                AZURE_OPENAI_API_VERSION,
+            ),
+            (
+                "gpt-4o-mini",
+                AZURE_OPENAI_ENDPOINT,
+                AZURE_OPENAI_API_KEY,
+                AZURE_OPENAI_API_VERSION,
+            ),
+            (
+                "team6-o3-mini",
+                AZURE_3OMINI_ENDPOINT,
+                AZURE_3OMINI_API_KEY,
+                AZURE_3OMINI_API_VERSION,
+            ),
+            (
+                "dall-e-3",
+                AZURE_DALLE_ENDPOINT,
+                AZURE_DALLE_API_KEY,
+                AZURE_DALLE_API_VERSION,
+            ),
+        ]
+    },
+)
+# 429/5xx를 돌려준 엔드포인트를 풀에서 제외하는 시간 (초, 연속 실패 시 두 배씩 증가)
+MODEL_POOL_EJECT_SECONDS = env.int("MODEL_POOL_EJECT_SECONDS", default=10)
+# 레인별 한도 대기 최대 시간 (초)
+RATE_LIMIT_INTERACTIVE_MAX_WAIT = env.int("RATE_LIMIT_INTERACTIVE_MAX_WAIT", default=10)
+RATE_LIMIT_BACKGROUND_MAX_WAIT = env.int("RATE_LIMIT_BACKGROUND_MAX_WAIT", default=60)
+# background 레인이 사용하지 않고 남겨 두는 한도 비율 (%)
+RATE_LIMIT_INTERACTIVE_RESERVE = env.int("RATE_LIMIT_INTERACTIVE_RESERVE", default=20)
+
+# 입력 중 프롬프트 미리 정제(speculative refinement) 설정
+SPECULATION_MIN_LENGTH = env.int("SPECULATION_MIN_LENGTH", default=10)
+# 미리 정제한 결과를 보관하는 시간 (초)
+SPECULATION_TTL = env.int("SPECULATION_TTL", default=120)
+# 사용자별 분당 최대 요청 수와 동시 실행 수
+SPECULATION_MAX_PER_MINUTE = env.int("SPECULATION_MAX_PER_MINUTE", default=6)
+SPECULATION_MAX_IN_FLIGHT = env.int("SPECULATION_MAX_IN_FLIGHT", default=2)
+# 이미지 생성 시 진행 중인 미리 정제를 기다리는 최대 시간 (초). OPENAI_DEADLINE의 남은 시간을 넘지 않는다.
+SPECULATION_JOIN_TIMEOUT = env.int("SPECULATION_JOIN_TIMEOUT", default=30)
+SPECULATION_WORKERS = env.int("SPECULATION_WORKERS", default=4)
+
+# 프롬프트 정제 hedged request 설정
+# 기본 호출이 최근 HEDGE_PERCENTILE 백분위수 응답 시간 안에 끝나지 않으면 PROMPT_HEDGE_MODEL에도 요청
+PROMPT_HEDGING = env.bool("PROMPT_HEDGING", default=False)
+PROMPT_HEDGE_MODEL = env("PROMPT_HEDGE_MODEL", default="gpt-4o-mini")
+HEDGE_PERCENTILE = env.int("HEDGE_PERCENTILE", default=90)
+# 응답 시간 표본이 충분히 쌓이기 전 예비 호출까지 기다릴 시간 (초)
+HEDGE_DEFAULT_DELAY = env.float("HEDGE_DEFAULT_DELAY", default=8.0)
+# 최근 호출 중 예비 호출을 보낼 수 있는 최대 비율 (%)
+HEDGE_BUDGET_PERCENT = env.int("HEDGE_BUDGET_PERCENT", default=10)
+HEDGE_WORKERS = env.int("HEDGE_WORKERS", default=8)
+
 # Email settings
 EMAIL_HOST = env("EMAIL_HOST")
 EMAIL_PORT = env.int("EMAIL_PORT")
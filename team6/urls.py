@@ -19,12 +19,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from util.views import prometheus_metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("app.urls")),
     path("app/", include("app.urls")),
     path("accounts/", include("accounts.urls")),
-    path("ai/", include("ai_playground.urls"))
+    path("ai/", include("ai_playground.urls")),
+    path("internal/", include("util.urls")),
+    path("metrics", prometheus_metrics, name="metrics"),
 ]
 
 if settings.DEBUG:
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UtilConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "util"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from util.common import metrics
+
+        connection_created.connect(metrics.install_query_recorder)
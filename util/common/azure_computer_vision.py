@@ -1,36 +1,74 @@
-import os
-from azure.cognitiveservices.vision.computervision import ComputerVisionClient
-from msrest.authentication import CognitiveServicesCredentials
-
-# ...existing code...
+import hashlib
+import logging
+from io import BytesIO
 
+from util.common import metrics, resilience
+from util.common.clients import get_computer_vision_client
+from util.models import ImageAnalysis
 
-def get_image_caption_and_tags(image_url):
-    AZURE_COMPUTER_VISION_API_KEY = os.getenv("AZURE_COMPUTER_VISION_API_KEY")
-    AZURE_COMPUTER_VISION_ENDPOINT = os.getenv("AZURE_COMPUTER_VISION_ENDPOINT")
 
-    computervision_client = ComputerVisionClient(
-        AZURE_COMPUTER_VISION_ENDPOINT,
-        CognitiveServicesCredentials(AZURE_COMPUTER_VISION_API_KEY),
+def _analyze_features():
+    from azure.cognitiveservices.vision.computervision.models import (
+        VisualFeatureTypes,
     )
 
-    # Analyze the image using the Dense Caption feature
-    analysis = computervision_client.describe_image(image_url)
+    return [VisualFeatureTypes.description, VisualFeatureTypes.tags]
+
 
-    # Extract the caption information
+def _parse_analysis(analysis):
     captions = []
-    if analysis.captions:
-        for caption in analysis.captions:
-            print("Caption: ", caption.text)
-            captions.append(caption.text)
-    else:
+    if analysis.description and analysis.description.captions:
+        captions = [caption.text for caption in analysis.description.captions]
+    if not captions:
         captions.append("No caption detected.")
+    tags = [tag.name for tag in analysis.tags or []]
+    return captions, tags
+
+
+def get_cached_analysis(content_hash):
+    """이미 분석한 이미지면 (captions, tags)를, 아니면 None을 반환"""
+    row = ImageAnalysis.objects.filter(content_hash=content_hash).first()
+    if row is None:
+        return None
+    return row.captions, row.tags
 
-    # Extract the tag information
-    tags_result = computervision_client.tag_image(image_url)
-    tags = [tag.name for tag in tags_result.tags]
-    print("Tags: ", tags)
 
+def analyze_image_bytes(image_data):
+    """이미지 bytes를 한 번의 analyze 호출로 캡션과 태그를 분석. 같은 이미지는 캐시된 결과를 사용"""
+    content_hash = hashlib.sha256(image_data).hexdigest()
+    cached = get_cached_analysis(content_hash)
+    if cached is not None:
+        logging.info(f"캐시된 이미지 분석 결과를 사용합니다: {content_hash}")
+        return cached
+
+    # 재시도할 때마다 새 스트림을 넘긴다.
+    with metrics.timed("vision"):
+        analysis = resilience.call(
+            "vision",
+            lambda: get_computer_vision_client().analyze_image_in_stream(
+                BytesIO(image_data), visual_features=_analyze_features()
+            ),
+        )
+    captions, tags = _parse_analysis(analysis)
+    logging.info(f"Captions: {captions}, Tags: {tags}")
+
+    ImageAnalysis.objects.get_or_create(
+        content_hash=content_hash, defaults={"captions": captions, "tags": tags}
+    )
+    return captions, tags
+
+
+def get_image_caption_and_tags(image_url):
+    """URL의 이미지를 한 번의 analyze 호출로 분석 (bytes가 없을 때 사용)"""
+    with metrics.timed("vision"):
+        analysis = resilience.call(
+            "vision",
+            get_computer_vision_client().analyze_image,
+            image_url,
+            visual_features=_analyze_features(),
+        )
+    captions, tags = _parse_analysis(analysis)
+    logging.info(f"Captions: {captions}, Tags: {tags}")
     return captions, tags
 
 
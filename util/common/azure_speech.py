@@ -2,6 +2,8 @@ import json
 import os
 import azure.cognitiveservices.speech as speechsdk
 
+from util.common import metrics
+
 # Azure Speech Service 설정
 AZURE_SPEECH_API_KEY = os.getenv("AZURE_SPEECH_API_KEY")
 AZURE_SPEECH_SERVICE_REGION = os.getenv("AZURE_SPEECH_SERVICE_REGION")
@@ -119,44 +121,75 @@ def read_story_and_synthesize(file_path):
 # read_story_and_synthesize(story_file_path)
 
 
-def synthesize_text_to_speech(text: str) -> bytes:
+def select_voice(text: str) -> str:
+    # Detect language based on text content
+    if any(char in text for char in "가나다라마바사아자차카타파하"):
+        return "ko-KR-SunHiNeural"
+    return "en-US-JennyNeural"
+
+
+def tts_request(text: str):
+    """Speech REST API 합성 요청의 (URL, SSML 본문, 헤더)"""
+    from xml.sax.saxutils import escape
+
     from django.conf import settings
-    import tempfile
-    import os
 
-    subscription_key = getattr(
-        settings, "AZURE_SPEECH_API_KEY", os.getenv("AZURE_SPEECH_API_KEY")
+    from util.common.clients import get_speech_credentials
+
+    subscription_key, region = get_speech_credentials()
+    voice = select_voice(text)
+    ssml = (
+        f"<speak version='1.0' xml:lang='{voice[:5]}'>"
+        f"<voice name='{voice}'>{escape(text)}</voice></speak>"
     )
-    region = getattr(
-        settings,
-        "AZURE_SPEECH_SERVICE_REGION",
-        os.getenv("AZURE_SPEECH_SERVICE_REGION"),
+    return (
+        settings.AZURE_SPEECH_TTS_ENDPOINT
+        or f"https://{region}.tts.speech.microsoft.com/cognitiveservices/v1",
+        ssml.encode("utf-8"),
+        {
+            "Ocp-Apim-Subscription-Key": subscription_key,
+            "Content-Type": "application/ssml+xml",
+            "X-Microsoft-OutputFormat": "riff-16khz-16bit-mono-pcm",
+            "User-Agent": "team6",
+        },
     )
-    if not subscription_key or not region:
-        raise Exception(
-            "AZURE_SPEECH_KEY와 AZURE_SPEECH_REGION 환경 변수를 설정하세요."
+
+
+@metrics.timed_function("tts")
+def synthesize_text_to_speech(text: str) -> bytes:
+    """Speech REST API로 WAV를 합성
+
+    Speech SDK의 합성 호출에는 시간 제한을 둘 수 없어 SDK와 같은 음성/형식을 REST API로
+    요청한다. 일시적인 오류는 재시도하고, 장애가 이어지면 서킷 브레이커가 호출을 막는다.
+    """
+    from util.common import resilience
+    from util.common.clients import get_http_session, http_timeout
+
+    url, ssml, headers = tts_request(text)
+
+    def post():
+        response = get_http_session().post(
+            url, data=ssml, headers=headers, timeout=http_timeout()
         )
-    speech_config = speechsdk.SpeechConfig(subscription=subscription_key, region=region)
+        response.raise_for_status()
+        return response.content
 
-    # Detect language based on text content
-    if any(char in text for char in "가나다라마바사아자차카타파하"):
-        speech_config.speech_synthesis_voice_name = "ko-KR-SunHiNeural"
-    else:
-        speech_config.speech_synthesis_voice_name = "en-US-JennyNeural"
+    return resilience.call("speech", post)
 
-    # Use a temporary file to capture synthesized audio
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-        tmp_filename = tmp_file.name
-    audio_config = speechsdk.audio.AudioOutputConfig(filename=tmp_filename)
-    synthesizer = speechsdk.SpeechSynthesizer(
-        speech_config=speech_config, audio_config=audio_config
-    )
-    result = synthesizer.speak_text_async(text).get()
-    if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-        with open(tmp_filename, "rb") as f:
-            audio_data = f.read()
-        os.remove(tmp_filename)
-        return audio_data
-    else:
-        os.remove(tmp_filename)
-        raise Exception(f"음성 합성 실패: {result.error_details}")
+
+@metrics.timed_function("tts")
+async def synthesize_text_to_speech_async(text: str) -> bytes:
+    """synthesize_text_to_speech의 비동기 버전 (비동기 뷰용)"""
+    from util.common import resilience
+    from util.common.clients import get_async_http_client
+
+    url, ssml, headers = tts_request(text)
+
+    async def post():
+        response = await get_async_http_client().post(
+            url, content=ssml, headers=headers
+        )
+        response.raise_for_status()
+        return response.content
+
+    return await resilience.call_async("speech", post)
@@ -0,0 +1,36 @@
+"""resilience.deadline_scope를 따르는 Azure Blob Storage 트랜스포트
+
+요청마다 연결/응답 시간 제한을 남은 deadline에 맞춰 줄인다. Blob SDK 자체 재시도는 끄고
+resilience.call이 deadline 안에서만 재시도한다(util.common.clients).
+"""
+
+from azure.core.pipeline.transport import AioHttpTransport, RequestsTransport
+
+from util.common import resilience
+
+
+def clamp_timeouts(connection_config, kwargs):
+    """send에 넘길 connection_timeout/read_timeout을 남은 deadline에 맞춰 줄인 kwargs"""
+    if resilience.remaining() is None:
+        return kwargs
+    return {
+        **kwargs,
+        "connection_timeout": resilience.clamp_timeout(
+            kwargs.get("connection_timeout", connection_config.timeout)
+        ),
+        "read_timeout": resilience.clamp_timeout(
+            kwargs.get("read_timeout", connection_config.read_timeout)
+        ),
+    }
+
+
+class DeadlineRequestsTransport(RequestsTransport):
+    def send(self, request, **kwargs):
+        return super().send(request, **clamp_timeouts(self.connection_config, kwargs))
+
+
+class DeadlineAioHttpTransport(AioHttpTransport):
+    async def send(self, request, **kwargs):
+        return await super().send(
+            request, **clamp_timeouts(self.connection_config, kwargs)
+        )
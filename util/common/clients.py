@@ -0,0 +1,342 @@
+"""프로세스 단위로 한 번만 만들어 재사용하는 외부 서비스 클라이언트 레지스트리
+
+모든 클라이언트는 스레드 간에 공유되며, HTTP 연결은 keep-alive 풀에서 재사용된다.
+- requests 기반(일반 다운로드, Blob Storage): 하나의 requests.Session과 HTTPAdapter 풀
+- OpenAI(httpx 기반): 클라이언트별 httpx 연결 풀
+- Computer Vision(msrest): keep_alive 세션을 스레드별로 유지
+
+모든 클라이언트에는 연결/응답 시간 제한을 설정한다. 재시도와 서킷 브레이커는
+util.common.resilience에서 다룬다.
+
+비동기(ASGI) 뷰용 클라이언트는 이벤트 루프에 묶이므로 루프마다 하나씩 만든다.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+from django.conf import settings
+
+# 이름 -> (엔드포인트, API 키, API 버전) 설정 이름
+OPENAI_CLIENT_SETTINGS = {
+    "gpt": (
+        "AZURE_OPENAI_ENDPOINT",
+        "AZURE_OPENAI_API_KEY",
+        "AZURE_OPENAI_API_VERSION",
+    ),
+    "dalle": (
+        "AZURE_DALLE_ENDPOINT",
+        "AZURE_DALLE_API_KEY",
+        "AZURE_DALLE_API_VERSION",
+    ),
+    "o3": (
+        "AZURE_3OMINI_ENDPOINT",
+        "AZURE_3OMINI_API_KEY",
+        "AZURE_3OMINI_API_VERSION",
+    ),
+}
+
+_lock = threading.RLock()  # 팩토리 안에서 다른 클라이언트를 만들 수 있도록 재진입 허용
+_clients = {}
+_usage = {}
+_openai_stats = {}
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _get_or_create(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+                _usage[name] = {"created_at": time.time(), "uses": 0}
+    with _lock:
+        _usage[name]["uses"] += 1
+    return client
+
+
+def _create_http_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session():
+    """keep-alive 연결 풀을 공유하는 requests.Session
+
+    requests에는 기본 시간 제한이 없으므로 호출할 때 timeout=http_timeout()을 넘긴다.
+    """
+    return _get_or_create("http_session", _create_http_session)
+
+
+def http_timeout():
+    """requests 호출용 (연결, 응답) 시간 제한"""
+    return (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+
+
+def _create_blob_service_client():
+    from azure.storage.blob import BlobServiceClient
+
+    from util.common.blob_transport import DeadlineRequestsTransport
+
+    # 재시도는 resilience.call이 deadline 안에서 하므로 Blob SDK 자체 재시도는 끈다.
+    return BlobServiceClient.from_connection_string(
+        settings.AZURE_CONNECTION_STRING,
+        max_single_put_size=settings.BLOB_MAX_SINGLE_PUT_SIZE,
+        max_block_size=settings.BLOB_MAX_BLOCK_SIZE,
+        retry_total=0,
+        transport=DeadlineRequestsTransport(
+            session=get_http_session(),
+            session_owner=False,
+            connection_timeout=settings.HTTP_CONNECT_TIMEOUT,
+            read_timeout=settings.HTTP_READ_TIMEOUT,
+        ),
+    )
+
+
+def get_blob_service_client():
+    """공유 HTTP 세션 위에서 동작하는 BlobServiceClient"""
+    return _get_or_create("blob_service", _create_blob_service_client)
+
+
+def _create_computer_vision_client():
+    from azure.cognitiveservices.vision.computervision import ComputerVisionClient
+    from msrest.authentication import CognitiveServicesCredentials
+
+    client = ComputerVisionClient(
+        os.getenv("AZURE_COMPUTER_VISION_ENDPOINT"),
+        CognitiveServicesCredentials(os.getenv("AZURE_COMPUTER_VISION_API_KEY")),
+    )
+    # 요청마다 세션을 닫지 않고 스레드별 세션의 연결을 재사용
+    client.config.keep_alive = True
+    # 재시도는 resilience.call에서 jitter를 두고 하므로 msrest 자체 재시도는 끈다.
+    client.config.connection.timeout = settings.VISION_TIMEOUT
+    client.config.retry_policy.retries = 0
+    return client
+
+
+def get_computer_vision_client():
+    return _get_or_create("computer_vision", _create_computer_vision_client)
+
+
+def get_speech_credentials():
+    """Speech 서비스 (구독 키, 지역)"""
+    subscription_key = getattr(
+        settings, "AZURE_SPEECH_API_KEY", os.getenv("AZURE_SPEECH_API_KEY")
+    )
+    region = getattr(
+        settings,
+        "AZURE_SPEECH_SERVICE_REGION",
+        os.getenv("AZURE_SPEECH_SERVICE_REGION"),
+    )
+    if not subscription_key or not region:
+        raise Exception(
+            "AZURE_SPEECH_KEY와 AZURE_SPEECH_REGION 환경 변수를 설정하세요."
+        )
+    return subscription_key, region
+
+
+def _openai_hooks(name):
+    """요청 수와 새 연결(TCP/TLS) 수를 세는 httpx 이벤트 훅"""
+    counters = _openai_stats.setdefault(
+        name, {"requests": 0, "connections": 0, "tls_handshakes": 0}
+    )
+    events = {
+        "connection.connect_tcp.complete": "connections",
+        "connection.start_tls.complete": "tls_handshakes",
+    }
+
+    def trace(event_name, info):
+        if event_name in events:
+            with _lock:
+                counters[events[event_name]] += 1
+
+    def on_request(request):
+        request.extensions["trace"] = trace
+        with _lock:
+            counters["requests"] += 1
+
+    return {"request": [on_request]}
+
+
+def _openai_timeout(name):
+    import httpx
+
+    timeout = settings.DALLE_TIMEOUT if name == "dalle" else settings.OPENAI_TIMEOUT
+    return httpx.Timeout(timeout, connect=settings.HTTP_CONNECT_TIMEOUT)
+
+
+def get_openai_client(name):
+    """OPENAI_CLIENT_SETTINGS의 이름으로 AzureOpenAI 클라이언트를 반환
+
+    일시적인 오류는 openai SDK가 jitter를 둔 지수 백오프로 RESILIENCE_MAX_RETRIES번 재시도한다.
+    """
+
+    def create():
+        import httpx
+        from openai import AzureOpenAI, DefaultHttpxClient
+
+        from util.common.openai_transport import AzureOpenAITransport
+
+        endpoint, api_key, api_version = OPENAI_CLIENT_SETTINGS[name]
+        return AzureOpenAI(
+            azure_endpoint=getattr(settings, endpoint),
+            api_key=getattr(settings, api_key),
+            api_version=getattr(settings, api_version),
+            timeout=_openai_timeout(name),
+            max_retries=settings.RESILIENCE_MAX_RETRIES,
+            http_client=DefaultHttpxClient(
+                transport=AzureOpenAITransport(
+                    httpx.HTTPTransport(
+                        limits=httpx.Limits(
+                            max_connections=settings.HTTP_POOL_MAXSIZE,
+                            max_keepalive_connections=settings.HTTP_POOL_MAXSIZE,
+                        )
+                    )
+                ),
+                event_hooks=_openai_hooks(name),
+            ),
+        )
+
+    return _get_or_create(f"openai:{name}", create)
+
+
+def _get_or_create_async(name, factory):
+    """현재 이벤트 루프에서 재사용할 비동기 클라이언트"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(name)
+        if client is None:
+            client = factory()
+            clients[name] = client
+            _usage.setdefault(f"async:{name}", {"created_at": 0, "uses": 0})
+            _usage[f"async:{name}"]["created_at"] = time.time()
+        _usage[f"async:{name}"]["uses"] += 1
+    return client
+
+
+def get_async_openai_client(name):
+    """get_openai_client의 비동기(AsyncAzureOpenAI) 버전"""
+
+    def create():
+        import httpx
+        from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+
+        from util.common.openai_transport import AsyncAzureOpenAITransport
+
+        endpoint, api_key, api_version = OPENAI_CLIENT_SETTINGS[name]
+        return AsyncAzureOpenAI(
+            azure_endpoint=getattr(settings, endpoint),
+            api_key=getattr(settings, api_key),
+            api_version=getattr(settings, api_version),
+            timeout=_openai_timeout(name),
+            max_retries=settings.RESILIENCE_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                transport=AsyncAzureOpenAITransport(
+                    httpx.AsyncHTTPTransport(
+                        limits=httpx.Limits(
+                            max_connections=settings.ASYNC_HTTP_POOL_MAXSIZE,
+                            max_keepalive_connections=settings.HTTP_POOL_MAXSIZE,
+                        )
+                    )
+                ),
+            ),
+        )
+
+    return _get_or_create_async(f"openai:{name}", create)
+
+
+def get_async_blob_service_client():
+    """azure.storage.blob.aio 클라이언트 (aiohttp 연결 풀)"""
+
+    def create():
+        import aiohttp
+        from azure.storage.blob.aio import BlobServiceClient
+
+        from util.common.blob_transport import DeadlineAioHttpTransport
+
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=settings.ASYNC_HTTP_POOL_MAXSIZE)
+        )
+        return BlobServiceClient.from_connection_string(
+            settings.AZURE_CONNECTION_STRING,
+            max_single_put_size=settings.BLOB_MAX_SINGLE_PUT_SIZE,
+            max_block_size=settings.BLOB_MAX_BLOCK_SIZE,
+            retry_total=0,
+            transport=DeadlineAioHttpTransport(
+                session=session,
+                session_owner=False,
+                connection_timeout=settings.HTTP_CONNECT_TIMEOUT,
+                read_timeout=settings.HTTP_READ_TIMEOUT,
+            ),
+        )
+
+    return _get_or_create_async("blob_service", create)
+
+
+def get_async_http_client():
+    """일반 비동기 HTTP 요청용 httpx.AsyncClient"""
+
+    def create():
+        import httpx
+
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.ASYNC_HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=settings.HTTP_POOL_MAXSIZE,
+            ),
+            timeout=httpx.Timeout(
+                settings.HTTP_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+            ),
+        )
+
+    return _get_or_create_async("http", create)
+
+
+def _http_pool_stats():
+    """공유 requests 세션의 호스트별 연결 생성 수와 요청 수"""
+    session = _clients.get("http_session")
+    pools = []
+    if session is not None:
+        adapter = session.get_adapter("https://")
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append(
+                {
+                    "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                    "connections": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "reused": pool.num_requests - pool.num_connections,
+                }
+            )
+    return pools
+
+
+def stats():
+    """클라이언트별 생성 시각/사용 횟수와 연결 재사용 통계"""
+    with _lock:
+        clients = {name: dict(usage) for name, usage in _usage.items()}
+        openai_stats = {name: dict(c) for name, c in _openai_stats.items()}
+    for name, counters in openai_stats.items():
+        counters["reused"] = counters["requests"] - counters["connections"]
+    return {
+        "pid": os.getpid(),
+        "clients": clients,
+        "http_pools": _http_pool_stats(),
+        "openai": openai_stats,
+    }
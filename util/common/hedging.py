@@ -0,0 +1,239 @@
+"""느린 호출의 꼬리 지연을 줄이는 hedged request
+
+기본(primary) 호출이 최근 응답 시간의 HEDGE_PERCENTILE 백분위수 안에 끝나지 않으면 예비(backup)
+호출을 하나 더 보내고 먼저 성공한 결과를 사용한다. 늦게 끝난 호출은 버리지 않고 끝까지
+기다려 응답 시간 통계와 절약한 시간을 기록한다. 추가 비용을 제한하기 위해 최근 HEDGE_WINDOW
+호출 중 예비 호출 비율이 HEDGE_BUDGET_PERCENT%를 넘으면 예비 호출을 보내지 않는다.
+"""
+
+import asyncio
+import contextvars
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections
+
+# 백분위수를 계산하기 전에 필요한 최소 표본 수. 그 전에는 HEDGE_DEFAULT_DELAY를 사용
+HEDGE_MIN_SAMPLES = 20
+HEDGE_WINDOW = 200
+
+_lock = threading.Lock()
+_states = {}
+_executor = None
+# 진 쪽 비동기 작업이 끝날 때까지 참조를 유지
+_background_tasks = set()
+
+
+class _State:
+    def __init__(self):
+        self.latencies = deque(maxlen=HEDGE_WINDOW)
+        self.recent_hedges = deque(maxlen=HEDGE_WINDOW)
+        self.calls = 0
+        self.hedged = 0
+        self.budget_skipped = 0
+        self.backup_wins = 0
+        self.saved_seconds = 0.0
+
+
+def _get_state(name):
+    with _lock:
+        return _states.setdefault(name, _State())
+
+
+def hedge_delay(name):
+    """예비 호출을 보내기 전에 기다릴 시간(초)"""
+    state = _get_state(name)
+    with _lock:
+        latencies = list(state.latencies)
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return settings.HEDGE_DEFAULT_DELAY
+    return statistics.quantiles(latencies, n=100)[settings.HEDGE_PERCENTILE - 1]
+
+
+def _start_call(state):
+    with _lock:
+        state.calls += 1
+
+
+def _try_hedge(state):
+    """예산 안이면 예비 호출을 기록하고 True"""
+    with _lock:
+        window = state.recent_hedges
+        allowed = sum(window) < (len(window) + 1) * settings.HEDGE_BUDGET_PERCENT / 100
+        window.append(allowed)
+        if allowed:
+            state.hedged += 1
+        else:
+            state.budget_skipped += 1
+        return allowed
+
+
+def _record_no_hedge(state):
+    with _lock:
+        state.recent_hedges.append(False)
+
+
+def _record_primary(state, latency):
+    with _lock:
+        state.latencies.append(latency)
+
+
+def _record_backup_win(state, backup_finished_at, primary_latency):
+    """예비 호출이 이겼을 때 기본 호출이 끝난 시점과의 차이를 절약한 시간으로 기록"""
+    with _lock:
+        state.backup_wins += 1
+        if primary_latency is not None:
+            state.saved_seconds += max(0.0, primary_latency - backup_finished_at)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.HEDGE_WORKERS, thread_name_prefix="hedge"
+                )
+    return _executor
+
+
+def _submit(fn, started):
+    """호출 스레드의 contextvars(호출 한도 레인 등)를 유지한 채 fn을 실행하고 (결과, 경과 시간) 반환"""
+    context = contextvars.copy_context()
+
+    def call():
+        close_old_connections()
+        try:
+            return context.run(fn), time.monotonic() - started
+        finally:
+            close_old_connections()
+
+    return _get_executor().submit(call)
+
+
+def run(name, primary, backup):
+    """primary()를 실행하되 느리면 backup()도 실행해 먼저 성공한 결과를 반환
+
+    둘 다 실패하면 primary의 예외를 다시 발생시킨다.
+    """
+    state = _get_state(name)
+    _start_call(state)
+    started = time.monotonic()
+    primary_future = _submit(primary, started)
+
+    done, _ = wait([primary_future], timeout=hedge_delay(name))
+    if done or not _try_hedge(state):
+        if done:
+            _record_no_hedge(state)
+        result, latency = primary_future.result()
+        _record_primary(state, latency)
+        return result
+
+    logging.info(f"[{name}] 응답이 늦어 예비 호출을 보냅니다.")
+    backup_future = _submit(backup, started)
+    pending = {primary_future, backup_future}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                continue
+            result, elapsed = future.result()
+            if future is primary_future:
+                _record_primary(state, elapsed)
+                return result
+            primary_future.add_done_callback(
+                lambda f: _on_primary_done(state, f, elapsed)
+            )
+            return result
+    raise primary_future.exception()
+
+
+def _on_primary_done(state, future, backup_finished_at):
+    primary_latency = None
+    if not future.cancelled() and future.exception() is None:
+        primary_latency = future.result()[1]
+        _record_primary(state, primary_latency)
+    _record_backup_win(state, backup_finished_at, primary_latency)
+
+
+async def run_async(name, primary, backup):
+    """run의 비동기 버전. primary, backup은 코루틴을 반환하는 함수"""
+    state = _get_state(name)
+    _start_call(state)
+    started = time.monotonic()
+
+    async def timed(coro_fn):
+        result = await coro_fn()
+        return result, time.monotonic() - started
+
+    primary_task = asyncio.create_task(timed(primary))
+    done, _ = await asyncio.wait({primary_task}, timeout=hedge_delay(name))
+    if done or not _try_hedge(state):
+        if done:
+            _record_no_hedge(state)
+        result, latency = await primary_task
+        _record_primary(state, latency)
+        return result
+
+    logging.info(f"[{name}] 응답이 늦어 예비 호출을 보냅니다.")
+    backup_task = asyncio.create_task(timed(backup))
+    pending = {primary_task, backup_task}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is not None:
+                continue
+            result, elapsed = task.result()
+            if task is primary_task:
+                _record_primary(state, elapsed)
+                _keep_until_done(backup_task)
+                return result
+            _keep_until_done(primary_task)
+            primary_task.add_done_callback(
+                lambda t: _on_primary_done(state, t, elapsed)
+            )
+            return result
+    raise primary_task.exception()
+
+
+def _keep_until_done(task):
+    """진 쪽 작업이 끝날 때까지 참조를 유지하고, 끝나면 예외를 회수"""
+    _background_tasks.add(task)
+
+    def forget(task):
+        _background_tasks.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    task.add_done_callback(forget)
+
+
+def stats():
+    """이름별 예비 호출 비율, 예비 호출 승률, 절약한 시간"""
+    with _lock:
+        names = list(_states.items())
+    result = {}
+    for name, state in names:
+        delay = hedge_delay(name)
+        with _lock:
+            result[name] = {
+                "calls": state.calls,
+                "hedged": state.hedged,
+                "hedge_rate": (
+                    round(state.hedged / state.calls, 3) if state.calls else 0
+                ),
+                "budget_skipped": state.budget_skipped,
+                "backup_wins": state.backup_wins,
+                "win_rate": (
+                    round(state.backup_wins / state.hedged, 3) if state.hedged else 0
+                ),
+                "saved_seconds": round(state.saved_seconds, 3),
+                "hedge_delay_ms": round(delay * 1000, 1),
+                "samples": len(state.latencies),
+            }
+    return result
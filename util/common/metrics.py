@@ -0,0 +1,125 @@
+"""Prometheus 지표: 이미지 생성 단계별 소요 시간과 뷰별 DB 쿼리 수/시간
+
+gunicorn처럼 워커 프로세스가 여러 개면 PROMETHEUS_MULTIPROC_DIR 환경 변수에 (배포 시마다
+비운) 디렉터리를 지정한다. 각 프로세스가 그 디렉터리에 값을 기록하고 /metrics는 모든
+프로세스의 값을 합쳐서 내보낸다. 환경 변수가 없으면 현재 프로세스의 값만 내보낸다.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# 외부 호출 단계: refine, generate, download, resize, upload, vision, tts, curation
+STAGE_SECONDS = Histogram(
+    "team6_stage_duration_seconds",
+    "이미지 생성/분석 단계별 소요 시간",
+    ["stage", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+DB_QUERY_SECONDS = Histogram(
+    "team6_db_query_duration_seconds",
+    "요청 하나의 DB 쿼리 시간 합계",
+    ["view"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_QUERIES = Histogram(
+    "team6_db_queries_per_request",
+    "요청 하나의 DB 쿼리 수",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+# 현재 요청의 [쿼리 수, 쿼리 시간]. sync_to_async로 넘어간 DB 호출도 같은 값을 공유한다.
+_db_usage = contextvars.ContextVar("db_usage", default=None)
+
+
+@contextmanager
+def timed(stage):
+    """with 블록의 소요 시간을 stage 단계로 기록. 예외가 나면 outcome=error"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        STAGE_SECONDS.labels(stage, outcome).observe(time.perf_counter() - started)
+
+
+def timed_function(stage):
+    """함수(동기/비동기) 호출 시간을 stage 단계로 기록하는 데코레이터"""
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrappers에 등록되는 쿼리 시간 측정기"""
+    usage = _db_usage.get()
+    if usage is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        usage[0] += 1
+        usage[1] += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created 시그널 수신기. 새 DB 연결마다 record_query를 등록"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def start_request():
+    """현재 요청의 DB 사용량 집계를 시작하고 end_request에 넘길 토큰을 반환"""
+    usage = [0, 0.0]
+    return usage, _db_usage.set(usage)
+
+
+def end_request(request, state):
+    usage, token = state
+    _db_usage.reset(token)
+    match = getattr(request, "resolver_match", None)
+    # URL에 맞지 않은 요청(404 등)은 라벨 수가 늘지 않도록 하나로 묶는다.
+    view = match.view_name if match else "unmatched"
+    DB_QUERIES.labels(view).observe(usage[0])
+    DB_QUERY_SECONDS.labels(view).observe(usage[1])
+
+
+def export():
+    """(본문, Content-Type). 멀티 프로세스 모드면 모든 워커의 값을 합친다."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,128 @@
+"""논리 모델 이름별 Azure OpenAI 엔드포인트 풀
+
+settings.AZURE_OPENAI_DEPLOYMENTS는 코드에서 쓰는 모델 이름(model=...)을 여러 엔드포인트
+(리소스 주소, API 키, 배포 이름)에 연결한다. 호출마다 정상 엔드포인트 중
+"EWMA 지연 시간 x (처리 중인 요청 수 + 1)"이 가장 작은 곳을 고르며, 429 또는 5xx를 돌려준
+엔드포인트는 잠시 제외한다. openai SDK가 429/5xx를 재시도하면 다른 엔드포인트로 보내지므로
+장애 시 자동으로 넘어간다. 처리량을 늘리려면 설정에 엔드포인트를 추가하면 된다.
+
+상태(지연 시간, 제외 여부)는 프로세스별로 관리한다.
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+# EWMA 가중치: 클수록 최근 응답 시간을 많이 반영
+EWMA_ALPHA = 0.3
+MAX_EJECT_SECONDS = 300
+
+_lock = threading.Lock()
+_pools = None
+
+
+class Endpoint:
+    """풀에 속한 엔드포인트 하나와 그 부하/상태"""
+
+    def __init__(self, model, config):
+        self.model = model
+        self.url = config["endpoint"].rstrip("/")
+        # 키를 JSON 설정에 직접 넣지 않도록 환경 변수 이름으로도 지정할 수 있다.
+        self.api_key = config.get("api_key") or os.environ[config["api_key_env"]]
+        self.api_version = config.get("api_version")
+        self.deployment = config.get("deployment", model)
+        # 호출 한도(rate_limit) 버킷 이름
+        self.name = config.get("name") or f"{model}@{urlsplit(self.url).netloc}"
+        self.in_flight = 0
+        self.latency = None
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def score(self):
+        # 아직 응답 시간을 모르는 엔드포인트를 먼저 사용해 본다.
+        return (self.latency or 0.0) * (self.in_flight + 1)
+
+    def as_dict(self, now):
+        return {
+            "name": self.name,
+            "deployment": self.deployment,
+            "in_flight": self.in_flight,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency else None,
+            "healthy": self.ejected_until <= now,
+            "ejected_for": max(0.0, round(self.ejected_until - now, 1)),
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+def _get_pools():
+    global _pools
+    if _pools is None:
+        with _lock:
+            if _pools is None:
+                _pools = {
+                    model: [Endpoint(model, config) for config in configs]
+                    for model, configs in settings.AZURE_OPENAI_DEPLOYMENTS.items()
+                }
+    return _pools
+
+
+def choose(model):
+    """요청을 보낼 엔드포인트를 골라 처리 중으로 표시. 풀에 없는 모델이면 None
+
+    모든 엔드포인트가 제외된 상태면 가장 먼저 복귀하는 엔드포인트를 사용한다.
+    """
+    endpoints = _get_pools().get(model)
+    if not endpoints:
+        return None
+    now = time.time()
+    with _lock:
+        healthy = [e for e in endpoints if e.ejected_until <= now]
+        if healthy:
+            endpoint = min(healthy, key=Endpoint.score)
+        else:
+            endpoint = min(endpoints, key=lambda e: e.ejected_until)
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+    return endpoint
+
+
+def release(endpoint, latency=None, failed=False, retry_after=None):
+    """choose로 고른 엔드포인트의 요청이 끝났을 때 호출
+
+    성공이면 latency(초)를 EWMA에 반영하고, 실패(429/5xx/연결 오류)면 연속 실패 횟수에
+    따라 MODEL_POOL_EJECT_SECONDS부터 두 배씩 늘려 가며(최대 MAX_EJECT_SECONDS) 제외한다.
+    latency 없이 성공으로 호출하면 처리 중 표시만 해제한다.
+    """
+    with _lock:
+        endpoint.in_flight -= 1
+        if failed:
+            endpoint.errors += 1
+            endpoint.failures += 1
+            eject = min(
+                MAX_EJECT_SECONDS,
+                settings.MODEL_POOL_EJECT_SECONDS * 2 ** (endpoint.failures - 1),
+            )
+            endpoint.ejected_until = time.time() + max(eject, retry_after or 0)
+        elif latency is not None:
+            endpoint.failures = 0
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += EWMA_ALPHA * (latency - endpoint.latency)
+
+
+def stats():
+    """모델별 엔드포인트 부하, 지연 시간, 제외 상태 (현재 프로세스)"""
+    pools = _get_pools()
+    now = time.time()
+    with _lock:
+        return {
+            model: [endpoint.as_dict(now) for endpoint in endpoints]
+            for model, endpoints in pools.items()
+        }
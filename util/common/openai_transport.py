@@ -0,0 +1,241 @@
+"""Azure OpenAI 호출을 엔드포인트 풀로 분산하고 호출 한도를 적용하는 httpx 트랜스포트
+
+요청 경로(/openai/deployments/<모델>/...)의 모델이 util.common.model_pool에 등록되어 있으면
+고른 엔드포인트의 주소, 배포 이름, API 키로 요청을 바꿔 보낸다. 그 다음 본문으로 토큰 수를
+어림해 util.common.rate_limit에서 한도를 확보한다. 대기 시간 안에 한도를 확보하지 못하면
+네트워크 호출 없이 429 응답을 돌려주며, x-should-retry: false 헤더 때문에 openai SDK는
+재시도하지 않고 RateLimitError를 던진다.
+
+모델마다 util.common.resilience의 서킷 브레이커("openai:<모델>")를 거치며, 연결 오류와 5xx가
+이어져 브레이커가 열리면 네트워크 호출 없이 503(code=circuit_open) 응답을 돌려준다.
+
+resilience.deadline_scope 안이면 openai SDK의 재시도마다 요청의 시간 제한을 남은 시간으로
+줄이고, 시간이 다 되면 네트워크 호출 없이 504(code=deadline_exceeded) 응답을 돌려준다.
+"""
+
+import json
+import math
+import re
+import time
+
+import httpx
+
+from util.common import model_pool, rate_limit, resilience
+
+DEPLOYMENT_PATH = re.compile(r"/openai/deployments/([^/]+)/")
+
+
+def route_request(request):
+    """(보낼 요청, 호출 한도 버킷 이름, 풀 엔드포인트)
+
+    Azure OpenAI 배포 호출이 아니면 (request, None, None), 풀에 없는 모델이면
+    (request, 모델 이름, None)을 반환한다.
+    """
+    match = DEPLOYMENT_PATH.search(request.url.path)
+    if not match:
+        return request, None, None
+    model = match.group(1)
+    endpoint = model_pool.choose(model)
+    if endpoint is None:
+        return request, model, None
+
+    url = httpx.URL(
+        f"{endpoint.url}/openai/deployments/{endpoint.deployment}"
+        f"{request.url.path[match.end(1):]}",
+        params=request.url.params,
+    )
+    if endpoint.api_version:
+        url = url.copy_set_param("api-version", endpoint.api_version)
+    headers = request.headers.copy()
+    del headers["host"]
+    headers["api-key"] = endpoint.api_key
+    routed = httpx.Request(
+        request.method,
+        url,
+        headers=headers,
+        content=request.content,
+        extensions=request.extensions,
+    )
+    return routed, endpoint.name, endpoint
+
+
+def estimate_request_tokens(bucket, request):
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, httpx.RequestNotRead):
+        body = {}
+    return rate_limit.estimate_tokens(bucket, body)
+
+
+def throttled_response(request, bucket):
+    return httpx.Response(
+        429,
+        headers={"retry-after": "1", "x-should-retry": "false"},
+        json={
+            "error": {
+                "code": "client_rate_limited",
+                "message": f"{bucket} 호출 한도를 기다리다 시간이 초과되었습니다.",
+            }
+        },
+        request=request,
+    )
+
+
+def get_breaker(bucket):
+    """풀 엔드포인트 버킷(모델@호스트)도 모델 단위 브레이커를 사용"""
+    return resilience.get_breaker(f"openai:{bucket.split('@')[0]}")
+
+
+def circuit_open_response(request, breaker):
+    return httpx.Response(
+        503,
+        headers={
+            "retry-after": str(math.ceil(breaker.retry_in())),
+            "x-should-retry": "false",
+        },
+        json={
+            "error": {
+                "code": resilience.CIRCUIT_OPEN_CODE,
+                "message": f"{breaker.name} 장애로 호출을 잠시 중단했습니다.",
+            }
+        },
+        request=request,
+    )
+
+
+def deadline_exceeded_response(request):
+    return httpx.Response(
+        504,
+        headers={"x-should-retry": "false"},
+        json={
+            "error": {
+                "code": "deadline_exceeded",
+                "message": "전체 시간 제한을 넘어 호출하지 않았습니다.",
+            }
+        },
+        request=request,
+    )
+
+
+def clamp_to_deadline(request):
+    """요청의 시간 제한(connect/read/write/pool)을 남은 deadline에 맞춰 줄인다.
+
+    deadline이 이미 지났으면 False를 반환한다.
+    """
+    left = resilience.remaining()
+    if left is None:
+        return True
+    if left <= 0:
+        return False
+    timeout = request.extensions.get("timeout")
+    if timeout:
+        request.extensions["timeout"] = {
+            key: resilience.clamp_timeout(value) for key, value in timeout.items()
+        }
+    return True
+
+
+def record_response(breaker, response):
+    """5xx는 실패, 그 외(429 포함)는 서비스가 응답한 것이므로 성공으로 기록"""
+    if response.status_code >= 500:
+        breaker.record_failure(f"HTTP {response.status_code}")
+    else:
+        breaker.record_success()
+
+
+def release_endpoint(endpoint, response, started, failed):
+    """응답(또는 연결 오류)을 풀에 반영. 응답 없이 끝났으면 처리 중 표시만 해제"""
+    if response is None:
+        model_pool.release(endpoint, failed=failed)
+        return
+    try:
+        retry_after = float(response.headers.get("retry-after") or 0)
+    except ValueError:
+        retry_after = 0
+    model_pool.release(
+        endpoint,
+        latency=time.monotonic() - started,
+        failed=response.status_code == 429 or response.status_code >= 500,
+        retry_after=retry_after,
+    )
+
+
+class AzureOpenAITransport(httpx.BaseTransport):
+    def __init__(self, transport):
+        self._transport = transport
+
+    def handle_request(self, request):
+        request, bucket, endpoint = route_request(request)
+        if bucket is None:
+            if not clamp_to_deadline(request):
+                return deadline_exceeded_response(request)
+            return self._transport.handle_request(request)
+
+        response, failed, started = None, False, time.monotonic()
+        breaker = get_breaker(bucket)
+        try:
+            if not breaker.allow():
+                return circuit_open_response(request, breaker)
+            tokens = estimate_request_tokens(bucket, request)
+            if not rate_limit.acquire(bucket, tokens):
+                return throttled_response(request, bucket)
+            if not clamp_to_deadline(request):
+                return deadline_exceeded_response(request)
+            started = time.monotonic()
+            response = self._transport.handle_request(request)
+        except httpx.TransportError as e:
+            failed = True
+            breaker.record_failure(e)
+            raise
+        finally:
+            if endpoint:
+                release_endpoint(endpoint, response, started, failed)
+        record_response(breaker, response)
+        rate_limit.observe(bucket, response.status_code, response.headers)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncAzureOpenAITransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        from asgiref.sync import sync_to_async
+
+        request, bucket, endpoint = route_request(request)
+        if bucket is None:
+            if not clamp_to_deadline(request):
+                return deadline_exceeded_response(request)
+            return await self._transport.handle_async_request(request)
+
+        # 취소(CancelledError)되어도 엔드포인트의 처리 중 표시는 해제한다.
+        response, failed, started = None, False, time.monotonic()
+        breaker = get_breaker(bucket)
+        try:
+            if not breaker.allow():
+                return circuit_open_response(request, breaker)
+            tokens = estimate_request_tokens(bucket, request)
+            if not await rate_limit.acquire_async(bucket, tokens):
+                return throttled_response(request, bucket)
+            if not clamp_to_deadline(request):
+                return deadline_exceeded_response(request)
+            started = time.monotonic()
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError as e:
+            failed = True
+            breaker.record_failure(e)
+            raise
+        finally:
+            if endpoint:
+                release_endpoint(endpoint, response, started, failed)
+        record_response(breaker, response)
+        await sync_to_async(rate_limit.observe)(
+            bucket, response.status_code, response.headers
+        )
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
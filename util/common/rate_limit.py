@@ -0,0 +1,267 @@
+"""Azure OpenAI 배포별 토큰 버킷 호출 제한
+
+배포마다 분당 요청 수(rpm)와 분당 토큰 수(tpm) 두 개의 버킷을 DB(RateLimitBucket)에 두고
+모든 워커 프로세스가 공유한다. 한도를 넘는 호출은 실패하는 대신 버킷이 다시 찰 때까지
+최대 RATE_LIMIT_*_MAX_WAIT초 기다린다.
+
+요청은 두 개의 우선순위 레인으로 나뉜다.
+- interactive(기본): 사용자가 결과를 기다리는 이미지 생성 등. 버킷 전체를 사용할 수 있다.
+- background: 큐레이션, 일괄 작업 등. 버킷의 RATE_LIMIT_INTERACTIVE_RESERVE%는 남겨 두고
+  사용하므로, 한도가 빠듯할 때 interactive 요청이 먼저 처리된다.
+"""
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from util.models import RateLimitBucket
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# 한 글자가 몇 토큰인지 알 수 없으므로 UTF-8 4바이트를 1토큰으로 어림한다. (한글 1자는 약 0.75토큰)
+BYTES_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 500
+# 다른 프로세스와 동시에 버킷 행을 만들다 충돌(IntegrityError)했을 때 다시 시도하는 횟수
+MAX_CREATE_CONFLICTS = 3
+
+_lane = contextvars.ContextVar("rate_limit_lane", default=INTERACTIVE)
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+@contextmanager
+def lane(name):
+    """with 블록 안의 Azure OpenAI 호출을 주어진 레인으로 보낸다."""
+    token = _lane.set(name)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane():
+    return _lane.get()
+
+
+def get_limits(deployment):
+    """버킷 한도. 풀 엔드포인트 버킷(모델@호스트)에 한도가 따로 없으면 모델의 한도를 사용"""
+    limits = settings.AZURE_OPENAI_RATE_LIMITS
+    return limits.get(deployment) or limits.get(deployment.split("@")[0])
+
+
+def estimate_tokens(deployment, body):
+    """요청 본문(JSON)으로 프롬프트와 응답 토큰 수를 어림"""
+    limits = get_limits(deployment) or {}
+    prompt = 0
+    for message in body.get("messages") or []:
+        content = message.get("content") or ""
+        if not isinstance(content, str):
+            content = str(content)
+        prompt += len(content.encode("utf-8"))
+    prompt += len((body.get("prompt") or "").encode("utf-8"))
+    completion = (
+        body.get("max_completion_tokens")
+        or body.get("max_tokens")
+        or limits.get("completion_tokens", DEFAULT_COMPLETION_TOKENS)
+    )
+    return prompt // BYTES_PER_TOKEN + completion
+
+
+def _record(deployment, lane_name, key, amount=1):
+    with _stats_lock:
+        counters = _stats.setdefault(
+            f"{deployment}:{lane_name}",
+            {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "rejected": 0},
+        )
+        counters[key] += amount
+
+
+def _try_acquire(deployment, limits, tokens, lane_name):
+    """버킷에서 요청 1개와 tokens를 꺼낸다. 성공하면 0, 아니면 기다려야 할 초를 반환"""
+    rpm = limits["rpm"]
+    tpm = limits.get("tpm", 0)
+    tokens = min(tokens, tpm) if tpm else 0
+    reserve = 0.0
+    if lane_name != INTERACTIVE:
+        reserve = settings.RATE_LIMIT_INTERACTIVE_RESERVE / 100
+
+    now = time.time()
+    with transaction.atomic():
+        bucket = (
+            RateLimitBucket.objects.select_for_update()
+            .filter(deployment=deployment)
+            .first()
+        )
+        if bucket is None:
+            bucket = RateLimitBucket.objects.create(
+                deployment=deployment, requests=rpm, tokens=tpm, updated_at=now
+            )
+
+        elapsed = max(0.0, now - bucket.updated_at)
+        bucket.requests = min(rpm, bucket.requests + elapsed * rpm / 60)
+        bucket.tokens = min(tpm, bucket.tokens + elapsed * tpm / 60)
+        bucket.updated_at = now
+
+        if bucket.blocked_until > now:
+            wait = bucket.blocked_until - now
+        else:
+            need_requests = 1 + rpm * reserve
+            need_tokens = tokens + tpm * reserve
+            wait = max(
+                (need_requests - bucket.requests) * 60 / rpm,
+                (need_tokens - bucket.tokens) * 60 / tpm if tpm else 0,
+            )
+            if wait <= 0:
+                bucket.requests -= 1
+                bucket.tokens -= tokens
+                wait = 0
+        bucket.save()
+    return wait
+
+
+def acquire(deployment, tokens):
+    """호출 전에 한도를 확보. 레인별 최대 대기 시간 안에 확보하지 못하면 False
+
+    한도가 설정되지 않은 배포이거나 DB 오류가 나면 제한 없이 True를 반환한다.
+    """
+    limits = get_limits(deployment)
+    if not limits:
+        return True
+    lane_name = current_lane()
+    max_wait = (
+        settings.RATE_LIMIT_INTERACTIVE_MAX_WAIT
+        if lane_name == INTERACTIVE
+        else settings.RATE_LIMIT_BACKGROUND_MAX_WAIT
+    )
+    started = time.monotonic()
+    slept = False
+    conflicts = 0
+    while True:
+        try:
+            wait = _try_acquire(deployment, limits, tokens, lane_name)
+        except IntegrityError:
+            # 다른 프로세스가 같은 버킷을 동시에 만든 경우. 계속되면 제한 없이 진행
+            conflicts += 1
+            if conflicts > MAX_CREATE_CONFLICTS:
+                logging.error(f"{deployment} 호출 한도 버킷을 만들지 못했습니다.")
+                return True
+            continue
+        except Exception as e:
+            logging.error(f"호출 한도 확인 중 오류 발생: {str(e)}", exc_info=True)
+            return True
+
+        waited = time.monotonic() - started
+        if wait <= 0:
+            _record(deployment, lane_name, "acquired")
+            if slept:
+                _record(deployment, lane_name, "waited")
+                _record(deployment, lane_name, "wait_seconds", waited)
+            return True
+        if waited + wait > max_wait:
+            _record(deployment, lane_name, "rejected")
+            logging.warning(
+                f"{deployment} 호출 한도 대기 시간 초과 ({lane_name}, {waited:.1f}s)"
+            )
+            return False
+        # 여러 프로세스가 같은 시각에 깨어나지 않도록 약간의 지터를 더한다.
+        time.sleep(min(wait, 1.0) + random.uniform(0, 0.05))
+        slept = True
+
+
+async def acquire_async(deployment, tokens):
+    """acquire의 비동기 버전. 대기 중에 이벤트 루프를 막지 않는다."""
+    import asyncio
+
+    from asgiref.sync import sync_to_async
+
+    limits = get_limits(deployment)
+    if not limits:
+        return True
+    lane_name = current_lane()
+    max_wait = (
+        settings.RATE_LIMIT_INTERACTIVE_MAX_WAIT
+        if lane_name == INTERACTIVE
+        else settings.RATE_LIMIT_BACKGROUND_MAX_WAIT
+    )
+    started = time.monotonic()
+    slept = False
+    conflicts = 0
+    while True:
+        try:
+            wait = await sync_to_async(_try_acquire)(
+                deployment, limits, tokens, lane_name
+            )
+        except IntegrityError:
+            conflicts += 1
+            if conflicts > MAX_CREATE_CONFLICTS:
+                logging.error(f"{deployment} 호출 한도 버킷을 만들지 못했습니다.")
+                return True
+            continue
+        except Exception as e:
+            logging.error(f"호출 한도 확인 중 오류 발생: {str(e)}", exc_info=True)
+            return True
+
+        waited = time.monotonic() - started
+        if wait <= 0:
+            _record(deployment, lane_name, "acquired")
+            if slept:
+                _record(deployment, lane_name, "waited")
+                _record(deployment, lane_name, "wait_seconds", waited)
+            return True
+        if waited + wait > max_wait:
+            _record(deployment, lane_name, "rejected")
+            logging.warning(
+                f"{deployment} 호출 한도 대기 시간 초과 ({lane_name}, {waited:.1f}s)"
+            )
+            return False
+        await asyncio.sleep(min(wait, 1.0) + random.uniform(0, 0.05))
+        slept = True
+
+
+def observe(deployment, status_code, headers):
+    """Azure 응답으로 버킷을 보정
+
+    429면 retry-after 동안 버킷을 막고, x-ratelimit-remaining-* 헤더가 있으면 서버가 알려준
+    남은 한도보다 버킷이 크지 않도록 줄인다.
+    """
+    if not get_limits(deployment):
+        return
+    try:
+        if status_code == 429:
+            retry_after = float(headers.get("retry-after") or 1)
+            RateLimitBucket.objects.filter(deployment=deployment).update(
+                blocked_until=time.time() + retry_after, requests=0
+            )
+            logging.warning(
+                f"{deployment} 429 응답, {retry_after}s 동안 호출을 멈춥니다."
+            )
+            return
+        for header, field in (
+            ("x-ratelimit-remaining-requests", "requests"),
+            ("x-ratelimit-remaining-tokens", "tokens"),
+        ):
+            if headers.get(header) is not None:
+                remaining = float(headers[header])
+                RateLimitBucket.objects.filter(
+                    deployment=deployment, **{f"{field}__gt": remaining}
+                ).update(**{field: remaining})
+    except Exception as e:
+        logging.error(f"호출 한도 보정 중 오류 발생: {str(e)}", exc_info=True)
+
+
+def is_rate_limited(exc):
+    """openai 예외가 429(서버 또는 이 제한기)인지 여부"""
+    return getattr(exc, "status_code", None) == 429
+
+
+def stats():
+    """배포/레인별 확보, 대기, 거절 횟수 (현재 프로세스)"""
+    with _stats_lock:
+        return {key: dict(counters) for key, counters in _stats.items()}
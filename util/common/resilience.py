@@ -0,0 +1,358 @@
+"""외부 서비스 호출의 재시도와 서킷 브레이커
+
+외부 의존성(OpenAI 모델, Blob Storage, Computer Vision, Speech, 이미지 다운로드)마다
+CircuitBreaker를 하나씩 둔다. 연속 CIRCUIT_FAILURE_THRESHOLD번 일시적인 오류(연결 실패,
+시간 초과, 5xx)가 나면 브레이커가 열리고, CIRCUIT_RESET_TIMEOUT초 동안은 네트워크 호출 없이
+CircuitOpenError로 바로 실패한다. 그 뒤 한 요청만 시험 삼아 보내(half-open) 성공하면 다시
+닫고, 실패하면 다시 연다. 장애 중인 서비스를 기다리느라 워커 스레드가 묶이지 않게 하려는 것이다.
+
+call/call_async는 일시적인 오류를 최대 RESILIENCE_MAX_RETRIES번, full jitter 지수 백오프로
+재시도한다. 4xx 등 재시도해도 같은 결과인 오류는 서비스가 응답한 것이므로 성공으로 기록하고
+그대로 발생시킨다. 호출 한도 초과(429)는 util.common.rate_limit이 따로 다루므로 재시도하지 않는다.
+
+호출마다의 시간 제한은 각 클라이언트(util.common.clients)에 설정하고, 상태는 프로세스별로 관리한다.
+재시도를 포함한 전체 시간 제한은 deadline_scope로 건다. with 블록 안에서는 call/call_async가
+남은 시간을 넘겨 재시도하지 않고, OpenAI/Blob 트랜스포트가 요청의 시간 제한을 남은 시간으로 줄인다.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 브레이커가 열려 네트워크 호출 없이 돌려준 응답의 오류 코드 (openai 예외의 code)
+CIRCUIT_OPEN_CODE = "circuit_open"
+
+# (모듈, 예외 이름): 상태 코드 없이 연결/시간 초과로 실패한 경우
+_NETWORK_ERRORS = [
+    ("requests.exceptions", "ConnectionError"),
+    ("requests.exceptions", "Timeout"),
+    ("httpx", "TransportError"),
+    ("openai", "APIConnectionError"),
+    ("azure.core.exceptions", "ServiceRequestError"),
+    ("azure.core.exceptions", "ServiceResponseError"),
+    ("msrest.exceptions", "ClientRequestError"),
+    ("aiohttp", "ClientConnectionError"),
+]
+
+# 요청 하나의 시간 제한을 이보다 짧게 줄이지는 않는다 (0이면 라이브러리마다 의미가 다르다).
+MIN_TIMEOUT = 0.1
+
+_lock = threading.Lock()
+_breakers = {}
+_deadline = contextvars.ContextVar("resilience_deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    """브레이커가 열려 있어 호출하지 않고 실패"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(
+            f"{name} 서비스 장애로 호출을 잠시 중단했습니다. ({retry_in:.0f}초 후 재시도)"
+        )
+        self.name = name
+        self.retry_in = retry_in
+
+
+class DeadlineExceededError(TimeoutError):
+    """deadline_scope의 시간 제한이 지나 호출하지 않고 실패"""
+
+    def __init__(self, name):
+        super().__init__(f"{name} 호출의 전체 시간 제한을 넘었습니다.")
+        self.name = name
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """with 블록 안의 외부 호출을 재시도까지 포함해 seconds초 안에 끝낸다.
+
+    바깥 블록의 deadline이 더 이르면 그것을 따르고, seconds가 None이면 아무것도 하지 않는다.
+    """
+    if seconds is None:
+        yield
+        return
+    until = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(until if outer is None else min(outer, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """현재 deadline까지 남은 초. deadline_scope 밖이면 None"""
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+
+def clamp_timeout(timeout):
+    """요청 하나의 시간 제한(초)을 남은 deadline에 맞춰 줄인다. None은 제한 없음"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if timeout is not None:
+        left = min(left, timeout)
+    return max(left, MIN_TIMEOUT)
+
+
+class CircuitBreaker:
+    """외부 의존성 하나의 연속 실패 횟수와 열림/닫힘 상태"""
+
+    def __init__(self, name):
+        self.name = name
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self.probe_started = None
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.retries = 0
+        self.opened = 0
+        self.last_error = None
+        self.last_failure_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """지금 호출해도 되면 True. half-open이면 시험 요청 하나만 허용"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN and now >= self.opened_until:
+                self.state = HALF_OPEN
+                self.probe_started = None
+            if self.state == HALF_OPEN:
+                # 시험 요청이 결과 없이 끝난 경우(취소 등)를 대비해 일정 시간이 지나면 다시 허용
+                if (
+                    self.probe_started is None
+                    or now - self.probe_started > settings.CIRCUIT_RESET_TIMEOUT
+                ):
+                    self.probe_started = now
+                    self.calls += 1
+                    return True
+            elif self.state == CLOSED:
+                self.calls += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_in(self):
+        with self._lock:
+            return max(0.0, self.opened_until - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logging.info(f"[{self.name}] 서킷 브레이커가 닫혔습니다.")
+            self.state = CLOSED
+            self.probe_started = None
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)[:200]
+            self.last_failure_at = time.time()
+            if (
+                self.state == HALF_OPEN
+                or self.consecutive_failures >= settings.CIRCUIT_FAILURE_THRESHOLD
+            ):
+                if self.state != OPEN:
+                    self.opened += 1
+                    logging.warning(
+                        f"[{self.name}] 연속 {self.consecutive_failures}회 실패로 "
+                        f"{settings.CIRCUIT_RESET_TIMEOUT}초 동안 서킷 브레이커를 엽니다: "
+                        f"{self.last_error}"
+                    )
+                self.state = OPEN
+                self.opened_until = time.monotonic() + settings.CIRCUIT_RESET_TIMEOUT
+                self.probe_started = None
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def as_dict(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in": (
+                    round(max(0.0, self.opened_until - now), 1)
+                    if self.state == OPEN
+                    else 0.0
+                ),
+                "calls": self.calls,
+                "successes": self.successes,
+                "failures": self.failures,
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "opened": self.opened,
+                "last_error": self.last_error,
+                "last_failure_at": self.last_failure_at,
+            }
+
+
+def get_breaker(name):
+    with _lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def _status_code(exc):
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _network_error_types():
+    # 불러오지 않은 모듈의 예외는 발생할 수 없으므로 이미 불러온 모듈만 확인한다.
+    types = [ConnectionError, TimeoutError, asyncio.TimeoutError]
+    for module_name, name in _NETWORK_ERRORS:
+        module = sys.modules.get(module_name)
+        if module is not None and hasattr(module, name):
+            types.append(getattr(module, name))
+    return tuple(types)
+
+
+def is_transient(exc):
+    """재시도하면 성공할 수 있는 오류(연결 실패, 시간 초과, 408, 5xx)인지 여부"""
+    if isinstance(exc, (CircuitOpenError, DeadlineExceededError)):
+        return False
+    status = _status_code(exc)
+    if status is not None:
+        return status == 408 or status >= 500
+    return isinstance(exc, _network_error_types())
+
+
+def is_circuit_open(exc):
+    """브레이커가 열려 있어 호출하지 않고 실패한 경우(openai 트랜스포트의 503 포함)"""
+    return (
+        isinstance(exc, CircuitOpenError)
+        or getattr(exc, "code", None) == CIRCUIT_OPEN_CODE
+    )
+
+
+def backoff(attempt):
+    """attempt(0부터)번째 재시도 전 대기 시간. full jitter 지수 백오프"""
+    return random.uniform(
+        0,
+        min(
+            settings.RESILIENCE_BACKOFF_MAX,
+            settings.RESILIENCE_BACKOFF_BASE * 2**attempt,
+        ),
+    )
+
+
+def _next_delay(breaker, error, attempt, retries):
+    """다시 시도할 대기 시간. 재시도 횟수나 deadline을 넘으면 None"""
+    if attempt >= retries:
+        return None
+    delay = backoff(attempt)
+    left = remaining()
+    if left is not None and delay >= left:
+        return None
+    breaker.record_retry()
+    logging.warning(
+        f"[{breaker.name}] 일시적인 오류로 {delay:.2f}초 후 다시 시도합니다 "
+        f"({attempt + 1}/{retries}): {str(error)}"
+    )
+    return delay
+
+
+def call(name, fn, *args, retries=None, deadline=None, **kwargs):
+    """name 브레이커를 거쳐 fn(*args, **kwargs)를 호출하고 일시적인 오류는 재시도
+
+    retries는 최대 재시도 횟수(기본 RESILIENCE_MAX_RETRIES), deadline은 재시도를 포함한
+    전체 시간 제한(초)으로 deadline_scope와 같다. 브레이커가 열려 있으면 CircuitOpenError,
+    시간 제한이 이미 지났으면 DeadlineExceededError를 발생시킨다.
+    """
+    with deadline_scope(deadline):
+        return _call(name, fn, args, kwargs, retries)
+
+
+def _call(name, fn, args, kwargs, retries):
+    breaker = get_breaker(name)
+    if retries is None:
+        retries = settings.RESILIENCE_MAX_RETRIES
+    attempt = 0
+    while True:
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceededError(name)
+        if not breaker.allow():
+            raise CircuitOpenError(name, breaker.retry_in())
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure(e)
+            delay = _next_delay(breaker, e, attempt, retries)
+            if delay is None:
+                raise
+            attempt += 1
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+async def call_async(name, fn, *args, retries=None, deadline=None, **kwargs):
+    """call의 비동기 버전. fn은 코루틴을 반환하는 함수"""
+    with deadline_scope(deadline):
+        return await _call_async(name, fn, args, kwargs, retries)
+
+
+async def _call_async(name, fn, args, kwargs, retries):
+    breaker = get_breaker(name)
+    if retries is None:
+        retries = settings.RESILIENCE_MAX_RETRIES
+    attempt = 0
+    while True:
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceededError(name)
+        if not breaker.allow():
+            raise CircuitOpenError(name, breaker.retry_in())
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure(e)
+            delay = _next_delay(breaker, e, attempt, retries)
+            if delay is None:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+def stats():
+    """브레이커별 상태와 호출/실패/재시도/거절 횟수 (현재 프로세스)"""
+    with _lock:
+        breakers = sorted(_breakers.items())
+    return {name: breaker.as_dict() for name, breaker in breakers}
@@ -0,0 +1,275 @@
+"""외부 의존성 장애 주입 프로필 (manage.py azure_standin, benchmarks.bench_pipeline에서 사용)
+
+프로필은 이름 -> {의존성: 설정} 형식이다. 의존성은 chat(o3-mini 정제, gpt-4o 큐레이션),
+image(DALL-E), download(DALL-E가 돌려준 이미지 URL), blob, vision, speech이고 설정 항목은
+다음과 같다.
+
+    latency       지연 분포 (아래 형식)
+    error_rate    오류로 응답할 비율 (0~1)
+    error_status  오류 응답 상태 코드 (기본 503)
+    throttle      {"every": N, "burst": M, "retry_after": 초}
+                  요청 N개마다 처음 M개를 429와 Retry-After로 거절
+    body_rate     응답 본문 전송 속도(bytes/s). 본문을 이 속도로 나눠 보낸다.
+
+지연 분포 (단위: 초)
+    0.2                          고정
+    uniform:0.1:0.3              균등 분포
+    lognormal:0.2:0.5            중앙값 0.2, 시그마 0.5인 로그정규 분포
+    exp:0.2                      평균 0.2인 지수 분포
+    percentiles:50=8,90=20,99=60 백분위수 사이를 선형 보간. 첫 백분위수 아래는 그 값의
+                                 절반부터, 마지막 백분위수 위는 그 값으로 고정
+
+운영 /metrics의 단계별 히스토그램(team6_stage_duration_seconds)으로 percentiles 분포와
+error_rate를 만들 수 있다 (profile_from_metrics).
+
+같은 seed면 의존성별 n번째 요청에 주입되는 지연과 오류가 항상 같다. 동시 요청의 도착
+순서까지 고정하지는 않으므로 순서가 바뀌면 어느 요청이 n번째가 되는지는 달라질 수 있다.
+"""
+
+import json
+import random
+import re
+import threading
+from collections import namedtuple
+
+DEPENDENCIES = ["chat", "image", "download", "blob", "vision", "speech"]
+
+# util.common.metrics 단계 -> 의존성
+STAGE_DEPENDENCIES = {
+    "refine": "chat",
+    "curation": "chat",
+    "generate": "image",
+    "download": "download",
+    "upload": "blob",
+    "vision": "vision",
+    "tts": "speech",
+}
+
+BUILTIN_PROFILES = {
+    "baseline": {},
+    "dalle_p99_60s": {"image": {"latency": "percentiles:50=8,90=20,99=60"}},
+    "blob_503": {"blob": {"error_rate": 0.2, "error_status": 503}},
+    "openai_throttled": {
+        "chat": {"throttle": {"every": 50, "burst": 10, "retry_after": 2}},
+        "image": {"throttle": {"every": 20, "burst": 5, "retry_after": 10}},
+    },
+    "slow_body": {
+        "download": {"body_rate": 32 * 1024},
+        "blob": {"body_rate": 64 * 1024},
+    },
+}
+
+PROFILE_KEYS = {"latency", "error_rate", "error_status", "throttle", "body_rate"}
+
+# 한 요청에 주입할 장애. status가 None이면 정상 응답
+Fault = namedtuple("Fault", ["delay", "status", "retry_after", "body_rate"])
+NO_FAULT = Fault(0.0, None, None, None)
+
+
+def parse_distribution(spec):
+    """분포 문자열을 rng(random.Random 또는 random 모듈)를 받아 초를 돌려주는 함수로 변환"""
+    kind, _, params = str(spec).partition(":")
+    if not params:
+        value = float(kind)
+        return lambda rng: value
+    if kind == "percentiles":
+        return percentile_distribution(
+            {
+                float(p): float(v)
+                for p, v in (item.split("=") for item in params.split(","))
+            }
+        )
+    args = [float(p) for p in params.split(":")]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(*args)
+    if kind == "lognormal":
+        median, sigma = args
+        return lambda rng: median * rng.lognormvariate(0, sigma)
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1 / args[0])
+    raise ValueError(f"알 수 없는 분포: {spec}")
+
+
+def percentile_distribution(points):
+    """{백분위수: 값}으로 역누적분포를 선형 보간하는 분포"""
+    if not points:
+        raise ValueError("백분위수가 없습니다.")
+    knots = sorted(points.items())
+    if knots[0][0] > 0:
+        knots.insert(0, (0.0, knots[0][1] / 2))
+    if knots[-1][0] < 100:
+        knots.append((100.0, knots[-1][1]))
+
+    def sample(rng):
+        u = rng.random() * 100
+        for (p0, v0), (p1, v1) in zip(knots, knots[1:]):
+            if u <= p1:
+                return v0 + (v1 - v0) * (u - p0) / (p1 - p0) if p1 > p0 else v1
+        return knots[-1][1]
+
+    return sample
+
+
+def format_percentiles(points):
+    return "percentiles:" + ",".join(
+        f"{p:g}={round(v, 3):g}" for p, v in sorted(points.items())
+    )
+
+
+def validate(profile):
+    """프로필 dict를 검사. 잘못된 의존성/항목/분포면 ValueError"""
+    for dependency, config in profile.items():
+        if dependency not in DEPENDENCIES:
+            raise ValueError(
+                f"알 수 없는 의존성: {dependency} ({', '.join(DEPENDENCIES)})"
+            )
+        unknown = set(config) - PROFILE_KEYS
+        if unknown:
+            raise ValueError(f"{dependency}: 알 수 없는 항목 {sorted(unknown)}")
+        if "latency" in config:
+            parse_distribution(config["latency"])
+        if not 0 <= config.get("error_rate", 0) <= 1:
+            raise ValueError(f"{dependency}: error_rate는 0~1 사이여야 합니다.")
+        throttle = config.get("throttle")
+        if throttle and not 0 < throttle.get("burst", 0) <= throttle.get("every", 0):
+            raise ValueError(f"{dependency}: throttle은 0 < burst <= every여야 합니다.")
+    return profile
+
+
+def load_profiles(path=None):
+    """기본 프로필에 path(JSON, 이름 -> 프로필)의 프로필을 더해 반환"""
+    profiles = dict(BUILTIN_PROFILES)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            profiles.update(json.load(f))
+    for profile in profiles.values():
+        validate(profile)
+    return profiles
+
+
+def get_profile(name, path=None):
+    profiles = load_profiles(path)
+    if name not in profiles:
+        raise ValueError(f"알 수 없는 프로필: {name} ({', '.join(profiles)})")
+    return profiles[name]
+
+
+METRIC_LINE = re.compile(
+    r"team6_stage_duration_seconds_(?P<kind>bucket|count)\{(?P<labels>[^}]*)\}\s+(?P<value>\S+)"
+)
+LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+
+def profile_from_metrics(text, percentiles=(50, 90, 95, 99)):
+    """/metrics 응답 본문의 단계별 히스토그램으로 프로필을 만든다.
+
+    지연은 outcome=ok 요청의 버킷을 선형 보간한 백분위수, error_rate는 outcome=error 비율이다.
+    같은 의존성에 단계가 여럿이면(refine, curation -> chat) 합쳐서 계산한다.
+    """
+    buckets = {}
+    counts = {}
+    for match in METRIC_LINE.finditer(text):
+        labels = dict(LABEL.findall(match.group("labels")))
+        dependency = STAGE_DEPENDENCIES.get(labels.get("stage"))
+        if dependency is None:
+            continue
+        value = float(match.group("value"))
+        outcome = labels.get("outcome", "ok")
+        if match.group("kind") == "count":
+            key = (dependency, outcome)
+            counts[key] = counts.get(key, 0) + value
+        elif outcome == "ok":
+            bound = float(labels["le"])
+            per_dependency = buckets.setdefault(dependency, {})
+            per_dependency[bound] = per_dependency.get(bound, 0) + value
+
+    profile = {}
+    for dependency in DEPENDENCIES:
+        ok = counts.get((dependency, "ok"), 0)
+        errors = counts.get((dependency, "error"), 0)
+        if not ok and not errors:
+            continue
+        config = {}
+        if ok:
+            config["latency"] = format_percentiles(
+                {
+                    p: histogram_quantile(buckets[dependency], p / 100)
+                    for p in percentiles
+                }
+            )
+        if errors:
+            config["error_rate"] = round(errors / (ok + errors), 4)
+        profile[dependency] = config
+    return profile
+
+
+def histogram_quantile(cumulative, q):
+    """Prometheus histogram_quantile과 같은 방식. +Inf 버킷이면 마지막 유한 경계를 반환"""
+    bounds = sorted(cumulative)
+    total = cumulative[bounds[-1]]
+    rank = q * total
+    lower, below = 0.0, 0.0
+    for bound in bounds:
+        count = cumulative[bound]
+        if count >= rank:
+            if bound == float("inf"):
+                return lower
+            if count == below:
+                return bound
+            return lower + (bound - lower) * (rank - below) / (count - below)
+        lower, below = bound, count
+    return lower
+
+
+class FaultInjector:
+    """프로필과 seed로 의존성별 요청마다 주입할 장애(Fault)를 정한다."""
+
+    def __init__(self, profile, seed=0):
+        self.profile = validate(profile)
+        self.seed = seed
+        self.latency = {
+            dependency: parse_distribution(config["latency"])
+            for dependency, config in profile.items()
+            if "latency" in config
+        }
+        self.lock = threading.Lock()
+        self.sequence = {}
+        self.injected = {}
+
+    def decide(self, dependency):
+        config = self.profile.get(dependency)
+        if not config:
+            return NO_FAULT
+        with self.lock:
+            n = self.sequence.get(dependency, 0)
+            self.sequence[dependency] = n + 1
+        rng = random.Random(f"{self.seed}:{dependency}:{n}")
+        delay = self.latency[dependency](rng) if dependency in self.latency else 0.0
+        status = retry_after = None
+        throttle = config.get("throttle")
+        if throttle and n % throttle["every"] < throttle["burst"]:
+            status, retry_after = 429, throttle.get("retry_after", 1)
+        elif rng.random() < config.get("error_rate", 0):
+            status = config.get("error_status", 503)
+        fault = Fault(max(delay, 0.0), status, retry_after, config.get("body_rate"))
+        self.count(dependency, fault)
+        return fault
+
+    def count(self, dependency, fault):
+        with self.lock:
+            counts = self.injected.setdefault(
+                dependency, {"requests": 0, "errors": 0, "throttled": 0, "delay": 0.0}
+            )
+            counts["requests"] += 1
+            counts["delay"] += fault.delay
+            if fault.status == 429:
+                counts["throttled"] += 1
+            elif fault.status:
+                counts["errors"] += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                dependency: dict(counts, delay=round(counts["delay"], 3))
+                for dependency, counts in self.injected.items()
+            }
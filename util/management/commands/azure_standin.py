@@ -0,0 +1,71 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from util import faults, standin
+
+
+class Command(BaseCommand):
+    help = (
+        "Azure OpenAI, Blob Storage, Computer Vision, Speech를 흉내 내는 로컬 서버를 "
+        "실행합니다. 출력되는 환경 변수로 앱을 실행하면 실제 SDK가 이 서버를 호출합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=10100)
+        parser.add_argument(
+            "--account",
+            default="standin",
+            help="연결 문자열에 넣을 스토리지 계정 이름",
+        )
+        parser.add_argument(
+            "--profile",
+            help=f"장애 주입 프로필 이름 (기본 제공: {', '.join(faults.BUILTIN_PROFILES)})",
+        )
+        parser.add_argument(
+            "--profiles", help="프로필을 추가로 정의한 JSON 파일 (이름 -> 프로필)"
+        )
+        parser.add_argument(
+            "--from-metrics",
+            help="운영 /metrics 응답을 저장한 파일. 단계별 히스토그램으로 프로필을 만든다.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["verbosity"] > 1:
+            logging.getLogger().setLevel(logging.DEBUG)
+        profile = self.load_profile(options)
+        injector = faults.FaultInjector(profile, options["seed"]) if profile else None
+        server = standin.make_server(options["host"], options["port"], injector)
+        self.stdout.write(f"Azure stand-in 서버: {server.url}")
+        if profile:
+            self.stdout.write(
+                f"장애 주입 (seed={options['seed']}): "
+                f"{json.dumps(profile, ensure_ascii=False)}"
+            )
+        self.stdout.write("앱에 다음 환경 변수를 설정하세요:")
+        for key, value in standin.environment(server.url, options["account"]).items():
+            self.stdout.write(f"{key}={value}")
+        self.stdout.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"요청 수: {server.state.requests}")
+            if injector:
+                self.stdout.write(f"주입한 장애: {injector.stats()}")
+
+    def load_profile(self, options):
+        try:
+            if options["from_metrics"]:
+                with open(options["from_metrics"], encoding="utf-8") as f:
+                    return faults.profile_from_metrics(f.read())
+            if options["profile"]:
+                return faults.get_profile(options["profile"], options["profiles"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        return None
@@ -0,0 +1,28 @@
+from asgiref.sync import iscoroutinefunction
+from django.utils.decorators import sync_and_async_middleware
+
+from util.common import metrics
+
+
+@sync_and_async_middleware
+def db_metrics_middleware(get_response):
+    """뷰별 DB 쿼리 수와 쿼리 시간을 Prometheus 히스토그램에 기록"""
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            state = metrics.start_request()
+            try:
+                return await get_response(request)
+            finally:
+                metrics.end_request(request, state)
+
+    else:
+
+        def middleware(request):
+            state = metrics.start_request()
+            try:
+                return get_response(request)
+            finally:
+                metrics.end_request(request, state)
+
+    return middleware
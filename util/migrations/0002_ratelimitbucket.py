@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("util", "0001_imageanalysis"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateLimitBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("deployment", models.CharField(max_length=100, unique=True)),
+                ("requests", models.FloatField()),
+                ("tokens", models.FloatField()),
+                ("updated_at", models.FloatField()),
+                ("blocked_until", models.FloatField(default=0)),
+            ],
+        ),
+    ]
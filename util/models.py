@@ -1,3 +1,27 @@
 from django.db import models
 
-# Create your models here.
+
+class ImageAnalysis(models.Model):
+    """이미지 내용 해시별 Computer Vision 분석 결과 캐시"""
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    captions = models.JSONField(default=list)
+    tags = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.content_hash
+
+
+class RateLimitBucket(models.Model):
+    """Azure OpenAI 배포별 토큰 버킷 상태. 여러 워커 프로세스가 함께 사용한다."""
+
+    deployment = models.CharField(max_length=100, unique=True)
+    requests = models.FloatField()
+    tokens = models.FloatField()
+    # time.time() 기준 초
+    updated_at = models.FloatField()
+    blocked_until = models.FloatField(default=0)
+
+    def __str__(self):
+        return self.deployment
@@ -0,0 +1,601 @@
+"""Azure 의존성을 흉내 내는 로컬 HTTP 서버 (manage.py azure_standin)
+
+실제 SDK가 엔드포인트 설정만 바꿔 그대로 호출할 수 있을 만큼의 API를 구현한다.
+- Azure OpenAI: /openai/deployments/<배포>/chat/completions (stream 포함),
+  /openai/deployments/<배포>/images/generations (실제 PNG, b64_json 또는 url)
+- Blob Storage: /blob/<계정>/<컨테이너>/<blob> 의 put(단일/블록), get(range), head, delete
+- Computer Vision: /vision/v3.x/analyze, describe, tag
+- Speech: /cognitiveservices/v1 (SSML -> riff-16khz-16bit-mono-pcm WAV)
+
+모든 데이터는 메모리에만 보관하며 인증 헤더는 확인하지 않는다. util.faults의 프로필을 주면
+의존성(chat, image, download, blob, vision, speech)별로 지연, 오류, 429 제한, 느린 본문 전송을
+주입한다. GET /standin/stats는 API별 요청 수와 주입한 장애 수를 돌려준다.
+"""
+
+import array
+import base64
+import colorsys
+import hashlib
+import io
+import json
+import logging
+import math
+import mimetypes
+import random
+import re
+import threading
+import time
+import uuid
+import wave
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from util.faults import NO_FAULT
+
+TTS_SAMPLE_RATE = 16000
+# 글자당 음성 길이(초)와 최소/최대 길이
+TTS_SECONDS_PER_CHAR = 0.08
+TTS_MIN_SECONDS = 0.5
+TTS_MAX_SECONDS = 15.0
+
+COLOR_NAMES = [
+    (0, "red"),
+    (30, "orange"),
+    (60, "yellow"),
+    (120, "green"),
+    (180, "cyan"),
+    (240, "blue"),
+    (280, "purple"),
+    (330, "pink"),
+    (360, "red"),
+]
+
+
+def _now():
+    return formatdate(usegmt=True)
+
+
+def render_png(prompt, width=1024, height=1024):
+    """프롬프트로 결정되는 그라데이션과 도형 이미지(PNG bytes)"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    start = [rng.randrange(256) for _ in range(3)]
+    end = [rng.randrange(256) for _ in range(3)]
+    gradient = Image.linear_gradient("L").resize((width, height))
+    image = Image.composite(
+        Image.new("RGB", (width, height), tuple(end)),
+        Image.new("RGB", (width, height), tuple(start)),
+        gradient,
+    )
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(width // 20, width // 4)
+        draw.ellipse(
+            (x - radius, y - radius, x + radius, y + radius),
+            fill=tuple(rng.randrange(256) for _ in range(3)),
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def describe_image(data):
+    """(캡션, 태그 목록). 이미지를 읽을 수 없으면 내용 해시로 정한다."""
+    try:
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(data)).convert("RGB")
+        r, g, b = image.resize((1, 1)).getpixel((0, 0))
+        size = image.size
+    except Exception:
+        digest = hashlib.sha256(data).digest()
+        r, g, b = digest[:3]
+        size = (0, 0)
+    hue, lightness, saturation = colorsys.rgb_to_hls(r / 255, g / 255, b / 255)
+    if saturation < 0.15:
+        color = (
+            "gray"
+            if 0.2 < lightness < 0.8
+            else "black" if lightness <= 0.2 else "white"
+        )
+    else:
+        color = min(COLOR_NAMES, key=lambda c: abs(c[0] - hue * 360))[1]
+    shape = "square" if size[0] == size[1] else "wide" if size[0] > size[1] else "tall"
+    tags = [color, "abstract", "art", "painting", shape]
+    return f"a {color} abstract painting", tags, size
+
+
+def synthesize_wav(text):
+    """text 길이에 비례하는 440Hz 신호음 WAV (16kHz, 16bit, mono)"""
+    seconds = min(
+        TTS_MAX_SECONDS, max(TTS_MIN_SECONDS, len(text) * TTS_SECONDS_PER_CHAR)
+    )
+    samples = array.array(
+        "h",
+        (
+            int(2000 * math.sin(2 * math.pi * 440 * i / TTS_SAMPLE_RATE))
+            for i in range(int(seconds * TTS_SAMPLE_RATE))
+        ),
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(TTS_SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class Blob:
+    def __init__(self, data, content_type, cache_control=None):
+        self.data = data
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.etag = f'"0x{uuid.uuid4().hex[:16].upper()}"'
+        self.last_modified = _now()
+
+
+class StandinState:
+    """blob, 생성한 이미지, 요청 수를 메모리에 보관"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.blobs = {}
+        self.blocks = {}
+        self.images = {}
+        self.requests = {}
+
+    def count(self, api):
+        with self.lock:
+            self.requests[api] = self.requests.get(api, 0) + 1
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "AzureStandin/1.0"
+
+    # (메서드 목록, 경로 패턴, 처리 함수 이름, 장애 주입 의존성)
+    ROUTES = [
+        (
+            ("POST",),
+            re.compile(r"/openai/deployments/(?P<deployment>[^/]+)/chat/completions"),
+            "chat_completions",
+            "chat",
+        ),
+        (
+            ("POST",),
+            re.compile(r"/openai/deployments/(?P<deployment>[^/]+)/images/generations"),
+            "image_generations",
+            "image",
+        ),
+        (
+            ("GET",),
+            re.compile(r"/standin/images/(?P<name>[\w.-]+)"),
+            "generated_image",
+            "download",
+        ),
+        (("GET",), re.compile(r"/standin/stats"), "standin_stats", None),
+        (
+            ("POST",),
+            re.compile(r"/vision/v[\d.]+/(?P<operation>analyze|describe|tag)"),
+            "vision",
+            "vision",
+        ),
+        (("POST",), re.compile(r"/cognitiveservices/v1"), "text_to_speech", "speech"),
+        (
+            ("GET", "HEAD", "PUT", "DELETE"),
+            re.compile(
+                r"/blob/(?P<account>[^/]+)/(?P<container>[^/]+)(?:/(?P<blob>.+))?"
+            ),
+            "blob",
+            "blob",
+        ),
+    ]
+
+    fault = NO_FAULT
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def do_GET(self):
+        self.dispatch()
+
+    do_HEAD = do_PUT = do_POST = do_DELETE = do_GET
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+    def read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return bytes(body)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def dispatch(self):
+        url = urlsplit(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.body = self.read_body()
+        for methods, pattern, name, dependency in self.ROUTES:
+            match = pattern.fullmatch(url.path)
+            if match and self.command in methods:
+                self.state.count(name)
+                faults = self.server.faults
+                self.fault = (
+                    faults.decide(dependency) if faults and dependency else NO_FAULT
+                )
+                if self.fault.delay:
+                    time.sleep(self.fault.delay)
+                if self.fault.status:
+                    return self.inject_error(dependency)
+                try:
+                    return getattr(self, name)(**match.groupdict())
+                except Exception as e:
+                    logging.error(f"stand-in 처리 중 오류: {self.path}", exc_info=True)
+                    return self.send_json(500, {"error": {"message": str(e)}})
+        self.send_json(404, {"error": {"code": "NotFound", "message": url.path}})
+
+    def send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("x-ms-request-id", str(uuid.uuid4()))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.write(body)
+
+    def write(self, data):
+        """본문 전송. 장애 프로필에 body_rate가 있으면 그 속도로 나눠 보낸다."""
+        rate = self.fault.body_rate
+        if not rate or self.fault.status:
+            self.wfile.write(data)
+            return
+        # 0.1초 분량씩 보낸다.
+        step = max(1, int(rate / 10))
+        for start in range(0, len(data), step):
+            chunk = data[start : start + step]
+            self.wfile.write(chunk)
+            self.wfile.flush()
+            time.sleep(len(chunk) / rate)
+
+    def inject_error(self, dependency):
+        status, retry_after = self.fault.status, self.fault.retry_after
+        headers = {"Retry-After": str(retry_after)} if retry_after else {}
+        if dependency == "blob":
+            code = "ServerBusy" if status in (429, 503) else "InternalError"
+            return self.blob_error(status, code, headers)
+        code = "429" if status == 429 else "ServiceUnavailable"
+        self.send_json(
+            status,
+            {"error": {"code": code, "message": f"stand-in 장애 주입 ({status})"}},
+            headers=headers,
+        )
+
+    def standin_stats(self):
+        faults = self.server.faults
+        with self.state.lock:
+            requests = dict(self.state.requests)
+        self.send_json(
+            200,
+            {"requests": requests, "faults": faults.stats() if faults else {}},
+        )
+
+    def send_json(self, status, payload, headers=None):
+        self.send(status, json.dumps(payload).encode("utf-8"), headers=headers)
+
+    def json_body(self):
+        return json.loads(self.body or b"{}")
+
+    # Azure OpenAI
+
+    def chat_completions(self, deployment):
+        request = self.json_body()
+        messages = request.get("messages") or [{"content": ""}]
+        last = messages[-1].get("content") or ""
+        if isinstance(last, list):
+            last = " ".join(part.get("text", "") for part in last)
+        content = f"[{deployment}] {last[:500]}"
+        prompt_tokens = len(json.dumps(messages)) // 4
+        completion_tokens = len(content) // 4
+        completion_id = f"chatcmpl-standin-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if request.get("stream"):
+            return self.stream_chat(completion_id, created, deployment, content)
+
+        self.send_json(
+            200,
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": deployment,
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+    def stream_chat(self, completion_id, created, deployment, content):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": deployment,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+            self.write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        event({"role": "assistant", "content": ""})
+        for word in re.findall(r"\S+\s*", content):
+            event({"content": word})
+        event({}, "stop")
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.write_chunk(b"")
+
+    def write_chunk(self, data):
+        self.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def image_generations(self, deployment):
+        request = self.json_body()
+        prompt = request.get("prompt", "")
+        width, height = (int(v) for v in request.get("size", "1024x1024").split("x"))
+        png = render_png(prompt, width, height)
+        item = {"revised_prompt": prompt}
+        if request.get("response_format") == "b64_json":
+            item["b64_json"] = base64.b64encode(png).decode("ascii")
+        else:
+            name = f"{uuid.uuid4().hex}.png"
+            with self.state.lock:
+                self.state.images[name] = png
+            item["url"] = f"http://{self.headers['Host']}/standin/images/{name}"
+        self.send_json(
+            200, {"created": int(time.time()), "data": [item] * request.get("n", 1)}
+        )
+
+    def generated_image(self, name):
+        """생성한 이미지. 저장되지 않은 이름이면 이름으로 512px 이미지를 만들어 준다."""
+        with self.state.lock:
+            png = self.state.images.get(name)
+        if png is None:
+            png = render_png(name, 512, 512)
+        self.send(200, png, content_type="image/png")
+
+    # Computer Vision
+
+    def vision(self, operation):
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            url = self.json_body().get("url", "")
+            data = self.find_image(url) or url.encode("utf-8")
+        else:
+            data = self.body
+        caption, tags, (width, height) = describe_image(data)
+        scored = [
+            {"name": tag, "confidence": round(0.99 - i * 0.05, 2)}
+            for i, tag in enumerate(tags)
+        ]
+        description = {
+            "tags": tags,
+            "captions": [{"text": caption, "confidence": 0.9}],
+        }
+        result = {
+            "requestId": str(uuid.uuid4()),
+            "metadata": {"width": width, "height": height, "format": "Png"},
+            "modelVersion": "2021-05-01",
+        }
+        if operation == "describe":
+            result["description"] = description
+        elif operation == "tag":
+            result["tags"] = scored
+        else:
+            features = self.query.get("visualFeatures", "Description,Tags").lower()
+            if "description" in features:
+                result["description"] = description
+            if "tags" in features:
+                result["tags"] = scored
+        self.send_json(200, result)
+
+    def find_image(self, url):
+        """stand-in에 저장된 blob이나 생성 이미지의 URL이면 그 bytes"""
+        path = urlsplit(url).path
+        with self.state.lock:
+            if path.startswith("/standin/images/"):
+                return self.state.images.get(path.rsplit("/", 1)[-1])
+            match = re.fullmatch(r"/blob/([^/]+)/([^/]+)/(.+)", path)
+            blob = self.state.blobs.get(match.groups()) if match else None
+            return blob.data if blob else None
+
+    # Speech
+
+    def text_to_speech(self):
+        text = re.sub(r"<[^>]+>", "", self.body.decode("utf-8", "replace")).strip()
+        self.send(200, synthesize_wav(text), content_type="audio/wav")
+
+    # Blob Storage
+
+    def blob(self, account, container, blob):
+        if blob is None:
+            return self.container(account, container)
+        key = (account, container, blob)
+        handler = {
+            "PUT": self.put_blob,
+            "GET": self.get_blob,
+            "HEAD": self.get_blob,
+            "DELETE": self.delete_blob,
+        }[self.command]
+        return handler(key)
+
+    def container(self, account, container):
+        if self.command == "PUT":
+            return self.send(
+                201, content_type="application/xml", headers=self.blob_headers(None)
+            )
+        if self.command == "DELETE":
+            with self.state.lock:
+                for key in [
+                    k for k in self.state.blobs if k[:2] == (account, container)
+                ]:
+                    del self.state.blobs[key]
+            return self.send(202, content_type="application/xml")
+        self.send(200, content_type="application/xml", headers=self.blob_headers(None))
+
+    def blob_headers(self, blob):
+        headers = {
+            "Date": _now(),
+            "x-ms-version": self.headers.get("x-ms-version", "2025-01-05"),
+        }
+        if blob is not None:
+            headers.update(
+                {
+                    "ETag": blob.etag,
+                    "Last-Modified": blob.last_modified,
+                    "x-ms-blob-type": "BlockBlob",
+                    "x-ms-creation-time": blob.last_modified,
+                    "x-ms-lease-state": "available",
+                    "x-ms-lease-status": "unlocked",
+                    "x-ms-server-encrypted": "true",
+                    "Accept-Ranges": "bytes",
+                }
+            )
+            if blob.cache_control:
+                headers["Cache-Control"] = blob.cache_control
+        return headers
+
+    def blob_error(self, status, code, headers=None):
+        body = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            f"<Error><Code>{code}</Code><Message>{code}</Message></Error>"
+        ).encode("utf-8")
+        self.send(
+            status,
+            body,
+            content_type="application/xml",
+            headers={"x-ms-error-code": code, **(headers or {})},
+        )
+
+    def put_blob(self, key):
+        comp = self.query.get("comp")
+        if comp == "block":
+            with self.state.lock:
+                self.state.blocks.setdefault(key, {})[self.query["blockid"]] = self.body
+            return self.send(
+                201, content_type="application/xml", headers=self.blob_headers(None)
+            )
+        if comp == "blocklist":
+            block_ids = [element.text for element in ET.fromstring(self.body)]
+            with self.state.lock:
+                blocks = self.state.blocks.pop(key, {})
+                current = self.state.blobs.get(key)
+            if any(block_id not in blocks for block_id in block_ids):
+                return self.blob_error(400, "InvalidBlockList")
+            data = b"".join(blocks[block_id] for block_id in block_ids)
+        elif comp:
+            # 메타데이터, 속성 등 그 밖의 작업은 저장 없이 성공으로 응답
+            with self.state.lock:
+                current = self.state.blobs.get(key)
+            if current is None:
+                return self.blob_error(404, "BlobNotFound")
+            return self.send(200, headers=self.blob_headers(current))
+        else:
+            data = self.body
+        content_type = self.headers.get("x-ms-blob-content-type") or (
+            mimetypes.guess_type(key[2])[0] or "application/octet-stream"
+        )
+        blob = Blob(data, content_type, self.headers.get("x-ms-blob-cache-control"))
+        with self.state.lock:
+            self.state.blobs[key] = blob
+        headers = self.blob_headers(blob)
+        headers["x-ms-request-server-encrypted"] = "true"
+        headers["Content-MD5"] = base64.b64encode(hashlib.md5(data).digest()).decode()
+        self.send(201, content_type="application/xml", headers=headers)
+
+    def get_blob(self, key):
+        with self.state.lock:
+            blob = self.state.blobs.get(key)
+        if blob is None:
+            return self.blob_error(404, "BlobNotFound")
+        headers = self.blob_headers(blob)
+        size = len(blob.data)
+        requested = self.headers.get("x-ms-range") or self.headers.get("Range")
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", requested or "")
+        if not match or size == 0:
+            return self.send(200, blob.data, blob.content_type, headers)
+        start = int(match.group(1))
+        end = min(int(match.group(2) or size - 1), size - 1)
+        if start >= size:
+            return self.blob_error(416, "InvalidRange")
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        self.send(206, blob.data[start : end + 1], blob.content_type, headers)
+
+    def delete_blob(self, key):
+        with self.state.lock:
+            blob = self.state.blobs.pop(key, None)
+        if blob is None:
+            return self.blob_error(404, "BlobNotFound")
+        self.send(202, content_type="application/xml", headers=self.blob_headers(None))
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, faults=None):
+        super().__init__(address, StandinHandler)
+        self.state = StandinState()
+        # util.faults.FaultInjector 또는 None
+        self.faults = faults
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def make_server(host="127.0.0.1", port=0, faults=None):
+    """stand-in 서버를 만들어 반환 (serve_forever는 호출하는 쪽에서 실행)"""
+    return StandinServer((host, port), faults)
+
+
+def environment(url, account="standin"):
+    """앱이 stand-in을 사용하도록 하는 환경 변수"""
+    key = base64.b64encode(account.encode("utf-8")).decode("ascii")
+    return {
+        "AZURE_OPENAI_ENDPOINT": f"{url}/",
+        "AZURE_DALLE_ENDPOINT": f"{url}/",
+        "AZURE_3OMINI_ENDPOINT": f"{url}/",
+        "AZURE_COMPUTER_VISION_ENDPOINT": f"{url}/",
+        "AZURE_SPEECH_TTS_ENDPOINT": f"{url}/cognitiveservices/v1",
+        "AZURE_CONNECTION_STRING": (
+            f"DefaultEndpointsProtocol=http;AccountName={account};AccountKey={key};"
+            f"BlobEndpoint={url}/blob/{account};"
+        ),
+    }
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = "util"
+
+urlpatterns = [
+    path("clients/", views.client_stats, name="client_stats"),
+    path("status/", views.status, name="status"),
+]
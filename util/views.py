@@ -1,3 +1,56 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
+
+from util.common import clients, hedging, metrics, model_pool, rate_limit, resilience
+
+
+@staff_member_required
+@require_GET
+def client_stats(request):
+    """현재 프로세스의 외부 서비스 클라이언트 생성/연결 재사용, 호출 한도 대기,
+    엔드포인트 풀 상태, hedged request, 서킷 브레이커 통계 (관리자 전용)"""
+    return JsonResponse(
+        {
+            **clients.stats(),
+            "rate_limit": rate_limit.stats(),
+            "model_pool": model_pool.stats(),
+            "hedging": hedging.stats(),
+            "circuit_breakers": resilience.stats(),
+        }
+    )
+
+
+@staff_member_required
+@require_GET
+def status(request):
+    """외부 서비스별 서킷 브레이커와 모델 엔드포인트 상태 페이지 (관리자 전용, 현재 프로세스)"""
+    return render(
+        request,
+        "util/status.html",
+        {
+            "pid": os.getpid(),
+            "breakers": resilience.stats(),
+            "model_pool": model_pool.stats(),
+        },
+    )
+
 
-# Create your views here.
+@require_GET
+def prometheus_metrics(request):
+    """Prometheus 수집용 지표. METRICS_TOKEN이 설정되어 있으면 Bearer 토큰, 아니면 관리자만 허용"""
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if token:
+        allowed = hmac.compare_digest(authorization, f"Bearer {token}")
+    else:
+        allowed = request.user.is_active and request.user.is_staff
+    if not allowed:
+        return HttpResponse(status=403)
+    body, content_type = metrics.export()
+    return HttpResponse(body, content_type=content_type)